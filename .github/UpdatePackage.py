@@ -3,6 +3,7 @@ import os
 import time
 import json
 import base64
+import hashlib
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
@@ -261,13 +262,16 @@ def main():
         new_llc_download_url = {'zip':zip_asset.download_url, 
                                 'seven':seven_zip_asset.download_url}
         
+        new_llc_sha256 = {}
         with open(zip_asset.name, "wb") as f:
             r = requests.get(zip_asset.download_url, verify=False) # 关闭SSL验证
             f.write(r.content)
+            new_llc_sha256['zip'] = hashlib.sha256(r.content).hexdigest()
             
         with open(seven_zip_asset.name, "wb") as f:
             r = requests.get(seven_zip_asset.download_url, verify=False) # 关闭SSL验证
             f.write(r.content)
+            new_llc_sha256['seven'] = hashlib.sha256(r.content).hexdigest()
         
         file_transfer = UpFileClient()
         llc_upload_result = file_transfer.upload(zip_asset.name)
@@ -285,6 +289,7 @@ def main():
         }
         current_data['llc_download_url'] = new_llc_download_url
         current_data['llc_download_mirror'] = new_llc_mirror
+        current_data['llc_sha256'] = new_llc_sha256
         current_data['llc_version'] = new_llc_version
         if need_update_llc:current_data['llc_last_update_time'] = datetime.now().isoformat()
         current_data['llc_mirror_update_time'] = datetime.now().isoformat()
@@ -0,0 +1,486 @@
+"""
+汉化部署
+
+每次启动游戏前都要删掉游戏目录中的 LLC_zh-CN、重新复制、应用自定义修改和各项美化、再复制字体，
+即使和上次启动相比什么都没变。
+
+这里把决定部署结果的所有输入（汉化版本、汉化包中的文件、自定义修改记录、相关设置、字体文件、启动器版本）算成一个指纹，
+部署成功后写在游戏 Lang 目录下；下次启动时指纹一致且部署的目录仍然完整，就可以跳过整个部署直接启动游戏。
+开启战斗提示替换时每次启动都要重新随机选择提示，不能跳过部署。
+
+需要部署时，先在旁边的暂存目录 `LLC_zh-CN.staging` 中构建完整的汉化目录，全部完成后再用两次重命名换上：
+正在使用的目录改名为 `LLC_zh-CN.previous`，暂存目录改名为 `LLC_zh-CN`。
+游戏在任何时候看到的都是完整的汉化目录，构建中途出错时正在使用的目录不受影响，
+上一次的目录一直保留到下次部署成功，需要时可以回滚。
+
+构建暂存目录时，不会被修改的文件尽量用硬链接（或支持时的reflink）代替复制，只有被处理过的文件才真正写入，
+workshop 与游戏目录不在同一个磁盘时自动退回普通复制。
+因为部署出去的文件可能与 workshop 中的文件是同一份数据，所有写入都必须写新文件再替换（见 `replace_copy`、`replace_write`），不能原地改写。
+
+部署清单 `LLC_zh-CN.manifest.json` 记录了已部署目录中每个文件的大小、修改时间、内容哈希和来源。
+再次部署时，来源没变且未被改动过的文件直接从正在使用的目录硬链接到暂存目录（同一个磁盘，总能链接），
+处理后内容与已部署文件相同的也直接链接，只有真正不同的文件才会写入；清单缺失或无效时才完整重建。
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+PACK_NAME = 'LLC_zh-CN'
+WORKSHOP_PACK = os.path.join('workshop', PACK_NAME)
+FONT_DIR = 'Font'
+FINGERPRINT_FILE = 'LLC_zh-CN.fingerprint.json'
+MANIFEST_FILE = 'LLC_zh-CN.manifest.json'
+MANIFEST_VERSION = 1
+STAGING_SUFFIX = '.staging'
+PREVIOUS_SUFFIX = '.previous'
+
+# 会影响部署结果的设置项
+FINGERPRINT_SETTINGS = [
+    'enable_text_gradient',
+    'bubble_text_gradient_rate',
+    'enable_show_user_name',
+    'user_name',
+    'enable_ego_style',
+    'enable_skill_style',
+    'enable_speical_tip',
+]
+
+
+def hash_file(path: str) -> str:
+    """文件内容的哈希，文件不存在时返回空字符串"""
+    if not os.path.exists(path):
+        return ""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """与 hash_file 相同算法的内存数据哈希"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_tree_stat(path: str) -> str:
+    """按文件名、大小和修改时间计算目录的哈希（不读取文件内容）"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            stat = os.stat(file_path)
+            relpath = os.path.relpath(file_path, path).replace('\\', '/')
+            hasher.update(f"{relpath}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def get_pack_version(pack_dir: str = WORKSHOP_PACK) -> str:
+    """读取汉化包的版本号"""
+    try:
+        with open(os.path.join(pack_dir, 'info', 'version.json'), 'r', encoding='utf-8') as f:
+            return str(json.load(f)['version'])
+    except Exception:
+        return ""
+
+
+def compute_fingerprint(settings_manager) -> dict:
+    """计算本次部署的输入指纹"""
+    from functions.patch_store import get_patch_store
+    settings = {key: settings_manager.get_setting(key) for key in FINGERPRINT_SETTINGS}
+
+    return {
+        'llc_version': get_pack_version(),
+        'pack_info': hash_file(os.path.join(WORKSHOP_PACK, 'info', 'version.json')),
+        # 自动翻译工具和手动修改会直接改写汉化包中的文件而不改版本号
+        'pack': hash_tree_stat(WORKSHOP_PACK),
+        'changes': hash_file(get_patch_store().index_path),  # 索引中有每个分片的哈希
+        'settings': hashlib.blake2b(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                                    digest_size=16).hexdigest(),
+        'font': hash_tree_stat(FONT_DIR),
+        'launcher': settings_manager.get_setting('version_info') or "",
+        # 战斗提示每次部署都随机替换，上次的结果不能沿用
+        'random_hints': bool(settings['enable_speical_tip']),
+    }
+
+
+def get_lang_dir(game_path: str) -> str:
+    return os.path.join(game_path, 'LimbusCompany_Data', 'Lang')
+
+
+def get_fingerprint_path(game_path: str) -> str:
+    return os.path.join(get_lang_dir(game_path), FINGERPRINT_FILE)
+
+
+def load_fingerprint(game_path: str) -> Optional[dict]:
+    """读取上次部署成功时记录的指纹"""
+    try:
+        with open(get_fingerprint_path(game_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_fingerprint(game_path: str, fingerprint: dict):
+    """部署成功后记录指纹"""
+    try:
+        with open(get_fingerprint_path(game_path), 'w', encoding='utf-8') as f:
+            json.dump(fingerprint, f, indent=4, ensure_ascii=False)
+    except Exception as e:
+        print(f"保存部署记录失败: {e}")
+
+
+def clear_fingerprint(game_path: str):
+    """开始部署前删除旧的指纹，部署中途失败时下次会重新部署"""
+    try:
+        os.remove(get_fingerprint_path(game_path))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"删除部署记录失败: {e}")
+
+
+def is_up_to_date(game_path: str, fingerprint: dict) -> bool:
+    """游戏目录中已部署的汉化是否与本次的输入一致"""
+    if not fingerprint.get('llc_version') or fingerprint.get('random_hints'):
+        return False
+    lang_dir = get_lang_dir(game_path)
+    if not os.path.isdir(os.path.join(lang_dir, PACK_NAME)) or \
+       not os.path.exists(os.path.join(lang_dir, 'config.json')):
+        return False
+    return load_fingerprint(game_path) == fingerprint
+
+
+# Linux 上 FICLONE ioctl 的编号，用于创建reflink（btrfs、xfs等文件系统支持）
+FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str):
+    """创建与源文件共享数据块的副本，文件系统不支持时抛出 OSError"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("当前系统不支持reflink")
+    import fcntl
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+class TreeLinker:
+    """把文件放到部署目录：依次尝试硬链接、reflink、复制，某种方式失败后不再尝试"""
+
+    METHODS = ['hardlink', 'reflink', 'copy']
+
+    def __init__(self):
+        self.methods = list(self.METHODS)
+        self.counts = {method: 0 for method in self.METHODS}
+
+    def place(self, src: str, dst: str):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        while True:
+            method = self.methods[0]
+            try:
+                if method == 'hardlink':
+                    os.link(src, dst)
+                elif method == 'reflink':
+                    _reflink(src, dst)
+                else:
+                    shutil.copy2(src, dst)
+                self.counts[method] += 1
+                return
+            except OSError:
+                if method == 'copy':
+                    raise
+                # 跨磁盘、文件系统不支持等情况，之后的文件直接用下一种方式
+                self.methods.pop(0)
+
+    def place_tree(self, src_dir: str, dst_dir: str):
+        """与 shutil.copytree(dirs_exist_ok=True) 相同的目录结构，文件按可用的方式放置"""
+        for root, dirs, files in os.walk(src_dir):
+            target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+            os.makedirs(target_root, exist_ok=True)
+            for file_name in files:
+                self.place(os.path.join(root, file_name), os.path.join(target_root, file_name))
+
+    def summary(self) -> str:
+        names = {'hardlink': '硬链接', 'reflink': 'reflink', 'copy': '复制'}
+        return "，".join(f"{names[method]} {count} 个" for method, count in self.counts.items() if count)
+
+
+def replace_copy(src: str, dst: str) -> str:
+    """复制文件时先写临时文件再替换目标，不会改写与目标共享数据的其他硬链接
+
+    可以作为 shutil.copytree 的 copy_function
+    """
+    temp = dst + '.tmp'
+    shutil.copy2(src, temp)
+    os.replace(temp, dst)
+    return dst
+
+
+def replace_write(path: str, content):
+    """写入文件时先写临时文件再替换目标，不会改写与目标共享数据的其他硬链接
+
+    游戏目录和 workshop 中的汉化文件都可能是彼此的硬链接，写入这些文件都要经过这里（或 `replace_copy`）
+
+    Args:
+        path: 目标文件
+        content: 文件内容，str 与 open(path, 'w', encoding='utf-8') 一样按文本写入
+    """
+    temp = path + '.tmp'
+    if isinstance(content, str):
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(content)
+    else:
+        with open(temp, 'wb') as f:
+            f.write(content)
+    os.replace(temp, path)
+
+
+def replace_write_json(path: str, data, indent: Optional[int] = 4):
+    """与 json.dump(data, f, ensure_ascii=False, indent=indent) 写出相同的内容，经 `replace_write` 写入"""
+    replace_write(path, json.dumps(data, ensure_ascii=False, indent=indent))
+
+
+def get_pack_dirs(game_path: str):
+    """返回 (正在使用的目录, 暂存目录, 上一次的目录)"""
+    live = os.path.join(get_lang_dir(game_path), PACK_NAME)
+    return live, live + STAGING_SUFFIX, live + PREVIOUS_SUFFIX
+
+
+def recover_interrupted(game_path: str):
+    """上次换目录时在两次重命名之间中断，把上一次的目录换回来"""
+    live, _, previous = get_pack_dirs(game_path)
+    if not os.path.exists(live) and os.path.isdir(previous):
+        print("检测到上次部署未完成，恢复之前的汉化目录")
+        os.rename(previous, live)
+
+
+def prepare_staging(game_path: str) -> str:
+    """清理残留的暂存目录，返回本次使用的暂存目录"""
+    recover_interrupted(game_path)
+    _, staging, _ = get_pack_dirs(game_path)
+    if os.path.exists(staging):
+        shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.dirname(staging), exist_ok=True)
+    return staging
+
+
+def discard_staging(game_path: str):
+    """部署失败时删除暂存目录"""
+    _, staging, _ = get_pack_dirs(game_path)
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def swap_in(game_path: str):
+    """用暂存目录替换正在使用的目录，原目录保留为上一次的目录
+
+    失败时抛出异常，正在使用的目录保持原样
+    """
+    live, staging, previous = get_pack_dirs(game_path)
+    if not os.path.isdir(staging):
+        raise FileNotFoundError(f"暂存目录不存在: {staging}")
+
+    if os.path.exists(previous):
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(previous):
+            raise OSError(f"无法删除旧的汉化目录: {previous}")
+
+    had_live = os.path.exists(live)
+    if had_live:
+        os.rename(live, previous)
+    try:
+        os.rename(staging, live)
+    except Exception:
+        if had_live:
+            os.rename(previous, live)
+        raise
+    print("新的汉化目录已启用")
+
+
+def rollback(game_path: str) -> bool:
+    """换回上一次部署的汉化目录（当前目录成为新的"上一次"）"""
+    live, _, previous = get_pack_dirs(game_path)
+    if not os.path.isdir(previous):
+        print("没有可以回滚的汉化目录")
+        return False
+
+    swapping = live + '.swap'
+    shutil.rmtree(swapping, ignore_errors=True)
+    if os.path.exists(live):
+        os.rename(live, swapping)
+    os.rename(previous, live)
+    if os.path.exists(swapping):
+        os.rename(swapping, previous)
+    # 记录的指纹属于被换下的目录
+    clear_fingerprint(game_path)
+    print("已回滚到上一次部署的汉化")
+    return True
+
+
+# ---------- 部署清单 ----------
+
+def get_manifest_path(game_path: str) -> str:
+    return os.path.join(get_lang_dir(game_path), MANIFEST_FILE)
+
+
+def load_manifest(game_path: str) -> Optional[Dict[str, dict]]:
+    """读取已部署目录的清单 {目录内相对路径: 条目}，缺失或格式不对时返回 None"""
+    try:
+        with open(get_manifest_path(game_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION or not isinstance(manifest.get('files'), dict):
+            return None
+        return manifest['files']
+    except Exception:
+        return None
+
+
+def save_manifest(game_path: str, files: Dict[str, dict]):
+    try:
+        with open(get_manifest_path(game_path), 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': files}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"保存部署清单失败: {e}")
+
+
+def clear_manifest(game_path: str):
+    """换目录前删除清单，中途失败时下次完整重建"""
+    try:
+        os.remove(get_manifest_path(game_path))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"删除部署清单失败: {e}")
+
+
+def _stat_signature(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _is_intact(live_dir: str, relpath: str, entry: dict) -> bool:
+    """已部署的文件是否仍是清单记录时的样子"""
+    try:
+        return _stat_signature(os.path.join(live_dir, relpath)) == [entry['size'], entry['mtime_ns']]
+    except (OSError, KeyError):
+        return False
+
+
+def _make_entry(path: str, source: Optional[List[int]], transformed: bool, digest: str = "") -> dict:
+    size, mtime_ns = _stat_signature(path)
+    return {
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'hash': digest or hash_file(path),
+        'source': source,  # 来源文件的 [大小, 修改时间]，被处理过的文件为 None
+        'transformed': transformed,
+    }
+
+
+class StagingBuilder:
+    """对照部署清单构建暂存目录，只写入与已部署目录不同的文件"""
+
+    def __init__(self, game_path: str, linker: Optional[TreeLinker] = None):
+        self.game_path = game_path
+        self.live_dir, self.staging_dir, _ = get_pack_dirs(game_path)
+        self.linker = linker or TreeLinker()
+        self.manifest = load_manifest(game_path) if os.path.isdir(self.live_dir) else None
+        self.files: Dict[str, dict] = {}
+        self.reused = 0  # 从正在使用的目录直接链接的文件数
+
+    def _link_live(self, relpath: str, target: str) -> bool:
+        """把正在使用的目录中的文件硬链接到暂存目录"""
+        try:
+            if os.path.lexists(target):
+                os.remove(target)
+            os.link(os.path.join(self.live_dir, relpath), target)
+            return True
+        except OSError:
+            return False
+
+    def place_sources(self, sources: List[Tuple[str, str]], transformed: set):
+        """放置所有来源文件
+
+        Args:
+            sources: [(来源目录, 在部署目录中的前缀)]，后面的来源覆盖前面的同名文件
+            transformed: 之后会被处理的文件（部署目录内的相对路径），它们总是从来源放置
+        """
+        wanted = {}
+        for source_dir, prefix in sources:
+            for root, _, files in os.walk(source_dir):
+                for file_name in files:
+                    src = os.path.join(root, file_name)
+                    relpath = os.path.relpath(src, source_dir)
+                    wanted[os.path.join(prefix, relpath).replace('\\', '/')] = src
+
+        for relpath, src in wanted.items():
+            target = os.path.join(self.staging_dir, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            source_signature = _stat_signature(src)
+            entry = (self.manifest or {}).get(relpath)
+            if relpath not in transformed and entry and not entry.get('transformed') and \
+               entry.get('source') == source_signature and _is_intact(self.live_dir, relpath, entry) and \
+               self._link_live(relpath, target):
+                self.files[relpath] = entry
+                self.reused += 1
+                continue
+
+            self.linker.place(src, target)
+            if relpath not in transformed:
+                self.files[relpath] = _make_entry(target, source_signature, False)
+
+    def reusable_outputs(self, transformed: set) -> Dict[str, Tuple[str, str]]:
+        """上次处理后的文件 {部署目录内相对路径: (内容哈希, 已部署文件路径)}，处理结果相同时可以直接链接"""
+        reusable = {}
+        for relpath in transformed:
+            entry = (self.manifest or {}).get(relpath)
+            if entry and entry.get('transformed') and _is_intact(self.live_dir, relpath, entry):
+                reusable[relpath] = (entry['hash'], os.path.join(self.live_dir, relpath))
+        return reusable
+
+    def record_outputs(self, transformed: set, reusable: Dict[str, Tuple[str, str]]):
+        """处理完成后记录被处理文件的清单条目"""
+        for relpath in transformed:
+            target = os.path.join(self.staging_dir, relpath)
+            if not os.path.exists(target):
+                continue
+            live = reusable.get(relpath)
+            if live and os.path.exists(live[1]) and os.path.samefile(target, live[1]):
+                self.files[relpath] = self.manifest[relpath] # type: ignore
+                self.reused += 1
+            else:
+                self.files[relpath] = _make_entry(target, None, True)
+
+    def summary(self) -> str:
+        parts = [f"沿用 {self.reused} 个"] if self.reused else []
+        placed = self.linker.summary()
+        if placed:
+            parts.append(placed)
+        if self.manifest is not None:
+            removed = len(set(self.manifest) - set(self.files))
+            if removed:
+                parts.append(f"删除 {removed} 个")
+        else:
+            parts.append("完整重建")
+        return "，".join(parts)
+
+
+if __name__ == "__main__":
+    import sys
+    from functions.settings_manager import get_settings_manager
+    settings_manager = get_settings_manager()
+    current = compute_fingerprint(settings_manager)
+    print(json.dumps(current, indent=4, ensure_ascii=False))
+    game_path = settings_manager.get_setting('game_path') or ''
+    if 'rollback' in sys.argv:
+        rollback(game_path)
+    print("已是最新部署" if is_up_to_date(game_path, current) else "需要重新部署")
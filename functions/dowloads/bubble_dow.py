@@ -1,16 +1,67 @@
 from functions.dowloads.sql_manager import *
+from functions.deploy import replace_copy
+
+# 气泡文本先下载到缓存目录，再复制到游戏目录，快速启动时可以直接使用上次下载的
+BUBBLE_CACHE_DIR = 'cache/bubble'
+BUBBLE_FILES = ['BattleSpeechBubbleDlg.json', 'BattleSpeechBubbleDlg_Cultivation.json', 'BattleSpeechBubbleDlg_mowe.json']
+
+def fetch_bubble_files():
+    """从数据库下载三个气泡文本到缓存目录
+
+    Returns:
+        下载的文件名列表，失败时返回 None
+    """
+    print("正在从数据库获取JSON文件内容...")
+    contents = get_bubble_json_files(**db_config)
+    if not all(contents):
+        print("无法从数据库获取JSON文件内容")
+        return None
+
+    os.makedirs(BUBBLE_CACHE_DIR, exist_ok=True)
+    for file_name, content in zip(BUBBLE_FILES, contents):
+        print(f" - {file_name}: {len(content)} 字符")
+        # 后台更新时前台可能正在复制，写新文件再替换
+        cache_file = os.path.join(BUBBLE_CACHE_DIR, file_name)
+        with open(cache_file + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(cache_file + '.tmp', cache_file)
+    return list(BUBBLE_FILES)
 
 def download_bubble_files(config_path: str = "") -> bool:
     """从数据库下载JSON文件到游戏目录"""
+    from functions.dowloads.net_cache import get_network_cache
+
     # 加载游戏路径配置
     game_path = config_path
-    
+
     if not game_path:
         print("未配置游戏路径，请在config/settings.json中设置game_path")
         return False
-    
-    # 使用sql_manager中的下载功能
-    return download_bubble_files_to_game(**db_config, game_path=game_path)
+
+    if not os.path.exists(game_path):
+        print(f"游戏路径不存在: {game_path}")
+        return False
+
+    # 快速启动时在有效期内使用缓存目录中上次下载的文件，缓存文件缺失时重新下载
+    network_cache = get_network_cache()
+    files = network_cache.get('bubble', fetch_bubble_files)
+    if files and not all(os.path.exists(os.path.join(BUBBLE_CACHE_DIR, name)) for name in files):
+        files = network_cache.get('bubble', fetch_bubble_files, ttl=0)
+    if not files:
+        return False
+
+    # 目标目录：游戏目录下的LimbusCompany_Data/Lang/LLC_zh-CN
+    target_dir = os.path.join(game_path, 'LimbusCompany_Data', 'Lang', 'LLC_zh-CN')
+    try:
+        os.makedirs(target_dir, exist_ok=True)
+        for file_name in files:
+            replace_copy(os.path.join(BUBBLE_CACHE_DIR, file_name), os.path.join(target_dir, file_name))
+            print(f"保存 {file_name} 成功")
+        print(f"JSON文件已成功保存到: {target_dir}")
+        return True
+    except Exception as e:
+        print(f"保存气泡文件时出错: {e}")
+        return False
 
 def upload_bubble_files():
     """上传temp目录中的JSON文件到数据库"""
@@ -22,13 +73,13 @@ def main(config_path: str = ""):
     print("=" * 50)
     print("Bubble 气泡文本下载")
     print("=" * 50)
-    
+
     success = download_bubble_files(config_path=config_path)
-    
+
     if success:
         print("操作完成!")
     else:
         print("操作失败!")
-        
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -12,6 +12,14 @@ class ReleaseAsset:
     download_url: str
     content_type: str
     download_count: int
+    digest: str = ""  # GitHub提供的摘要，格式如 "sha256:..."
+    
+    @property
+    def sha256(self) -> str:
+        """SHA-256摘要（十六进制），Release未提供时为空字符串"""
+        if self.digest and self.digest.startswith("sha256:"):
+            return self.digest[len("sha256:"):]
+        return ""
     
     @property
     def formatted_size(self) -> str:
@@ -273,7 +281,8 @@ class GitHubReleaseFetcher:
                 size=asset['size'],
                 download_url=asset['browser_download_url'],
                 content_type=asset.get('content_type', 'application/octet-stream'),
-                download_count=asset.get('download_count', 0)
+                download_count=asset.get('download_count', 0),
+                digest=asset.get('digest') or ""
             ))
         
         # 创建ReleaseInfo对象
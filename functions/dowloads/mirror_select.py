@@ -0,0 +1,227 @@
+"""
+下载源测速选择模块
+
+把所有候选下载地址同时发起 `Range: bytes=0-262143` 请求，谁先收完这 256KB 谁就是当前最快的源，
+其余请求立即取消。每次测得的速度以指数滑动平均记录在 `config/mirror_stats.json` 中，
+下次测速时用来挑选参与竞速的候选，全部测速失败时也按历史速度兜底。
+"""
+import os
+import json
+import threading
+import time
+import requests
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+PROBE_BYTES = 256 * 1024  # 每个候选测速下载的字节数
+PROBE_TIMEOUT = 10  # 单个候选的最长测速时间（秒）
+MAX_RACERS = 6  # 同时参与竞速的候选数量上限
+EXPLORE_SLOTS = 2  # 留给没有历史记录的候选的名额
+EMA_ALPHA = 0.5  # 历史速度的平滑系数，越大越看重最近一次
+STATS_PATH = 'config/mirror_stats.json'
+
+
+class MirrorStats:
+    """各下载源的历史测速记录"""
+
+    def __init__(self, path: str = STATS_PATH):
+        self.path = path
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key_of(url: str) -> str:
+        """按"代理前缀 + 域名"区分下载源，同一个源换了文件也能沿用历史速度"""
+        parsed = urlparse(url)
+        inner = parsed.path.lstrip('/')
+        if inner.startswith('http://') or inner.startswith('https://'):
+            return f"{parsed.netloc}/{urlparse(inner).netloc}"
+        return parsed.netloc
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+        except Exception as e:
+            print(f"读取测速记录失败: {e}")
+            self.stats = {}
+
+    def save(self):
+        """保存测速记录
+
+        被取消的测速结束时会在其他线程中保存，整个保存过程依次进行，先写临时文件再替换，不会留下写了一半的文件
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self.stats, indent=4, ensure_ascii=False)
+                temp_path = self.path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"保存测速记录失败: {e}")
+
+    def get_speed(self, url: str) -> Optional[float]:
+        """获取历史平均速度（KB/s），没有记录时返回 None"""
+        record = self.stats.get(self.key_of(url))
+        return record['speed'] if record else None
+
+    def record(self, url: str, speed: float):
+        """记录一次测速结果（KB/s），失败时传入 0"""
+        key = self.key_of(url)
+        with self._lock:
+            record = self.stats.get(key)
+            if record is None:
+                record = {'speed': speed, 'samples': 0}
+            else:
+                record['speed'] = EMA_ALPHA * speed + (1 - EMA_ALPHA) * record['speed']
+            record['samples'] += 1
+            record['updated'] = int(time.time())
+            self.stats[key] = record
+
+
+def pick_racers(urls: List[str], stats: MirrorStats, limit: int = MAX_RACERS) -> List[str]:
+    """按历史速度挑选参与竞速的候选，同时给没测过的源留出名额"""
+    known = sorted((u for u in urls if stats.get_speed(u) is not None),
+                   key=lambda u: stats.get_speed(u), reverse=True)
+    unknown = [u for u in urls if stats.get_speed(u) is None]
+
+    explore = unknown[:EXPLORE_SLOTS]
+    racers = known[:max(0, limit - len(explore))] + explore
+    # 历史记录不足时用剩余的未知候选补满
+    for url in unknown[EXPLORE_SLOTS:] + known[len(racers):]:
+        if len(racers) >= limit:
+            break
+        if url not in racers:
+            racers.append(url)
+    return racers
+
+
+def _probe(url: str, stop_event: threading.Event, probe_bytes: int, timeout: float):
+    """测速下载一个候选的前 probe_bytes 字节
+
+    Returns:
+        (下载字节数, 耗时秒数, 是否完整收完)
+    """
+    start_time = time.time()
+    received = 0
+    complete = False
+    response = requests.get(url, headers={'Range': f'bytes=0-{probe_bytes - 1}'},
+                            stream=True, verify=False, timeout=timeout)
+    try:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            if stop_event.is_set() or time.time() - start_time > timeout:
+                break
+            received += len(chunk)
+            if received >= probe_bytes:
+                complete = True
+                break
+        else:
+            # 文件比测速大小还小，数据已经全部收完
+            complete = received > 0
+    finally:
+        response.close()
+
+    return received, max(time.time() - start_time, 1e-6), complete
+
+
+def _record_cancelled(future, url: str, stats: MirrorStats):
+    """记录被取消的测速结果"""
+    try:
+        received, elapsed, _ = future.result()
+    except Exception:
+        return
+    if received:
+        stats.record(url, received / 1024 / elapsed)
+    stats.save()
+
+
+def race_mirrors(urls: List[str], stats: Optional[MirrorStats] = None,
+                 probe_bytes: int = PROBE_BYTES, timeout: float = PROBE_TIMEOUT) -> Optional[str]:
+    """同时测速所有候选，返回最先收完测速数据的地址
+
+    Args:
+        urls: 候选下载地址
+        stats: 历史测速记录，为空时使用默认的记录文件
+        probe_bytes: 每个候选测速下载的字节数
+        timeout: 单个候选的最长测速时间
+
+    Returns:
+        最快的下载地址，全部失败时按历史速度返回，仍没有则返回 None
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return None
+    if stats is None:
+        stats = MirrorStats()
+    if len(urls) == 1:
+        return urls[0]
+
+    racers = pick_racers(urls, stats)
+    print(f"正在测速 {len(racers)} 个下载源...")
+
+    stop_event = threading.Event()
+    winner = None
+    executor = ThreadPoolExecutor(max_workers=len(racers))
+    futures = {executor.submit(_probe, url, stop_event, probe_bytes, timeout): url for url in racers}
+    try:
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                received, elapsed, complete = future.result()
+            except Exception as e:
+                print(f"下载源测速失败 {MirrorStats.key_of(url)}: {e}")
+                stats.record(url, 0)
+                continue
+
+            speed = received / 1024 / elapsed
+            stats.record(url, speed)
+            if complete:
+                winner = url
+                print(f"最快的下载源: {MirrorStats.key_of(url)} ({speed:.1f} KB/s)")
+                break
+    finally:
+        # 取消其余测速，不等它们结束；被取消的候选按已收到的部分记录速度（只会偏低）
+        stop_event.set()
+        for future, url in futures.items():
+            if not future.done():
+                future.add_done_callback(lambda f, u=url: _record_cancelled(f, u, stats))
+        executor.shutdown(wait=False)
+        stats.save()
+
+    if winner:
+        return winner
+
+    # 全部测速失败时按历史速度兜底
+    known = [u for u in urls if stats.get_speed(u)]
+    if known:
+        fallback = max(known, key=lambda u: stats.get_speed(u))
+        print(f"测速全部失败，使用历史最快的下载源: {MirrorStats.key_of(fallback)}")
+        return fallback
+    return None
+
+
+def get_github_proxy_urls(raw_url: str) -> List[str]:
+    """把GitHub原始下载地址展开为直连地址 + 各加速代理地址"""
+    urls = [raw_url]
+    try:
+        from webFunc.GithubDownload import ProxyManager
+        for proxy in ProxyManager().get_proxies():
+            urls.append(f"{proxy.rstrip('/')}/{raw_url}")
+    except Exception as e:
+        print(f"获取GitHub加速代理失败: {e}")
+        urls.append(f"https://gh-proxy.org/{raw_url}")
+    return urls
+
+
+if __name__ == "__main__":
+    # 查看各下载源的历史测速记录
+    for key, record in sorted(MirrorStats().stats.items(), key=lambda item: item[1]['speed'], reverse=True):
+        print(f"{key}: {record['speed']:.1f} KB/s（{record['samples']} 次）")
@@ -0,0 +1,159 @@
+"""
+启动前网络检查的缓存（快速启动）
+
+每次启动游戏前都要查询启动器新版本（MySQL）、汉化版本（webnote / GitHub Release）并下载气泡文本，
+这些请求都会阻塞启动。开启快速启动后，每个来源的结果连同查询时间记录在 `config/network_cache.json` 中：
+
+- 在有效期（TTL）内：直接使用上次的结果，同时在后台重新查询一次，供下次启动使用
+- 超过有效期、没有记录或强制刷新时：当场查询（查询失败时退回上次的结果）
+
+各来源的有效期由设置项决定，关闭快速启动时每次都当场查询。
+"""
+import os
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+CACHE_PATH = 'config/network_cache.json'
+
+# 各来源对应的有效期设置项（分钟）
+SOURCE_TTL_SETTINGS = {
+    'launcher_version': 'launcher_check_ttl_min',
+    'translation_note': 'translation_check_ttl_min',
+    'github_release': 'translation_check_ttl_min',
+    'bubble': 'bubble_check_ttl_min',
+}
+
+
+class NetworkCache:
+    """按来源记录网络查询结果和查询时间"""
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.force = False  # 强制刷新：本次运行中所有来源都当场查询
+        self._lock = threading.Lock()
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"读取网络检查缓存失败: {e}")
+            self.entries = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._lock:
+                # 数据库返回的时间等无法直接序列化的值按字符串保存
+                data = json.dumps(self.entries, indent=4, ensure_ascii=False, default=str)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"保存网络检查缓存失败: {e}")
+
+    @staticmethod
+    def get_ttl(source: str) -> float:
+        """来源的有效期（秒），关闭快速启动时为 0"""
+        from functions.settings_manager import get_settings_manager
+        settings_manager = get_settings_manager()
+        if not settings_manager.get_setting('fast_launch'):
+            return 0
+        setting = SOURCE_TTL_SETTINGS.get(source.split(':')[0])
+        minutes = settings_manager.get_setting(setting) if setting else 0
+        return max(0, float(minutes or 0)) * 60
+
+    def _store(self, source: str, value: Any):
+        with self._lock:
+            self.entries[source] = {'time': time.time(), 'value': value}
+        self.save()
+
+    def _fetch(self, source: str, fetch: Callable[[], Any]) -> Any:
+        """当场查询，结果为 None 或出错时不记录"""
+        from functions.profiler import span
+        try:
+            with span(f"查询 {source}"):
+                value = fetch()
+        except Exception as e:
+            print(f"查询 {source} 失败: {e}")
+            return None
+        if value is not None:
+            self._store(source, value)
+        return value
+
+    def _refresh_in_background(self, source: str, fetch: Callable[[], Any]):
+        with self._lock:
+            thread = self._refreshing.get(source)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._fetch, args=(source, fetch), daemon=True)
+            self._refreshing[source] = thread
+        thread.start()
+
+    def get(self, source: str, fetch: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """获取来源的结果
+
+        Args:
+            source: 来源名称，可以用 "来源:参数" 区分同一来源的不同查询
+            fetch: 实际查询的函数，返回 None 表示查询失败
+            ttl: 有效期（秒），为空时按设置项决定
+
+        Returns:
+            查询结果，当场查询失败且没有记录时返回 None
+        """
+        ttl = self.get_ttl(source) if ttl is None else ttl
+        with self._lock:
+            entry = self.entries.get(source)
+        if entry is not None and not self.force and time.time() - entry.get('time', 0) < ttl:
+            print(f"使用 {int((time.time() - entry['time']) / 60)} 分钟前的 {source} 查询结果，后台更新中")
+            self._refresh_in_background(source, fetch)
+            return entry['value']
+
+        value = self._fetch(source, fetch)
+        if value is None and entry is not None:
+            print(f"{source} 查询失败，使用上次的结果")
+            return entry['value']
+        return value
+
+    def wait_for_refresh(self, timeout: float = 10.0) -> bool:
+        """等待后台更新结束（程序退出前调用，避免更新被中途打断）
+
+        Returns:
+            所有后台更新都已结束时返回 True
+        """
+        deadline = time.time() + timeout
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+        return not any(thread.is_alive() for thread in threads)
+
+
+# 全局缓存实例
+_network_cache = None
+
+def get_network_cache() -> NetworkCache:
+    """获取全局网络检查缓存实例"""
+    global _network_cache
+    if _network_cache is None:
+        _network_cache = NetworkCache()
+    return _network_cache
+
+
+def force_refresh():
+    """本次运行忽略有效期，所有来源都当场查询（用户手动更新时调用）"""
+    get_network_cache().force = True
+
+
+if __name__ == "__main__":
+    cache = get_network_cache()
+    for name, entry in cache.entries.items():
+        age = (time.time() - entry.get('time', 0)) / 60
+        print(f"{name}: {age:.1f} 分钟前, TTL {cache.get_ttl(name) / 60:.0f} 分钟")
@@ -0,0 +1,164 @@
+"""
+汉化包本地缓存
+
+下载并校验通过的汉化包压缩包按"版本号 + SHA-256"保存在 `cache/packs/` 中，
+重装、回滚或给另一个游戏目录安装同一版本时直接从缓存解压，不必重新下载。
+缓存总大小受设置项 `pack_cache_size_mb` 限制，超出时按最近使用时间淘汰旧的压缩包。
+"""
+import os
+import json
+import threading
+import time
+from typing import Optional
+
+CACHE_DIR = 'cache/packs'
+INDEX_FILE = 'index.json'
+
+
+class PackCache:
+    """按版本号和内容哈希索引的压缩包缓存"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self.load_index()
+
+    @staticmethod
+    def make_key(version: str, sha256: str) -> str:
+        return f"{version}-{sha256[:16]}"
+
+    def load_index(self):
+        """读取缓存索引，并丢弃文件已不存在的条目"""
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"读取汉化包缓存索引失败: {e}")
+            self.entries = {}
+
+        self.entries = {key: entry for key, entry in self.entries.items()
+                        if os.path.exists(os.path.join(self.cache_dir, entry['file']))}
+
+    def save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=4, ensure_ascii=False)
+        except Exception as e:
+            print(f"保存汉化包缓存索引失败: {e}")
+
+    def get_budget(self) -> int:
+        """缓存容量（字节），0 表示不使用缓存"""
+        from functions.settings_manager import get_settings_manager
+        size_mb = get_settings_manager().get_setting('pack_cache_size_mb')
+        return max(0, int(size_mb if size_mb is not None else 1024)) * 1024 * 1024
+
+    def lookup(self, version: str, sha256: str = "", extension: str = "") -> Optional[str]:
+        """查找缓存的压缩包
+
+        Args:
+            version: 汉化版本号
+            sha256: 发布方公布的SHA-256，为空时只按版本号和格式查找
+            extension: 压缩包扩展名（如 ".7z"），为空时不限格式
+
+        Returns:
+            缓存文件路径，未命中返回 None
+        """
+        if not version or self.get_budget() == 0:
+            return None
+
+        with self._lock:
+            for key, entry in self.entries.items():
+                if entry['version'] != version:
+                    continue
+                if sha256 and entry['sha256'].lower() != sha256.lower():
+                    continue
+                if extension and not entry['file'].endswith(extension):
+                    continue
+
+                path = os.path.join(self.cache_dir, entry['file'])
+                if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+                    continue
+                entry['last_used'] = time.time()
+                self.save_index()
+                print(f"命中汉化包缓存: {entry['file']}")
+                return path
+        return None
+
+    def store(self, file_path: str, version: str, sha256: str) -> str:
+        """把校验通过的压缩包移入缓存
+
+        Returns:
+            压缩包的新路径；不使用缓存或放不下时返回原路径
+        """
+        budget = self.get_budget()
+        if not version or not sha256 or budget == 0:
+            return file_path
+
+        size = os.path.getsize(file_path)
+        if size > budget:
+            print("汉化包超过缓存容量，不缓存")
+            return file_path
+
+        key = self.make_key(version, sha256)
+        extension = os.path.splitext(file_path)[1]
+        file_name = f"{key}{extension}"
+        target = os.path.join(self.cache_dir, file_name)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            os.replace(file_path, target)
+        except Exception as e:
+            print(f"写入汉化包缓存失败: {e}")
+            return file_path
+
+        with self._lock:
+            self.entries[key] = {
+                'file': file_name,
+                'version': version,
+                'sha256': sha256,
+                'size': size,
+                'last_used': time.time(),
+            }
+            self._evict(budget, protect=key)
+            self.save_index()
+        print(f"汉化包已缓存: {file_name}")
+        return target
+
+    def _evict(self, budget: int, protect: str = ""):
+        """按最近使用时间淘汰，直到总大小不超过容量（调用方需持有锁）"""
+        total = sum(entry['size'] for entry in self.entries.values())
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if total <= budget:
+                break
+            if key == protect:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"删除缓存文件失败: {e}")
+                continue
+            total -= entry['size']
+            del self.entries[key]
+            print(f"已淘汰旧的汉化包缓存: {entry['file']}")
+
+
+# 全局缓存实例
+_pack_cache = None
+
+def get_pack_cache() -> PackCache:
+    """获取全局汉化包缓存实例"""
+    global _pack_cache
+    if _pack_cache is None:
+        _pack_cache = PackCache()
+    return _pack_cache
+
+
+if __name__ == "__main__":
+    cache = get_pack_cache()
+    for key, entry in cache.entries.items():
+        print(f"{key}: {entry['size'] / 1024 / 1024:.1f}MB")
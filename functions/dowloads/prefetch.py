@@ -0,0 +1,169 @@
+"""
+汉化包后台预下载
+
+启动器窗口打开期间（或通过 `-prefetch` 参数由计划任务启动时），定时按设置的下载方式查询最新的零协汉化版本，
+有新版本且缓存中还没有时，以限速、低优先级的方式把压缩包下载到汉化包缓存中。
+之后点击启动游戏时 `process_asset_gui` 会直接命中缓存，只需解压部署，不必在启动前等待下载。
+
+前台开始下载汉化时会先调用 `stop_prefetch()` 让后台预下载让出带宽，未完成的部分保留进度，下次预下载时续传。
+"""
+import os
+import threading
+from typing import Optional
+
+from functions.dowloads.range_dow import BandwidthLimiter, RangeDownloader, set_background_priority
+
+PREFETCH_DIR = 'cache/packs/.prefetch'
+PREFETCH_DELAY_MS = 60 * 1000  # 启动器打开后多久开始第一次预下载（毫秒）
+PREFETCH_CONNECTIONS = 1  # 后台预下载只用一个连接
+
+_stop_event = threading.Event()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def resolve_latest_pack(kind: str = "seven") -> Optional[tuple]:
+    """按设置的下载方式获取最新汉化包的下载地址
+
+    Returns:
+        (下载地址, 版本号, SHA-256)，获取失败时返回 None
+    """
+    from functions.settings_manager import get_settings_manager
+    from functions.dowloads.zeroasso_dow import (ARCHIVE_EXTENSIONS, get_dowload_path_ByNote,
+                                                 get_fastest_translation_url, get_github_release_url)
+
+    dowload_way = get_settings_manager().get_setting('translate_download_way')
+    try:
+        if dowload_way == 1:
+            url, name, sha256 = get_github_release_url(ARCHIVE_EXTENSIONS[kind]) # type: ignore
+            return (url, name, sha256) if url else None
+        if dowload_way == 2:
+            return get_fastest_translation_url(kind)
+        return get_dowload_path_ByNote(kind)
+    except Exception as e:
+        print(f"预下载获取汉化包地址失败: {e}")
+        return None
+
+
+def prefetch_once(should_continue=None) -> bool:
+    """检查一次汉化更新，有新版本时下载到缓存
+
+    Args:
+        should_continue: 返回 False 时中止下载（进度会保留）
+
+    Returns:
+        缓存中已有最新汉化包时返回 True
+    """
+    from functions.settings_manager import get_settings_manager
+    from functions.dowloads.dow_ulits import check_need_up_translate
+    from functions.dowloads.pack_cache import get_pack_cache
+    from functions.dowloads.zeroasso_dow import ARCHIVE_EXTENSIONS, verify_download
+
+    settings_manager = get_settings_manager()
+    should_continue = should_continue or (lambda: not _stop_event.is_set())
+    pack_cache = get_pack_cache()
+    if pack_cache.get_budget() == 0:
+        print("汉化包缓存已关闭，跳过后台预下载")
+        return False
+
+    # 与前台下载使用同一种压缩包格式，才能被前台命中
+    kind = "zip" if settings_manager.get_setting('enable_stream_extract') else "seven"
+    extension = ARCHIVE_EXTENSIONS[kind]
+
+    result = resolve_latest_pack(kind)
+    if not result:
+        return False
+    url, version, sha256 = result
+
+    if not check_need_up_translate(version):
+        print("后台预下载: 当前已是最新汉化版本")
+        return True
+    if pack_cache.lookup(version, sha256, extension):
+        print(f"后台预下载: 汉化版本 {version} 已在缓存中")
+        return True
+
+    bandwidth_kb = settings_manager.get_setting('prefetch_bandwidth_kb') or 0
+    os.makedirs(PREFETCH_DIR, exist_ok=True)
+    temp_file = os.path.join(PREFETCH_DIR, f"LimbusLocalize_{version}{extension}")
+    print(f"后台预下载汉化版本 {version}（限速 {f'{bandwidth_kb} KB/s' if bandwidth_kb else '不限'}）...")
+
+    downloader = RangeDownloader(url, temp_file,
+                                 connections=PREFETCH_CONNECTIONS,
+                                 should_continue=should_continue,
+                                 limiter=BandwidthLimiter(int(bandwidth_kb) * 1024),
+                                 low_priority=True)
+    try:
+        if not downloader.download():
+            print("后台预下载已暂停，下次继续")
+            return False
+    except Exception as e:
+        print(f"后台预下载失败: {e}")
+        return False
+
+    if not verify_download(temp_file, sha256, downloader.sha256):
+        print("后台预下载的汉化包校验失败，已丢弃")
+        _remove_quietly(temp_file)
+        return False
+
+    cached_file = pack_cache.store(temp_file, version, sha256 or downloader.sha256)
+    if cached_file == temp_file:
+        # 缓存放不下时不保留预下载的文件
+        _remove_quietly(temp_file)
+        return False
+    print(f"✅ 汉化版本 {version} 已预下载完成，下次启动时直接部署")
+    return True
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _prefetch_worker():
+    set_background_priority()
+    try:
+        prefetch_once()
+    except Exception as e:
+        print(f"后台预下载出错: {e}")
+
+
+def start_prefetch() -> bool:
+    """在后台线程中预下载（设置关闭或已有预下载在运行时不重复启动）
+
+    Returns:
+        是否启动了新的预下载
+    """
+    global _thread
+    from functions.settings_manager import get_settings_manager
+    if not get_settings_manager().get_setting('enable_prefetch'):
+        return False
+
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return False
+        _stop_event.clear()
+        _thread = threading.Thread(target=_prefetch_worker, daemon=True)
+        _thread.start()
+    return True
+
+
+def stop_prefetch(timeout: float = 5.0):
+    """让正在进行的后台预下载尽快停止，把带宽让给前台下载"""
+    _stop_event.set()
+    thread = _thread
+    if thread is not None and thread.is_alive():
+        print("正在暂停后台预下载...")
+        thread.join(timeout)
+
+
+def get_prefetch_interval_ms() -> int:
+    """两次预下载检查之间的间隔（毫秒）"""
+    from functions.settings_manager import get_settings_manager
+    minutes = get_settings_manager().get_setting('prefetch_interval_min') or 60
+    return max(10, int(minutes)) * 60 * 1000
+
+
+if __name__ == "__main__":
+    prefetch_once()
@@ -0,0 +1,515 @@
+"""
+多连接分段下载模块
+
+先用 `Range: bytes=0-0` 探测服务器是否支持断点/分段请求，
+支持时把文件切成若干字节区间，由线程池并行下载并直接写入预分配文件的对应偏移；
+不支持时自动退回单连接流式下载。
+
+分段下载的进度保存在 `<文件名>.state.json` 中（下载地址、ETag/Last-Modified、文件大小和已完成的字节区间），
+下载中断后再次运行会只请求缺失的部分；远程文件发生变化时丢弃旧进度重新下载。
+
+下载的同时按文件顺序计算SHA-256：恰好写在已校验位置的数据直接在内存中计算，
+其余（乱序写入或续传得到的）部分等校验位置追上时由单独的校验线程从磁盘读回，下载结束后无需再完整读一遍文件。
+SHA-256 不能把各段分别计算的结果合并，所以乱序的部分仍然要读回一次；读盘时不持有哈希锁，不会阻塞下载线程。
+
+后台预下载时可以传入 `BandwidthLimiter` 限制总速度，并让下载线程以低优先级运行，不影响前台使用。
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_CONNECTIONS = 4
+MIN_SEGMENT_SIZE = 1024 * 1024  # 每段至少 1MB，避免小文件被切得过碎
+BLOCK_SIZE = 64 * 1024
+MAX_RETRIES = 3
+PROGRESS_INTERVAL = 0.1  # 进度回调的最小间隔（秒）
+STATE_SAVE_INTERVAL = 1.0  # 续传状态的最小保存间隔（秒）
+STATE_SUFFIX = '.state.json'
+
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+# Windows 线程后台模式：同时降低CPU与磁盘I/O优先级
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+def set_background_priority():
+    """把当前线程切换到低优先级（目前只在Windows上生效，其他系统忽略）"""
+    if os.name != 'nt':
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+    except Exception as e:
+        print(f"设置后台优先级失败: {e}")
+
+
+class BandwidthLimiter:
+    """令牌桶限速器，多个下载线程共享同一个速度上限"""
+
+    def __init__(self, bytes_per_second: int, burst: float = 1.0):
+        """
+        Args:
+            bytes_per_second: 速度上限（字节/秒），0 表示不限速
+            burst: 允许的突发量（按秒计的令牌桶容量）
+        """
+        self.rate = max(0, int(bytes_per_second))
+        self.capacity = self.rate * burst
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int):
+        """取走 amount 字节的令牌，不够时睡眠等待"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 令牌允许透支，透支的部分由本线程睡眠偿还，其他线程随后也会按欠账排队
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_state_path(local_filename: str) -> str:
+    """获取下载文件对应的续传状态文件路径"""
+    return local_filename + STATE_SUFFIX
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """合并重叠或相邻的半开区间 [start, end)"""
+    merged: List[List[int]] = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(completed: List[List[int]], total_size: int) -> List[List[int]]:
+    """计算 [0, total_size) 中尚未完成的半开区间"""
+    missing = []
+    position = 0
+    for start, end in merge_ranges(completed):
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < total_size:
+        missing.append([position, total_size])
+    return missing
+
+
+class RangeDownloader:
+    """多连接分段下载器（支持断点续传）"""
+
+    def __init__(self, url: str, local_filename: str,
+                 connections: int = DEFAULT_CONNECTIONS,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 should_continue: Optional[Callable[[], bool]] = None,
+                 verify: bool = False, timeout: float = 30,
+                 limiter: Optional[BandwidthLimiter] = None, low_priority: bool = False):
+        """
+        Args:
+            url: 下载地址
+            local_filename: 保存路径
+            connections: 最大并行连接数
+            progress_callback: 进度回调 (已下载字节数, 总字节数)
+            should_continue: 返回 False 时中止下载
+            verify: 是否校验SSL证书
+            timeout: 单个请求的超时时间
+            limiter: 限速器，为空时不限速
+            low_priority: 下载线程是否以低优先级运行
+        """
+        self.url = url
+        self.resolved_url = url
+        self.local_filename = local_filename
+        self.state_path = get_state_path(local_filename)
+        self.connections = max(1, int(connections or 1))
+        self.progress_callback = progress_callback
+        self.should_continue = should_continue or (lambda: True)
+        self.verify = verify
+        self.timeout = timeout
+        self.limiter = limiter
+        self.low_priority = low_priority
+
+        self.total_size = 0
+        self.accept_ranges = False
+        self.etag = ""
+        self.last_modified = ""
+        self.downloaded = 0
+        self.resumed_size = 0  # 从上次进度中恢复的字节数
+
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+        self._last_state_save = 0.0
+        self._failed = threading.Event()  # 任一分段彻底失败时通知其他分段停止
+        self._completed: List[List[int]] = []  # 之前运行已完成的区间
+        self._progress: List[List[int]] = []  # 本次各分段的 [起点, 当前写入位置]
+
+        self.sha256 = ""  # 下载完成后的SHA-256（十六进制）
+        self._hasher = hashlib.sha256()
+        self._hash_position = 0  # 已计算哈希的字节数
+        self._hash_lock = threading.Lock()
+        self._hash_busy = False  # 校验线程正在从磁盘读回数据，此时下载线程不再直接计算哈希
+        self._hash_wakeup = threading.Event()
+        self._hash_stop = threading.Event()
+
+    def probe(self) -> Tuple[int, bool]:
+        """探测文件大小以及服务器是否支持分段请求
+
+        Returns:
+            (文件总大小, 是否支持Range)，大小未知时为 0
+        """
+        response = requests.get(self.url, headers={'Range': 'bytes=0-0'},
+                                stream=True, verify=self.verify, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            # 记录重定向后的真实地址，避免每个分段都重复走一遍跳转
+            self.resolved_url = response.url
+            self.etag = response.headers.get('ETag', '')
+            self.last_modified = response.headers.get('Last-Modified', '')
+
+            if response.status_code == 206:
+                match = _CONTENT_RANGE_PATTERN.search(response.headers.get('Content-Range', ''))
+                if match and match.group(3) != '*':
+                    self.total_size = int(match.group(3))
+                    self.accept_ranges = True
+            else:
+                self.total_size = int(response.headers.get('content-length', 0))
+                self.accept_ranges = False
+        finally:
+            response.close()
+
+        return self.total_size, self.accept_ranges
+
+    def load_state(self) -> List[List[int]]:
+        """读取续传状态
+
+        Returns:
+            远程文件未变化时返回已完成的区间，否则返回空列表
+        """
+        if not os.path.exists(self.state_path) or not os.path.exists(self.local_filename):
+            return []
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"读取续传状态失败，重新下载: {e}")
+            return []
+
+        if state.get('url') != self.url or state.get('total_size') != self.total_size:
+            print("下载地址或文件大小已变化，重新下载")
+            return []
+        # 服务器给了校验信息时必须一致，否则说明远程文件已更新
+        if (state.get('etag') or self.etag) and state.get('etag') != self.etag:
+            print("远程文件已更新(ETag不一致)，重新下载")
+            return []
+        if (state.get('last_modified') or self.last_modified) and state.get('last_modified') != self.last_modified:
+            print("远程文件已更新(Last-Modified不一致)，重新下载")
+            return []
+        if os.path.getsize(self.local_filename) != self.total_size:
+            print("本地临时文件大小异常，重新下载")
+            return []
+
+        return merge_ranges(state.get('completed', []))
+
+    def save_state(self, force: bool = False):
+        """把已完成的区间写入状态文件（先写临时文件再替换，避免中途断电留下半个JSON）"""
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_state_save < STATE_SAVE_INTERVAL:
+                return
+            self._last_state_save = now
+            completed = merge_ranges(self._completed + [list(p) for p in self._progress])
+
+        state = {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'total_size': self.total_size,
+            'completed': completed,
+        }
+        try:
+            temp_path = self.state_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except Exception as e:
+            print(f"保存续传状态失败: {e}")
+
+    def clear_state(self):
+        """删除续传状态文件"""
+        try:
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+        except Exception as e:
+            print(f"删除续传状态失败: {e}")
+
+    def plan_segments(self, missing: List[List[int]]) -> List[Tuple[int, int]]:
+        """把尚未完成的区间切分为若干闭区间 [start, end]"""
+        remaining = sum(end - start for start, end in missing)
+        count = min(self.connections, max(1, remaining // MIN_SEGMENT_SIZE))
+        segment_size = max(1, -(-remaining // count))
+
+        segments = []
+        for start, end in missing:
+            position = start
+            while position < end:
+                segment_end = min(end, position + segment_size)
+                # 避免切出过小的尾段
+                if end - segment_end < MIN_SEGMENT_SIZE // 2:
+                    segment_end = end
+                segments.append((position, segment_end - 1))
+                position = segment_end
+        return segments
+
+    def download(self) -> bool:
+        """执行下载
+
+        Returns:
+            下载完成返回 True，被中止返回 False；网络错误会以异常形式抛出
+        """
+        os.makedirs(os.path.dirname(self.local_filename) or '.', exist_ok=True)
+        self.probe()
+
+        if not self.accept_ranges or self.total_size <= 0:
+            print("服务器不支持分段下载，使用单连接下载")
+            self.clear_state()
+            return self._download_single()
+
+        self._completed = self.load_state()
+        if self._completed:
+            self.resumed_size = sum(end - start for start, end in self._completed)
+            print(f"发现未完成的下载，从 {self.resumed_size}/{self.total_size} bytes 处继续")
+        else:
+            # 预分配文件，各分段直接写入对应偏移
+            with open(self.local_filename, 'wb') as f:
+                f.truncate(self.total_size)
+        self.downloaded = self.resumed_size
+
+        segments = self.plan_segments(missing_ranges(self._completed, self.total_size))
+        self._progress = [[start, start] for start, _ in segments]
+        if segments:
+            print(f"使用 {len(segments)} 个连接分段下载，文件大小: {self.total_size} bytes")
+
+        results = []
+        hash_thread = threading.Thread(target=self._hash_worker, daemon=True)
+        hash_thread.start()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(segments), self.connections))) as executor:
+                futures = [executor.submit(self._download_segment, index, start, end)
+                           for index, (start, end) in enumerate(segments)]
+                results = [future.result() for future in futures]
+        finally:
+            self._hash_stop.set()
+            self._hash_wakeup.set()
+            hash_thread.join()
+            # 无论成功、取消还是出错都记录进度，供下次续传
+            self.save_state(force=True)
+
+        if all(results) and self._keep_going():
+            self._catch_up_hash()
+            if self._hash_position != self.total_size:
+                raise IOError(f"哈希计算不完整: {self._hash_position}/{self.total_size}")
+            self.sha256 = self._hasher.hexdigest()
+            self.clear_state()
+            return True
+        return False
+
+    def _keep_going(self) -> bool:
+        return not self._failed.is_set() and self.should_continue()
+
+    def _throttle(self, amount: int):
+        if self.limiter:
+            self.limiter.consume(amount)
+
+    def _retry(self, description: str, attempt: Callable[[], bool]) -> bool:
+        """反复执行一次下载尝试，网络错误时等待后重试，超过 MAX_RETRIES 次后抛出异常
+
+        Args:
+            description: 日志中的名称
+            attempt: 执行一次下载，完成返回 True，被中止返回 False
+
+        Returns:
+            下载完成返回 True，被中止返回 False
+        """
+        retries = 0
+        while True:
+            if not self._keep_going():
+                return False
+            try:
+                return attempt()
+            except requests.exceptions.RequestException:
+                retries += 1
+                if retries > MAX_RETRIES:
+                    self._failed.set()
+                    raise
+                print(f"{description}中断，第 {retries} 次重试...")
+                time.sleep(retries)
+
+    def _download_single(self) -> bool:
+        """单连接流式下载（服务器不支持Range时的回退方案，不支持续传，中断后从头重新下载）"""
+        def attempt() -> bool:
+            with self._lock:
+                self.downloaded = 0
+            self._hasher = hashlib.sha256()
+            with requests.get(self.resolved_url, stream=True, verify=self.verify, timeout=self.timeout) as response:
+                response.raise_for_status()
+                content_length = int(response.headers.get('content-length', 0))
+                if not self.total_size:
+                    self.total_size = content_length
+
+                with open(self.local_filename, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=BLOCK_SIZE):
+                        if not self._keep_going():
+                            return False
+                        if chunk:
+                            f.write(chunk)
+                            self._hasher.update(chunk)
+                            self._report(len(chunk))
+                            self._throttle(len(chunk))
+                # 连接提前断开时 iter_content 不一定报错，按收到的原始字节数检查
+                if content_length and response.raw.tell() < content_length:
+                    raise requests.exceptions.ChunkedEncodingError("数据不完整")
+            return True
+
+        if not self._retry("单连接下载", attempt):
+            return False
+        self.sha256 = self._hasher.hexdigest()
+        return True
+
+    def _download_segment(self, index: int, start: int, end: int) -> bool:
+        """下载单个分段，失败时从断开的位置重试"""
+        position = start
+        if self.low_priority:
+            set_background_priority()
+
+        # 不使用缓冲，记录到状态里的字节都已经交给系统写入文件
+        with open(self.local_filename, 'r+b', buffering=0) as f:
+            def attempt() -> bool:
+                nonlocal position
+                with requests.get(self.resolved_url, headers={'Range': f'bytes={position}-{end}'},
+                                  stream=True, verify=self.verify, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.exceptions.RequestException(
+                            f"服务器未返回分段内容，状态码: {response.status_code}")
+
+                    f.seek(position)
+                    for chunk in response.iter_content(chunk_size=BLOCK_SIZE):
+                        if not self._keep_going():
+                            return False
+                        if chunk:
+                            # 防止服务器多返回数据越过分段边界
+                            chunk = chunk[:end - position + 1]
+                            f.write(chunk)
+                            self._progress[index][1] = position + len(chunk)
+                            self._feed_hash(position, chunk)
+                            position += len(chunk)
+                            self._report(len(chunk))
+                            self._throttle(len(chunk))
+                            if position > end:
+                                break
+
+                if position <= end:
+                    raise requests.exceptions.ChunkedEncodingError(f"分段 {start}-{end} 数据不完整")
+                return True
+
+            return self._retry(f"分段 {start}-{end} 下载", attempt)
+
+    def _feed_hash(self, offset: int, data: bytes):
+        """把刚写入 offset 处的数据计入哈希（只有正好接在已校验位置之后的数据才能直接使用）
+
+        已校验位置之后还有写好的数据时交给校验线程从磁盘读回，这里不读盘
+        """
+        with self._hash_lock:
+            if not self._hash_busy and offset <= self._hash_position < offset + len(data):
+                self._hasher.update(data[self._hash_position - offset:])
+                self._hash_position = offset + len(data)
+            pending = self._written_end() > self._hash_position
+        if pending:
+            self._hash_wakeup.set()
+
+    def _written_end(self) -> int:
+        """从已校验位置开始连续写好的数据的结束位置（调用方需持有 _hash_lock）"""
+        written_end = self._hash_position
+        for start, end in self._completed + self._progress:
+            if start <= self._hash_position < end:
+                written_end = max(written_end, end)
+        return written_end
+
+    def _hash_worker(self):
+        """校验线程：有乱序写入或续传得到的数据可以接上时读回计入哈希，直到下载结束"""
+        if self.low_priority:
+            set_background_priority()
+        while not self._hash_stop.is_set():
+            self._hash_wakeup.wait()
+            self._hash_wakeup.clear()
+            if not self._hash_stop.is_set():
+                self._catch_up_hash()
+
+    def _catch_up_hash(self):
+        """已校验位置之后若已有写好的数据（其他分段或续传得到的），从磁盘读回计入哈希
+
+        只在锁内确定要读的范围，读盘和计算哈希时不持有 _hash_lock；期间 _hash_busy 为真，
+        下载线程不会再直接更新哈希，接上的数据都留到下一轮从磁盘读回。
+        同一时间只有一个调用方（下载期间是校验线程，下载结束后是 download）。
+        """
+        while True:
+            with self._hash_lock:
+                position = self._hash_position
+                written_end = self._written_end()
+                if written_end <= position:
+                    return
+                self._hash_busy = True
+            try:
+                with open(self.local_filename, 'rb') as f:
+                    f.seek(position)
+                    while position < written_end:
+                        block = f.read(min(BLOCK_SIZE * 16, written_end - position))
+                        if not block:
+                            break
+                        self._hasher.update(block)
+                        position += len(block)
+            finally:
+                with self._hash_lock:
+                    self._hash_position = position
+                    self._hash_busy = False
+            if position < written_end:
+                return
+
+    def _report(self, delta: int):
+        """汇总各连接的进度，并按固定间隔回调"""
+        with self._lock:
+            self.downloaded += delta
+            now = time.time()
+            if now - self._last_report < PROGRESS_INTERVAL and self.downloaded < self.total_size:
+                return
+            self._last_report = now
+            downloaded = self.downloaded
+
+        if self._progress:
+            self.save_state()
+        if self.progress_callback:
+            self.progress_callback(downloaded, self.total_size)
+
+
+def download_with_ranges(url: str, local_filename: str, connections: int = DEFAULT_CONNECTIONS,
+                         progress_callback=None, should_continue=None) -> bool:
+    """便捷函数：多连接下载文件"""
+    downloader = RangeDownloader(url, local_filename, connections,
+                                 progress_callback=progress_callback,
+                                 should_continue=should_continue)
+    return downloader.download()
@@ -2,6 +2,7 @@ import pymysql
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
+from functions.deploy import replace_write
 
 def set_bubble_json_files(host, port, user, password, database, battle_speech_file, cultivation_file, mowe_file):
     """
@@ -264,20 +265,17 @@ def download_bubble_files_to_game(host, port, user, password, database, game_pat
         
         # 保存BattleSpeechBubbleDlg.json
         battle_speech_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg.json')
-        with open(battle_speech_path, 'w', encoding='utf-8') as f:
-            f.write(battle_speech)
+        replace_write(battle_speech_path, battle_speech)
         print(f"保存 BattleSpeechBubbleDlg.json 成功")
         
         # 保存BattleSpeechBubbleDlg_Cultivation.json
         cultivation_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg_Cultivation.json')
-        with open(cultivation_path, 'w', encoding='utf-8') as f:
-            f.write(cultivation)
+        replace_write(cultivation_path, cultivation)
         print(f"保存 BattleSpeechBubbleDlg_Cultivation.json 成功")
         
         # 保存BattleSpeechBubbleDlg_mowe.json
         mowe_path = os.path.join(target_dir, 'BattleSpeechBubbleDlg_mowe.json')
-        with open(mowe_path, 'w', encoding='utf-8') as f:
-            f.write(mowe)
+        replace_write(mowe_path, mowe)
         print(f"保存 BattleSpeechBubbleDlg_mowe.json 成功")
         
         print(f"JSON文件已成功保存到: {target_dir}")
@@ -987,8 +985,9 @@ def check_new_version(current_version_name):
                latest_version_info: 最新版本信息字典，如果没有新版本则为None
     """
     try:
-        # 获取最新版本信息
-        latest_version = get_latest_version(**db_config)
+        # 获取最新版本信息（快速启动时在有效期内使用上次的结果）
+        from functions.dowloads.net_cache import get_network_cache
+        latest_version = get_network_cache().get('launcher_version', lambda: get_latest_version(**db_config))
         
         if not latest_version:
             # 没有设置最新版本
@@ -0,0 +1,322 @@
+"""
+边下载边解压模块
+
+7z 格式的文件索引位于压缩包末尾，必须整个文件下载完才能解压；
+而 zip 的每个文件前都有本地文件头，可以按顺序边收边解。
+这里用单连接顺序下载 zip 汉化包，下载线程通过有界队列把数据交给解压线程，
+解压线程逐个解析本地文件头、用 zlib 解压并校验 CRC32，网络与解压同时进行，压缩包本身不落盘。
+
+解压结果先写入临时目录，整包 SHA-256 校验通过后才移动到目标目录。
+"""
+import os
+import queue
+import shutil
+import struct
+import threading
+import zlib
+import hashlib
+import requests
+from typing import Callable, Optional
+
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+END_SIGNATURE = b'PK\x05\x06'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+LOCAL_HEADER_SIZE = 30
+
+BLOCK_SIZE = 64 * 1024
+QUEUE_BLOCKS = 64  # 下载与解压之间最多缓存的数据块数量（约 4MB）
+
+
+class StreamExtractError(Exception):
+    """流式解压失败（压缩包损坏或使用了不支持的格式）"""
+
+
+class StreamZipExtractor:
+    """按顺序接收 zip 数据并逐个解压文件"""
+
+    def __init__(self, extract_path: str):
+        self.extract_path = extract_path
+        self.buffer = bytearray()
+        self.finished = False  # 已到达中央目录，后续数据无需处理
+        self.file_count = 0
+
+        self._entry = None  # 当前正在解压的文件信息
+        self._output = None
+        self._decompressor = None
+        self._remaining = 0  # 当前文件剩余的压缩数据字节数（大小未知时为 None）
+        self._crc = 0
+
+    def feed(self, data: bytes):
+        """接收一段数据并尽可能多地解压"""
+        if self.finished:
+            return
+        self.buffer += data
+        while not self.finished:
+            if self._entry is None:
+                if not self._read_header():
+                    return
+            elif not self._read_data():
+                return
+
+    def close(self):
+        """数据接收完毕，检查压缩包是否完整"""
+        if self._output:
+            self._output.close()
+            self._output = None
+        if not self.finished:
+            raise StreamExtractError("压缩包不完整，未找到中央目录")
+
+    def abort(self):
+        """放弃解压，关闭正在写入的文件（之后才能删除解压目录）"""
+        if self._output:
+            self._output.close()
+            self._output = None
+
+    def _read_header(self) -> bool:
+        """解析本地文件头，数据不足时返回 False"""
+        if len(self.buffer) < 4:
+            return False
+        signature = bytes(self.buffer[:4])
+        if signature in (CENTRAL_HEADER_SIGNATURE, END_SIGNATURE):
+            self.finished = True
+            return False
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise StreamExtractError(f"无效的文件头: {signature!r}")
+        if len(self.buffer) < LOCAL_HEADER_SIZE:
+            return False
+
+        (_, _, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = struct.unpack('<4sHHHHHIIIHH', self.buffer[:LOCAL_HEADER_SIZE])
+        header_size = LOCAL_HEADER_SIZE + name_length + extra_length
+        if len(self.buffer) < header_size:
+            return False
+
+        raw_name = bytes(self.buffer[LOCAL_HEADER_SIZE:LOCAL_HEADER_SIZE + name_length])
+        extra = bytes(self.buffer[LOCAL_HEADER_SIZE + name_length:header_size])
+        del self.buffer[:header_size]
+
+        if flags & 0x1:
+            raise StreamExtractError("不支持加密的压缩包")
+        if method not in (0, 8):
+            raise StreamExtractError(f"不支持的压缩方式: {method}")
+
+        name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+        has_descriptor = bool(flags & 0x8)
+        # 未压缩的文件没有结束标记，大小未知时无法确定边界（目录项没有数据，不受影响）
+        if has_descriptor and method == 0 and not name.endswith('/'):
+            raise StreamExtractError("不支持未压缩且大小未知的文件")
+        if not has_descriptor and 0xFFFFFFFF in (compressed_size, size):
+            compressed_size, size = self._read_zip64_sizes(extra, compressed_size, size)
+
+        self._entry = {
+            'name': name,
+            'method': method,
+            'crc': crc,
+            'size': size,
+            'has_descriptor': has_descriptor,
+        }
+        self._remaining = None if has_descriptor else compressed_size
+        self._crc = 0
+        self._decompressor = zlib.decompressobj(-15) if method == 8 else None
+        self._open_output(name)
+        return True
+
+    @staticmethod
+    def _read_zip64_sizes(extra: bytes, compressed_size: int, size: int):
+        """从 zip64 扩展字段中读取真实大小"""
+        position = 0
+        while position + 4 <= len(extra):
+            tag, length = struct.unpack('<HH', extra[position:position + 4])
+            data = extra[position + 4:position + 4 + length]
+            if tag == 0x0001:
+                values = list(struct.unpack(f'<{len(data) // 8}Q', data[:len(data) // 8 * 8]))
+                if size == 0xFFFFFFFF and values:
+                    size = values.pop(0)
+                if compressed_size == 0xFFFFFFFF and values:
+                    compressed_size = values.pop(0)
+                return compressed_size, size
+            position += 4 + length
+        raise StreamExtractError("zip64 扩展字段缺失")
+
+    def _open_output(self, name: str):
+        """创建解压目标文件，拒绝跳出解压目录的路径"""
+        normalized = os.path.normpath(name.replace('\\', '/'))
+        if os.path.isabs(normalized) or normalized.startswith('..'):
+            raise StreamExtractError(f"非法的文件路径: {name}")
+
+        target = os.path.join(self.extract_path, normalized)
+        if name.endswith('/'):
+            os.makedirs(target, exist_ok=True)
+            self._output = None
+        else:
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            self._output = open(target, 'wb')
+
+    def _write(self, data: bytes):
+        if data:
+            self._crc = zlib.crc32(data, self._crc)
+            if self._output:
+                self._output.write(data)
+
+    def _read_data(self) -> bool:
+        """解压当前文件的数据，文件结束时返回 True，数据不足时返回 False"""
+        if self._remaining is not None:
+            take = min(self._remaining, len(self.buffer))
+            chunk = bytes(self.buffer[:take])
+            del self.buffer[:take]
+            self._remaining -= take
+            self._write(self._decompressor.decompress(chunk) if self._decompressor else chunk)
+            if self._remaining > 0:
+                return False
+            if self._decompressor:
+                self._write(self._decompressor.flush())
+            self._finish_entry(self._entry['crc'])
+            return True
+
+        # 大小未知：靠 deflate 流自身的结束标记确定边界，之后是数据描述符
+        if self._decompressor and not self._decompressor.eof:
+            chunk = bytes(self.buffer)
+            self.buffer.clear()
+            self._write(self._decompressor.decompress(chunk))
+            if not self._decompressor.eof:
+                return False
+            self._write(self._decompressor.flush())
+            self.buffer[:0] = self._decompressor.unused_data
+
+        descriptor = self._parse_descriptor()
+        if descriptor is None:
+            return False
+        self._finish_entry(descriptor)
+        return True
+
+    def _parse_descriptor(self) -> Optional[int]:
+        """解析数据描述符，返回其中的 CRC32；数据不足时返回 None"""
+        offset = 4 if self.buffer[:4] == DATA_DESCRIPTOR_SIGNATURE else 0
+        # 描述符后紧跟下一个文件头，借此区分 32 位与 zip64 两种长度
+        for sizes_length in (8, 16):
+            end = offset + 4 + sizes_length
+            if len(self.buffer) < end + 4:
+                return None
+            if bytes(self.buffer[end:end + 4]) in (LOCAL_HEADER_SIGNATURE, CENTRAL_HEADER_SIGNATURE, END_SIGNATURE):
+                crc = struct.unpack('<I', self.buffer[offset:offset + 4])[0]
+                del self.buffer[:end]
+                return crc
+        raise StreamExtractError("无法解析数据描述符")
+
+    def _finish_entry(self, expected_crc: int):
+        if self._output:
+            self._output.close()
+            self._output = None
+        if self._crc != expected_crc:
+            raise StreamExtractError(f"CRC校验失败: {self._entry['name']}")
+        self.file_count += 1
+        self._entry = None
+        self._decompressor = None
+
+
+def move_tree(source: str, target: str):
+    """把 source 目录下的内容合并移动到 target"""
+    for root, _, files in os.walk(source):
+        relative = os.path.relpath(root, source)
+        target_dir = os.path.normpath(os.path.join(target, relative))
+        os.makedirs(target_dir, exist_ok=True)
+        for file_name in files:
+            os.replace(os.path.join(root, file_name), os.path.join(target_dir, file_name))
+    shutil.rmtree(source, ignore_errors=True)
+
+
+def stream_download_and_extract(url: str, extract_path: str,
+                                progress_callback: Optional[Callable[[int, int], None]] = None,
+                                should_continue: Optional[Callable[[], bool]] = None,
+                                expected_sha256: str = "", timeout: float = 30) -> bool:
+    """边下载边解压 zip 压缩包
+
+    Args:
+        url: zip 下载地址
+        extract_path: 解压目录
+        progress_callback: 进度回调 (已下载字节数, 总字节数)
+        should_continue: 返回 False 时中止
+        expected_sha256: 整个压缩包的SHA-256，为空时只校验各文件的CRC32
+
+    Returns:
+        成功返回 True，被中止返回 False；下载或解压出错时抛出异常
+    """
+    should_continue = should_continue or (lambda: True)
+    staging_path = os.path.join(extract_path, '.stream_staging')
+    shutil.rmtree(staging_path, ignore_errors=True)
+    os.makedirs(staging_path, exist_ok=True)
+
+    extractor = StreamZipExtractor(staging_path)
+    blocks = queue.Queue(maxsize=QUEUE_BLOCKS)
+    errors = []
+
+    def extract_worker():
+        try:
+            while True:
+                block = blocks.get()
+                if block is None:
+                    break
+                if not errors:
+                    extractor.feed(block)
+        except Exception as e:
+            errors.append(e)
+            # 继续取走队列中的数据，避免下载线程阻塞
+            while blocks.get() is not None:
+                pass
+
+    worker = threading.Thread(target=extract_worker, daemon=True)
+    worker.start()
+
+    hasher = hashlib.sha256()
+    completed = False
+    try:
+        response = requests.get(url, stream=True, verify=False, timeout=timeout)
+        response.raise_for_status()
+        total_size = int(response.headers.get('content-length', 0))
+        downloaded = 0
+
+        for chunk in response.iter_content(chunk_size=BLOCK_SIZE):
+            if not should_continue() or errors:
+                response.close()
+                break
+            if chunk:
+                hasher.update(chunk)
+                blocks.put(chunk)
+                downloaded += len(chunk)
+                if progress_callback:
+                    progress_callback(downloaded, total_size)
+        else:
+            completed = True
+    except BaseException:
+        # 请求或下载出错：暂存目录不会再被使用，删除后再抛出
+        blocks.put(None)
+        worker.join()
+        extractor.abort()
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    blocks.put(None)
+    worker.join()
+
+    try:
+        if errors:
+            raise StreamExtractError(f"流式解压失败: {errors[0]}")
+        if not completed:
+            return False
+        extractor.close()
+
+        if expected_sha256 and hasher.hexdigest().lower() != expected_sha256.lower():
+            raise StreamExtractError(f"SHA-256校验失败\n  期望: {expected_sha256}\n  实际: {hasher.hexdigest()}")
+
+        move_tree(staging_path, extract_path)
+        print(f"流式解压完成，共 {extractor.file_count} 个文件")
+        return True
+    finally:
+        extractor.abort()
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) >= 3:
+        print(stream_download_and_extract(sys.argv[1], sys.argv[2]))
@@ -1,38 +1,137 @@
 import os
+import hashlib
 import requests
 import subprocess
 import tkinter as tk
 from tkinter import ttk
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functions.dowloads.github_ulits import GitHubReleaseFetcher
 from functions.dowloads.dow_ulits import check_need_up_translate
+from functions.dowloads.range_dow import RangeDownloader, DEFAULT_CONNECTIONS, get_state_path
+from functions.dowloads.mirror_select import race_mirrors, get_github_proxy_urls
+from functions.dowloads.stream_extract import stream_download_and_extract
+from functions.dowloads.pack_cache import get_pack_cache
 from functions.settings_manager import get_settings_manager
+from functions.progress_bus import get_progress_bus
+from functions.profiler import span
 from functions.window_ulits import center_window
 
 # 7-Zip可执行文件路径
 SEVEN_ZIP_PATH = r"7-Zip\7z.exe"
+SEVEN_ZIP_SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+ZIP_SIGNATURE = b"PK\x03\x04"
+# webnote中的压缩包字段名与文件扩展名的对应关系
+ARCHIVE_EXTENSIONS = {"seven": ".7z", "zip": ".zip"}
 settings_manager = get_settings_manager()
 
-class DownloadGUI:
+class DownloadTask:
+    """下载任务（不依赖Tk）
+
+    下载线程只往进度总线发布进度，由界面按固定帧率刷新。
+    各资源的通道为 "download/资源名"，提示文字走 "download" 通道，多个资源同时下载时汇总显示。
+    """
+
+    def __init__(self, config_path: str = ""):
+        self.config_path = config_path
+        self.is_downloading = True
+        # 下载和解压全部结束后置位，等待方无需轮询 is_downloading
+        self.done_event = threading.Event()
+        self.success = False
+        self.bus = get_progress_bus()
+        self.asset_names = []
+
+    # ---------- 以下方法可在下载线程中调用，只发布事件不操作Tk ----------
+    
+    def set_message(self, message):
+        """更新顶部的提示文字"""
+        self.bus.publish("download", message=message)
+    
+    def register_asset(self, name, status="等待中"):
+        """登记一个需要下载的资源"""
+        self.asset_names.append(name)
+        self.bus.reset(f"download/{name}", status=status)
+
+    def set_asset_status(self, name, status):
+        """更新单个资源的状态文字（解压中、完成、失败等）"""
+        self.bus.publish(f"download/{name}", status=status)
+
+    def update_asset_progress(self, name, downloaded, total):
+        """更新单个资源的下载进度"""
+        self.bus.publish(f"download/{name}", done=downloaded, total=total, status="下载中")
+
+    def summarize(self, states):
+        """汇总所有资源的进度
+
+        Returns:
+            (各资源 [(名称, 状态)], 已下载字节数, 总字节数, 下载速度 字节/秒)
+        """
+        assets = [(name, states[f"download/{name}"]) for name in self.asset_names if f"download/{name}" in states]
+        downloaded_sum = sum(state.done for _, state in assets)
+        total_sum = sum(state.total for _, state in assets)
+        speed_sum = sum(state.speed for _, state in assets if state.status == "下载中")
+        return assets, downloaded_sum, total_sum, speed_sum
+
+    # ---------- 下载线程 ----------
+
+    def start_download(self):
+        """开始下载"""
+        self.is_downloading = True
+        
+        # 在新线程中运行下载
+        thread = threading.Thread(target=self.run_download)
+        thread.daemon = True
+        thread.start()
+        
+    def run_download(self):
+        """运行下载任务"""
+        try:
+            with span("下载汉化"):
+                self.success = download_and_extract_gui(self, self.config_path)
+            if not self.success:
+                self.set_message("❌ 下载失败，请检查错误信息")
+            self.on_finished(self.success)
+        except Exception as e:
+            self.set_message(f"❌ 下载过程中出现错误: {e}")
+        finally:
+            self.is_downloading = False
+            self.done_event.set()
+
+    def on_finished(self, success: bool):
+        """下载结束时在下载线程中调用"""
+
+    def wait(self, timeout=None) -> bool:
+        """阻塞等待下载结束
+
+        Returns:
+            下载和解压是否成功（超时返回 False）
+        """
+        return self.done_event.wait(timeout) and self.success
+
+
+class DownloadGUI(DownloadTask):
     """简化版下载GUI界面"""
     
     def __init__(self, parent, config_path: str = ""):
+        super().__init__(config_path)
         self.root = tk.Toplevel(parent)
         self.root.withdraw()  # 先隐藏，防止闪烁
         # 居中显示窗口
         self.root.title("下载中...")
-        self.root.geometry("500x160")
+        self.root.geometry("500x185")
         self.root.resizable(False, False)
         self.root.attributes("-topmost", True)
         center_window(self.root)
         # self.root.attributes("-transparentcolor","#ffffff")
 
-        self.config_path = config_path
-        self.is_downloading = True
+        self.animated_percent = 0.0  # 总进度条当前动画显示的百分比
         
         # 创建界面
         self.create_widgets()
+        self.bus_token = self.bus.subscribe(self.on_progress_events, "download")
+        self.bus.attach(self.root)
+        self.root.bind('<Destroy>', lambda e: self.bus.unsubscribe(self.bus_token) if e.widget is self.root else None)
 
         # threading.Thread(target=self.cycle_animation).start()
         
@@ -144,6 +243,13 @@ class DownloadGUI:
                               fg='#64748b')
         speed_label.pack(anchor='e')
         
+        # 各资源的单独进度
+        self.asset_status_var = tk.StringVar(value="")
+        asset_status_label = tk.Label(main_frame, textvariable=self.asset_status_var, 
+                                      font=('Microsoft YaHei', 8), bg='#ffffff', 
+                                      fg='#64748b', anchor='w')
+        asset_status_label.pack(fill=tk.X, padx=20, pady=(0, 2))
+        
         # 状态指示器 - 使用更现代的颜色
         status_frame = tk.Frame(main_frame, bg='#ffffff')
         status_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
@@ -206,34 +312,132 @@ class DownloadGUI:
             speed_str = f"{speed:.1f} KB/s"
             
         self.speed_var.set(f"速度: {speed_str}")
-        self.root.update_idletasks()
         
-    def start_download(self):
-        """开始下载"""
-        self.is_downloading = True
+    # ---------- Tk主线程 ----------
+
+    def on_progress_events(self, states, animation_speed=0.15):
+        """由进度总线按帧率回调：汇总所有资源刷新界面"""
+        message = states.get("download")
+        if message and message.message:
+            self.current_file_var.set(message.message)
         
-        # 在新线程中运行下载
-        thread = threading.Thread(target=self.run_download)
-        thread.daemon = True
-        thread.start()
+        assets, downloaded_sum, total_sum, speed_sum = self.summarize(states)
+        if not assets:
+            return
         
+        parts = []
+        for name, state in assets:
+            if state.status == "下载中" and state.total > 0:
+                parts.append(f"{name}: {state.percent:.1f}%")
+            else:
+                parts.append(f"{name}: {state.status}")
+        self.asset_status_var.set("  |  ".join(parts))
+        
+        # 平滑渐变效果：每帧向目标百分比移动一点，纯界面动画，不影响下载线程
+        target_percent = min(downloaded_sum / total_sum * 100, 100) if total_sum else 0
+        if self.animated_percent < target_percent:
+            self.animated_percent += (target_percent - self.animated_percent) * animation_speed
+        if target_percent - self.animated_percent < 0.1:
+            self.animated_percent = target_percent
+        
+        self.update_progress(self.animated_percent, downloaded_sum, total_sum, speed_sum / 1024)
+
+    def on_finished(self, success: bool):
+        # 失败提示留给窗口自己延时关闭，不阻塞后续流程
+        self.root.after(0 if success else 3000, self.root.destroy)
+
+
+class HeadlessDownload(DownloadTask):
+    """启动器模式的下载任务：没有主窗口，只有真正开始下载时才显示一个小进度窗口"""
+
+    def __init__(self, config_path: str = ""):
+        super().__init__(config_path)
+        # 开始下载（需要显示窗口）或任务结束时置位
+        self.wake_event = threading.Event()
+
+    def set_message(self, message):
+        super().set_message(message)
+        print(message)
+
+    def register_asset(self, name, status="等待中"):
+        super().register_asset(name, status)
+        self.wake_event.set()
+
     def run_download(self):
-        """运行下载任务"""
         try:
-            success = download_and_extract_gui(self, self.config_path)
-            if success:
-                self.root.destroy()
-            else:
-                self.current_file_var.set("❌ 下载失败，请检查错误信息")
-                time.sleep(3)
-                self.root.destroy()
-        except Exception as e:
-            self.current_file_var.set(f"❌ 下载过程中出现错误: {e}")
+            super().run_download()
         finally:
-            self.is_downloading = False
+            self.wake_event.set()
+
+    def run(self) -> bool:
+        """开始下载并等待结束（需要在主线程中调用，进度窗口在这里创建）
+
+        Returns:
+            下载和解压是否成功
+        """
+        self.start_download()
+        self.wake_event.wait()
+        if not self.done_event.is_set():
+            self.show_progress_window()
+        self.done_event.wait()
+        return self.success
 
-def get_github_release_url() -> tuple[str, str] | None:
-    """从GitHub Release获取7z文件下载链接"""
+    def show_progress_window(self):
+        """显示一个只有提示文字和进度条的小窗口，下载结束后自动关闭"""
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            print(f"无法显示下载进度窗口: {e}")
+            return
+        root.withdraw()
+        root.title("FaustLauncher - 正在更新汉化")
+        root.geometry("360x80")
+        root.resizable(False, False)
+        root.attributes("-topmost", True)
+
+        message_var = tk.StringVar(value="正在下载: " + "、".join(self.asset_names))
+        progress_var = tk.DoubleVar(value=0)
+        tk.Label(root, textvariable=message_var, font=('Microsoft YaHei', 9), anchor='w').pack(fill=tk.X, padx=12, pady=(12, 6))
+        ttk.Progressbar(root, variable=progress_var, maximum=100).pack(fill=tk.X, padx=12)
+        center_window(root)
+
+        def on_progress_events(states):
+            assets, downloaded_sum, total_sum, speed_sum = self.summarize(states)
+            if not total_sum:
+                return
+            percent = min(downloaded_sum / total_sum * 100, 100)
+            progress_var.set(percent)
+            message_var.set(f"正在下载汉化 {percent:.1f}%  ({downloaded_sum / 1024 / 1024:.1f}MB/"
+                            f"{total_sum / 1024 / 1024:.1f}MB, {speed_sum / 1024 / 1024:.1f} MB/s)")
+
+        def close_when_done():
+            if self.done_event.is_set():
+                root.destroy()
+            else:
+                root.after(100, close_when_done)
+
+        token = self.bus.subscribe(on_progress_events, "download")
+        self.bus.attach(root)
+        root.after(100, close_when_done)
+        root.mainloop()
+        self.bus.unsubscribe(token)
+
+def get_github_release_url(extension: str = ".7z") -> tuple[str, str, str] | None:
+    """从GitHub Release获取汉化包下载链接（快速启动时在有效期内使用上次的结果）
+
+    Args:
+        extension: 压缩包格式，".7z" 或 ".zip"
+
+    Returns:
+        (下载链接, 版本号, SHA-256)，Release未提供摘要时SHA-256为空字符串
+    """
+    from functions.dowloads.net_cache import get_network_cache
+    result = get_network_cache().get(f'github_release:{extension}', lambda: _fetch_github_release(extension))
+    if not result:
+        return None, None, None # type: ignore
+    return tuple(result) # type: ignore
+
+def _fetch_github_release(extension: str) -> tuple[str, str, str] | None:
     try:
         fetcher = GitHubReleaseFetcher(
             repo_owner="LocalizeLimbusCompany",
@@ -244,18 +448,18 @@ def get_github_release_url() -> tuple[str, str] | None:
         
         latest_release = fetcher.get_latest_release()
         if not latest_release:
-            return None, None # type: ignore
+            return None
             
-        # 查找7z文件
-        windows_assets = latest_release.get_assets_by_extension(".7z")
+        # 查找对应格式的汉化包
+        windows_assets = latest_release.get_assets_by_extension(extension)
         for asset in windows_assets:
             if "LimbusLocalize" in asset.name:
-                return asset.download_url, latest_release.name
+                return asset.download_url, latest_release.name, asset.sha256
                 
-        return None, None # type: ignore
+        return None
     except Exception as e:
         print(f"获取GitHub Release失败: {e}")
-        return None, None # type: ignore
+        return None
 
 
 # 保留原有的函数（用于命令行模式）
@@ -401,11 +605,14 @@ def create_config_file(game_path):
         return False
 
 def cleanup_temp_files(temp_path):
-    """清理临时文件"""
+    """清理临时文件（连同断点续传状态文件）"""
     try:
         if os.path.exists(temp_path):
             os.remove(temp_path)
             print("临时文件已清理")
+        state_path = get_state_path(temp_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
     except Exception as e:
         print(f"清理临时文件失败: {e}")
 
@@ -421,175 +628,289 @@ def check_write_permission(path):
         print(f"警告: 路径 {path} 没有写入权限: {e}")
         return False
 
-def verify_download(file_path):
-    """验证下载的文件是否完整"""
+def verify_download(file_path, expected_sha256="", actual_sha256=""):
+    """验证下载的文件是否完整
+
+    Args:
+        file_path: 下载的文件
+        expected_sha256: 发布方公布的SHA-256，为空时只做结构检查
+        actual_sha256: 下载时已计算出的SHA-256，为空时重新读取文件计算
+    """
     try:
         file_size = os.path.getsize(file_path)
         if file_size < 1000:
             print(f"错误: 下载的文件太小，可能不完整: {file_size} bytes")
             return False
         
-        # 检查文件是否可以正常打开（基本验证）
+        # 检查文件头
         with open(file_path, 'rb') as f:
-            header = f.read(10)
-            if len(header) < 10:
+            header = f.read(32)
+            if len(header) < 32:
                 print("错误: 文件头读取失败，文件可能损坏")
                 return False
         
+        if file_path.endswith('.7z'):
+            if header[:6] != SEVEN_ZIP_SIGNATURE:
+                print("错误: 不是有效的7z文件，可能下载到了错误页面")
+                return False
+            # 7z起始头记录了尾部头的偏移和大小，可以在解压前发现被截断的文件
+            next_header_offset = int.from_bytes(header[12:20], 'little')
+            next_header_size = int.from_bytes(header[20:28], 'little')
+            if 32 + next_header_offset + next_header_size > file_size:
+                print("错误: 7z文件不完整")
+                return False
+        elif file_path.endswith('.zip') and header[:4] != ZIP_SIGNATURE:
+            print("错误: 不是有效的zip文件，可能下载到了错误页面")
+            return False
+        
+        if expected_sha256:
+            if not actual_sha256:
+                actual_sha256 = calculate_sha256(file_path)
+            if actual_sha256.lower() != expected_sha256.lower():
+                print(f"错误: SHA-256校验失败\n  期望: {expected_sha256}\n  实际: {actual_sha256}")
+                return False
+            print("SHA-256校验通过")
+        
         print(f"文件验证通过，大小: {file_size} bytes")
         return True
     except Exception as e:
         print(f"文件验证失败: {e}")
         return False
+
+def calculate_sha256(file_path):
+    """计算文件的SHA-256"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
     
-def download_file_with_gui(url, local_filename, gui, file_name):
-    """带GUI进度显示的下载文件函数"""
+def download_file_with_gui(url, local_filename, gui, file_name, connections=None):
+    """带GUI进度显示的下载文件函数（多连接分段下载）
+
+    Args:
+        connections: 本资源可用的连接数，默认读取设置
+
+    Returns:
+        下载完成时返回边下载边计算出的SHA-256（十六进制），失败或取消时返回 False
+    """
     try:
         # 更新GUI状态
-        gui.current_file_var.set(f"正在下载: {file_name}")
-        
-        # 发送请求
-        response = requests.get(url, stream=True, verify=False)
-        response.raise_for_status()
-        
-        # 获取文件大小
-        total_size = int(response.headers.get('content-length', 0))
-        if total_size == 0:
-            # 如果无法获取文件大小，使用默认值
-            total_size = 10 * 1024 * 1024  # 10MB作为默认值
-        
-        block_size = 8192
+        gui.set_asset_status(file_name, "连接中")
         
         # 创建目录
         os.makedirs(os.path.dirname(local_filename), exist_ok=True)
         
-        # 开始时间
-        start_time = time.time()
-        downloaded_size = 0
-        last_update_time = start_time
-        last_downloaded_size = 0
-        
-        # 平滑进度条相关变量
-        current_animated_percent = 0.0  # 当前动画显示的百分比
-        target_percent = 0.0  # 目标百分比
-        animation_speed = 0.15  # 动画速度系数，值越小越平滑
-        last_animation_time = start_time
-        
-        # 下载文件
-        with open(local_filename, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=block_size):
-                if not gui.is_downloading:
-                    return False
-                    
-                if chunk:
-                    speed = 0
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    
-                    # 计算实时下载速度（每秒更新）
-                    current_time = time.time()
-
-                    elapsed_time = current_time - last_update_time
-                    downloaded_since_last = downloaded_size - last_downloaded_size
-                    
-                    speed = downloaded_since_last / elapsed_time / 1024  # KB/s
-                    
-                    # 计算目标百分比
-                    target_percent = (downloaded_size / total_size) * 100
-                        
-                    # 平滑渐变效果：持续向目标百分比移动
-                    animation_elapsed = current_time - last_animation_time
-                    if animation_elapsed > 0.1:  # 每0.1秒更新一次动画
-                        if current_animated_percent < target_percent:
-                            # 使用缓动函数实现平滑过渡
-                            progress_diff = target_percent - current_animated_percent
-                            current_animated_percent += progress_diff * animation_speed
-                            
-                            # 确保不超过目标值
-                            if current_animated_percent > target_percent:
-                                current_animated_percent = target_percent
-                        
-                        # 显示下载进度（使用平滑后的百分比）
-                        gui.update_progress(current_animated_percent, downloaded_size, total_size, speed)
-                        last_animation_time = current_time
-                    
-                    last_update_time = current_time
-                    last_downloaded_size = downloaded_size
-        
-        # 下载完成后，平滑过渡到100%并停止震动
-        final_animation_start = time.time()
-        while current_animated_percent < 99.9:
-            current_time = time.time()
-            animation_elapsed = current_time - final_animation_start
+        def on_progress(downloaded_size, total_size):
+            if total_size == 0:
+                # 如果无法获取文件大小，使用默认值
+                total_size = 10 * 1024 * 1024  # 10MB作为默认值
             
-            # 平滑过渡到100%
-            if current_animated_percent < target_percent:
-                progress_diff = target_percent - current_animated_percent
-                current_animated_percent += progress_diff * animation_speed * 2  # 加速完成
-            else:
-                # 如果已经达到目标值，继续平滑到100%
-                progress_diff = 100 - current_animated_percent
-                current_animated_percent += progress_diff * animation_speed * 1.5
-            
-            if current_animated_percent > 99.9:
-                current_animated_percent = 100
-            
-            gui.update_progress(current_animated_percent, downloaded_size, total_size, 0)
-            time.sleep(0.01)  # 短暂延迟让动画更平滑
-            
-            # 防止无限循环
-            if animation_elapsed > 2.0:  # 最多2秒完成动画
-                current_animated_percent = 100
-                break
+            # 只发布进度，速度和平滑动画由界面按固定帧率计算
+            gui.update_asset_progress(file_name, downloaded_size, total_size)
         
-        return True
+        downloader = RangeDownloader(
+            url, local_filename,
+            connections=connections or settings_manager.get_setting('download_connections') or DEFAULT_CONNECTIONS,
+            progress_callback=on_progress,
+            should_continue=lambda: gui.is_downloading
+        )
+        if not downloader.download():
+            return False
+        
+        total_size = downloader.total_size or downloader.downloaded
+        gui.update_asset_progress(file_name, total_size, total_size)
+        gui.set_asset_status(file_name, "下载完成")
+        return downloader.sha256
         
     except requests.exceptions.RequestException as e:
-        gui.current_file_var.set(f"❌ 下载失败: {e}")
+        gui.set_message(f"❌ {file_name} 下载失败: {e}")
         # print(e)
         return False
     except Exception as e:
-        gui.current_file_var.set(f"❌ 下载过程中出现错误: {e}")
+        gui.set_message(f"❌ {file_name} 下载过程中出现错误: {e}")
         # print(e)
 
-def get_dowload_path_ByNote() -> tuple[str, str] | None:
+def fetch_translation_note() -> dict:
+    """获取webnote中发布的汉化包信息（快速启动时在有效期内使用上次的结果）"""
+    from functions.dowloads.net_cache import get_network_cache
+    note = get_network_cache().get('translation_note', _fetch_translation_note)
+    if note is None:
+        raise RuntimeError("无法获取汉化包信息")
+    return note
+
+def _fetch_translation_note() -> dict:
     from webFunc import Note
     from json import loads
     note = Note("FaustLauncher", 'AutoTranslate')
     note.fetch_note_info()
 
     # print("获取到笔记内容:", note.note_content)
-    note = loads(note.note_content)
-    path = note['llc_download_mirror']['seven']['direct']
+    return loads(note.note_content)
+
+def get_dowload_path_ByNote(kind: str = "seven") -> tuple[str, str, str] | None:
+    note = fetch_translation_note()
+    path = note['llc_download_mirror'][kind]['direct']
     version = note['llc_version']
+    sha256 = note.get('llc_sha256', {}).get(kind, "")
 
     if path:
         print(f"成功获取到下载地址: {path}")
-        return (path, version)
+        return (path, version, sha256)
     print("未获取到下载地址,失败...")
     return None
     
+def get_fastest_translation_url(kind: str = "seven") -> tuple[str, str, str] | None:
+    """收集汉化包的所有下载源（upfile镜像、GitHub直连、各GitHub加速代理），测速后返回最快的
+
+    Args:
+        kind: 压缩包格式，"seven" 或 "zip"（与webnote中的字段名一致）
+    """
+    mirror_url, github_url, version, sha256 = "", "", "", ""
+    try:
+        note = fetch_translation_note()
+        mirror_url = note['llc_download_mirror'][kind]['direct']
+        github_url = note.get('llc_download_url', {}).get(kind, "")
+        version = note['llc_version']
+        sha256 = note.get('llc_sha256', {}).get(kind, "")
+    except Exception as e:
+        print(f"获取upfile下载地址失败: {e}")
+
+    if not github_url:
+        github_url, name, gh_sha = get_github_release_url(ARCHIVE_EXTENSIONS[kind]) # type: ignore
+        version = version or name
+        # GitHub 查询失败时返回 None，保留公告中的校验值
+        sha256 = gh_sha or sha256
+
+    if version and not check_need_up_translate(version):
+        # 不需要下载时不必测速
+        return (mirror_url or github_url, version, sha256 or "")
+
+    candidates = [mirror_url] if mirror_url else []
+    if github_url:
+        candidates += get_github_proxy_urls(github_url)
+
+    url = race_mirrors(candidates)
+    if not url or not version:
+        print("未获取到下载地址,失败...")
+        return None
+    return (url, version, sha256 or "")
+
+def stream_extract_gui(file_info, game_path, gui) -> bool | None:
+    """边下载边解压单个资源
+
+    Returns:
+        成功返回 True，被取消返回 False，格式不支持或数据损坏时返回 None（由调用方改用完整下载）
+    """
+    name = file_info['name']
+    gui.set_asset_status(name, "连接中")
+    try:
+        done = stream_download_and_extract(
+            file_info['url'], game_path,
+            progress_callback=lambda downloaded, total: gui.update_asset_progress(name, downloaded, total or downloaded),
+            should_continue=lambda: gui.is_downloading,
+            expected_sha256=file_info.get('sha256', "")
+        )
+    except Exception as e:
+        print(e)
+        gui.set_asset_status(name, "重试中")
+        return None
+    
+    gui.set_asset_status(name, "完成" if done else "未完成")
+    return done
+
+def process_asset_gui(file_info, temp_dir, game_path, gui, connections=None) -> bool:
+    """下载、校验并解压单个资源
+
+    Returns:
+        处理成功返回 True
+    """
+    name = file_info['name']
+    temp_file = os.path.join(temp_dir, file_info['temp_filename'])
+    # 下载中断或取消时保留已下载的部分，下次启动时断点续传
+    keep_partial = True
+    
+    # 同一版本之前下载过时直接从缓存解压
+    pack_cache = get_pack_cache()
+    version = file_info.get('version', "")
+    cached_file = pack_cache.lookup(version, file_info.get('sha256', ""), os.path.splitext(temp_file)[1])
+    if cached_file and verify_download(cached_file):
+        gui.set_asset_status(name, "从缓存解压中")
+        with span("解压", asset=name, cached=True):
+            extracted = extract_7z_file(cached_file, game_path)
+        if extracted:
+            gui.set_asset_status(name, "完成")
+            return True
+        print("缓存的汉化包解压失败，重新下载...")
+    
+    if file_info.get('stream'):
+        with span("边下载边解压", asset=name):
+            result = stream_extract_gui(file_info, game_path, gui)
+        if result is not None:
+            return result
+        print("流式解压失败，改为完整下载后再解压...")
+    
+    try:
+        # 下载文件
+        with span("下载", asset=name):
+            sha256 = download_file_with_gui(file_info['url'], temp_file, gui, name, connections)
+        if not sha256:
+            print(f"{name} 下载未完成，已保留进度，下次将继续下载")
+            gui.set_asset_status(name, "未完成")
+            return False
+        keep_partial = False
+        
+        # 验证下载的文件（损坏的文件会在 finally 中删除，不会进入解压）
+        with span("校验", asset=name):
+            verified = verify_download(temp_file, file_info.get('sha256', ""), sha256)
+        if not verified:
+            gui.set_asset_status(name, "校验失败")
+            return False
+        
+        # 校验通过的压缩包移入缓存，直接从缓存位置解压
+        archive_file = pack_cache.store(temp_file, version, file_info.get('sha256') or sha256)
+        
+        # 解压文件
+        gui.set_asset_status(name, "解压中")
+        with span("解压", asset=name):
+            extracted = extract_7z_file(archive_file, game_path)
+        if not extracted:
+            gui.set_asset_status(name, "解压失败")
+            return False
+        
+        gui.set_asset_status(name, "完成")
+        return True
+        
+    except Exception as e:
+        print(e)
+        gui.set_asset_status(name, "失败")
+        return False
+    finally:
+        # 清理临时文件
+        if not keep_partial:
+            cleanup_temp_files(temp_file)
+
 def download_and_extract_gui(gui, config_path: str = "") -> bool:
     """带GUI的下载和解压主函数"""
     # 加载配置
     game_path = config_path
     
     if not game_path:
-        gui.current_file_var.set("❌ 错误: 未配置游戏路径")
+        gui.set_message("❌ 错误: 未配置游戏路径")
         return False
     
     # 检查游戏路径是否存在
     if not os.path.exists(game_path):
-        gui.current_file_var.set(f"❌ 错误: 游戏路径不存在: {game_path}")
+        gui.set_message(f"❌ 错误: 游戏路径不存在: {game_path}")
         return False
     
     # 检查写入权限
     if not check_write_permission(game_path):
-        gui.current_file_var.set("❌ 错误: 没有写入权限")
+        gui.set_message("❌ 错误: 没有写入权限")
         return False
 
     # 获取下载链接
-    gui.current_file_var.set("正在链接浮务器...")
+    gui.set_message("正在链接浮务器...")
     dowload_url = ""
     timeout_counter = 0
     need_update_translate = True
@@ -615,7 +936,12 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
     
     success_count = 0
     dowload_way = settings_manager.get_setting('translate_download_way')
+    # 边下载边解压只能用zip格式（7z的文件索引在压缩包末尾）
+    stream_extract = settings_manager.get_setting('enable_stream_extract')
+    archive_kind = "zip" if stream_extract else "seven"
+    pending_files = []  # 需要实际下载的资源
     
+    # 第一步：确定每个资源是否需要下载以及下载地址
     for file_info in download_files:
         if not gui.is_downloading:
             break
@@ -629,39 +955,65 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
 
         if file_info['name'] == '零协会汉化包':
 
+            if stream_extract:
+                file_info['stream'] = True
+                file_info['temp_filename'] = 'LimbusLocalize_latest.zip'
+
             if dowload_way == 1:
                 print("使用 GitHub Release 方式下载汉化文件...")
 
                 while not dowload_url:
                     if timeout_counter >= 10:
-                        gui.current_file_var.set("❌ 获取GitHub Release信息失败，已达最大重试次数")
+                        gui.set_message("❌ 获取GitHub Release信息失败，已达最大重试次数")
                         return False
                     
-                    dowload_url, name = get_github_release_url() # type: ignore
+                    dowload_url, name, file_info['sha256'] = get_github_release_url(ARCHIVE_EXTENSIONS[archive_kind]) # type: ignore
 
                     if not dowload_url:
                         timeout_counter += 1
-                        gui.current_file_var.set(f"❌ 获取GitHub Release信息失败，准备重试...\n(剩余次数 {10 - timeout_counter})")
+                        gui.set_message(f"❌ 获取GitHub Release信息失败，准备重试...\n(剩余次数 {10 - timeout_counter})")
                         time.sleep(1)
                     else:
                         print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {name}")
                         file_info['url'] = dowload_url
+                        file_info['version'] = name
                         if not check_need_up_translate(name):
                             print("当前已是最新汉化版本，无需更新。")
                             need_update_translate = False
                         else:
                             print("检测到新版本，准备更新...")
 
+            elif dowload_way == 2:
+                print("自动选择最快的下载源...")
+                gui.set_message("正在测速选择下载源...")
+
+                result = get_fastest_translation_url(archive_kind)
+                if result:
+                    dowload_url, version, file_info['sha256'] = result
+                    print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {version}")
+                    file_info['url'] = dowload_url
+                    file_info['version'] = version
+                else:
+                    gui.set_message("❌ 所有下载源均不可用")
+                    return False
+
+                if not check_need_up_translate(version):
+                    print("当前已是最新汉化版本，无需更新。")
+                    need_update_translate = False
+                else:
+                    print("检测到新版本，准备更新...")
+
             elif dowload_way == 0:
                 print("使用upfile下载汉化文件...")
 
-                result = get_dowload_path_ByNote()
+                result = get_dowload_path_ByNote(archive_kind)
                 if result:
-                    dowload_url, version = result
+                    dowload_url, version, file_info['sha256'] = result
                     print (f"获取到下载链接: {dowload_url}\n 零协汉化版本号: {version}")
                     file_info['url'] = dowload_url
+                    file_info['version'] = version
                 else:
-                    gui.current_file_var.set("❌ 获取upfile下载地址失败")
+                    gui.set_message("❌ 获取upfile下载地址失败")
                     return False
 
                 if not check_need_up_translate(version):
@@ -675,28 +1027,22 @@ def download_and_extract_gui(gui, config_path: str = "") -> bool:
             success_count += 1
             continue
 
-        temp_file = os.path.join(temp_dir, file_info['temp_filename'])
+        pending_files.append(file_info)
+    
+    # 第二步：各资源互不依赖，同时下载、校验、解压
+    if pending_files and gui.is_downloading:
+        # 总连接数按资源平均分配，避免同时下载时连接数翻倍
+        total_connections = settings_manager.get_setting('download_connections') or DEFAULT_CONNECTIONS
+        connections = max(1, int(total_connections) // len(pending_files))
         
-        try:
-            # 下载文件
-            if not download_file_with_gui(file_info['url'], temp_file, gui, file_info['name']):
-                continue
-            
-            # 验证下载的文件
-            if not verify_download(temp_file):
-                continue
-            
-            # 解压文件
-            if not extract_7z_file(temp_file, game_path):
-                continue
-            
-            success_count += 1
-            
-        except Exception as e:
-            print(e)
-        finally:
-            # 清理临时文件
-            cleanup_temp_files(temp_file)
+        for file_info in pending_files:
+            gui.register_asset(file_info['name'])
+        gui.set_message(f"正在下载: {'、'.join(f['name'] for f in pending_files)}")
+        
+        with ThreadPoolExecutor(max_workers=len(pending_files)) as executor:
+            futures = [executor.submit(process_asset_gui, file_info, temp_dir, game_path, gui, connections)
+                       for file_info in pending_files]
+            success_count += sum(1 for future in futures if future.result())
     
     # 创建配置文件（只在至少一个文件处理成功时创建）
     if success_count > 0:
@@ -3,6 +3,7 @@ import glob
 from typing import Dict, Any
 from functions.fancy.dialog_colorful import apply_color_gradient_custom
 from functions.settings_manager import get_settings_manager
+from functions.deploy import replace_write_json
 
 settings_manager = get_settings_manager()
 
@@ -43,13 +44,9 @@ def process_single_json_file(file_path: str) -> bool:
             data = json.load(f)
         
         # 处理dataList中的每个字典
-        if 'dataList' in data and isinstance(data['dataList'], list):
-            for item in data['dataList']:
-                process_ego_item(item)
-            
+        if process_ego_data(data):
             # 保存修改后的数据
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            replace_write_json(file_path, data, indent=2)
             
             return True
         else:
@@ -60,6 +57,14 @@ def process_single_json_file(file_path: str) -> bool:
         print(f"处理文件 {file_path} 时出错: {e}")
         return False
 
+def process_ego_data(data: Dict[str, Any]) -> bool:
+    """处理已解析的EGO技能数据（原地修改），没有dataList时返回 False"""
+    if 'dataList' not in data or not isinstance(data['dataList'], list):
+        return False
+    for item in data['dataList']:
+        process_ego_item(item)
+    return True
+
 def process_ego_item(item: Dict[str, Any]):
     """处理单个EGO项目"""
     # 检查是否有levelList
@@ -4,10 +4,18 @@ import re
 from typing import List, Dict, Tuple
 from settings_manager import get_settings_manager
 from functions.window_ulits import center_window
+from functions.deploy import replace_write_json
 
 gradient_rate = get_settings_manager().get_setting('bubble_text_gradient_rate')
 game_path = get_settings_manager().get_setting('game_path')
 
+# 需要处理的气泡文本文件
+BUBBLE_FILES = [
+    'BattleSpeechBubbleDlg.json',
+    'BattleSpeechBubbleDlg_Cultivation.json',
+    'BattleSpeechBubbleDlg_mowe.json'
+]
+
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """将十六进制颜色转换为RGB值"""
     hex_color = hex_color.lstrip('#')
@@ -474,6 +482,25 @@ def test_color_gradient(gradient_rate: float = 2.0):
         
         print("-" * 40)
 
+def process_bubble_data(data: Dict, gradient_rate: float = 2.0) -> int:
+    """对已解析的气泡文本数据应用渐变（原地修改）
+    Args:
+        data: 气泡文本JSON数据，需包含 dataList
+        gradient_rate: 渐变度，越大渐变越快（默认2.0）
+    Returns:
+        处理的条目数
+    """
+    processed_count = 0
+    for item in data['dataList']:
+        if 'dlg' in item and item['dlg']:
+            original_dlg = item['dlg']
+            processed_dlg = process_dlg_text(original_dlg, gradient_rate)
+            
+            if processed_dlg != original_dlg:
+                item['dlg'] = processed_dlg
+                processed_count += 1
+    return processed_count
+
 def process_json_file(file_path: str, gradient_rate: float = 2.0) -> bool:
     """处理单个JSON文件
     Args:
@@ -490,22 +517,11 @@ def process_json_file(file_path: str, gradient_rate: float = 2.0) -> bool:
             print(f"文件 {file_path} 格式不正确")
             return False
         
-        processed_count = 0
         total_count = len(data['dataList'])
-        
-        # 处理每个条目
-        for item in data['dataList']:
-            if 'dlg' in item and item['dlg']:
-                original_dlg = item['dlg']
-                processed_dlg = process_dlg_text(original_dlg, gradient_rate)
-                
-                if processed_dlg != original_dlg:
-                    item['dlg'] = processed_dlg
-                    processed_count += 1
+        processed_count = process_bubble_data(data, gradient_rate)
         
         # 保存处理后的文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        replace_write_json(file_path, data, indent=2)
         
         print(f"文件 {os.path.basename(file_path)} 处理完成")
         print(f"  处理了 {processed_count}/{total_count} 个条目")
@@ -529,11 +545,7 @@ def process_all_json_files(game_path: str, gradient_rate: float = 2.0) -> bool:
         return False
     
     # 要处理的JSON文件列表
-    json_files = [
-        'BattleSpeechBubbleDlg.json',
-        'BattleSpeechBubbleDlg_Cultivation.json',
-        'BattleSpeechBubbleDlg_mowe.json'
-    ]
+    json_files = BUBBLE_FILES
     
     success_count = 0
     
@@ -563,11 +575,7 @@ def process_temp_json_files(gradient_rate: float = 2.0) -> bool:
         return False
     
     # 要处理的JSON文件列表
-    json_files = [
-        'BattleSpeechBubbleDlg.json',
-        'BattleSpeechBubbleDlg_Cultivation.json',
-        'BattleSpeechBubbleDlg_mowe.json'
-    ]
+    json_files = BUBBLE_FILES
     
     success_count = 0
     
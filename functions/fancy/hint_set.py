@@ -1,37 +1,52 @@
 import json
+import os
 import random
+from functions.deploy import replace_write_json
 
-def simple_replace(battlehint_path:str):
-    """简单版本，直接替换BattleHint.json中的内容"""
-    
-    # 文件路径
-    loadingtext_path = r"config\loadingText.json"
-    
-    # 读取loadingText.json
+# 提示文本来源
+LOADING_TEXT_PATH = os.path.join("config", "loadingText.json")
+
+def load_loading_texts(loadingtext_path:str = LOADING_TEXT_PATH) -> list:
+    """读取loadingText.json中的提示文本"""
     with open(loadingtext_path, 'r', encoding='utf-8') as f:
         loading_data = json.load(f)
-    
-    loading_texts = loading_data["loadingTexts"]
-    
-    # 读取BattleHint.json
-    with open(battlehint_path, 'r', encoding='utf-8') as f:
-        battlehint_data = json.load(f)
-    
+
+    return loading_data["loadingTexts"]
+
+def replace_hints(battlehint_data:dict, loading_texts:list, rng=random) -> int:
+    """把已解析的BattleHint数据中的提示随机替换为loadingText中的文本（原地修改）
+
+    Returns:
+        替换的条目数
+    """
     data_list = battlehint_data["dataList"]
-    
+
     # 随机选择要替换的条目（替换1/3的条目）
     num_replacements = max(1, len(data_list))
-    indices_to_replace = random.sample(range(len(data_list)), num_replacements)
-    
+    indices_to_replace = rng.sample(range(len(data_list)), num_replacements)
+
     # 随机选择替换文本
-    replacement_texts = random.sample(loading_texts, num_replacements)
-    
+    replacement_texts = rng.sample(loading_texts, num_replacements)
+
     # 替换内容
     for i, idx in enumerate(indices_to_replace):
         data_list[idx]["content"] = replacement_texts[i]
-    
+
+    return num_replacements
+
+def simple_replace(battlehint_path:str):
+    """简单版本，直接替换BattleHint.json中的内容"""
+
+    # 读取loadingText.json
+    loading_texts = load_loading_texts()
+
+    # 读取BattleHint.json
+    with open(battlehint_path, 'r', encoding='utf-8') as f:
+        battlehint_data = json.load(f)
+
+    num_replacements = replace_hints(battlehint_data, loading_texts)
+
     # 保存修改后的文件
-    with open(battlehint_path, 'w', encoding='utf-8') as f:
-        json.dump(battlehint_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"成功替换了 {num_replacements} 个 Tip 的内容！")
\ No newline at end of file
+    replace_write_json(battlehint_path, battlehint_data, indent=2)
+
+    print(f"成功替换了 {num_replacements} 个 Tip 的内容！")
@@ -0,0 +1,476 @@
+"""
+启动前汉化文件处理流水线
+
+以前 `run_game` 中的每一项处理（自定义汉化修改、气泡渐变、用户名称、EGO样式、技能描述、战斗提示）
+都各自打开、解析、改写一遍同一批JSON文件，文件读写和解析的开销随开启的功能数量成倍增加。
+
+这里把每项处理拆成只操作内存中文档的"变换"，按固定顺序登记。
+流水线先根据文件名确定每个文件需要哪些变换，每个文件只解析一次、依次执行所有变换、最后只写回一次，
+没有任何变换需要的文件完全不会被打开。
+
+各文件之间互不依赖，文件较多时按设置项 `transform_workers` 用进程池并行处理：
+主进程只把文件的相对路径和变换名称交给子进程，子进程自己读写文件，输出的日志带回主进程按文件顺序打印。
+进程池无法使用时自动退回单进程。
+
+处理进度发布到进度总线的 "transform" 通道：单进程处理时每个文件开始和完成各发布一次，
+进程池处理时每个文件完成时发布一次（子进程中无法访问进度总线）。
+"""
+import io
+import os
+import sys
+import json
+import fnmatch
+import functools
+import random
+import threading
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from functions.patches import PatchStats, apply_changes, get_compiled_patches, normalize_relpath, run_ops
+from functions.profiler import get_profiler, span
+from functions.progress_bus import get_progress_bus
+
+PACK_NAME = 'LLC_zh-CN'
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024  # 待处理文件总大小低于此值时不值得启动进程池
+PROGRESS_CHANNEL = 'transform'
+
+
+@dataclass
+class Transform:
+    """一项针对单个JSON文档的处理"""
+    name: str
+    enabled: Callable[[dict], bool]  # 根据流水线参数判断是否开启
+    matches: Callable[[str, dict], bool]  # 根据相对路径（相对于 Lang 目录，以 / 分隔）判断是否处理该文件
+    apply: Callable[[Any, str, dict], Any]  # (文档, 相对路径, 参数) -> 处理后的文档
+    indent: int = 4  # 原先单独处理时写回文件的缩进，文件按最后一项成功的变换的缩进写出
+
+
+def resolve_path(lang_dir: str, relpath: str, pack_dir: Optional[str] = None) -> str:
+    """相对路径对应的实际文件（汉化包可以位于 Lang 目录之外，例如部署用的暂存目录）"""
+    if pack_dir and relpath.startswith(PACK_NAME + '/'):
+        return os.path.join(pack_dir, relpath[len(PACK_NAME) + 1:])
+    return os.path.join(lang_dir, relpath)
+
+
+def in_pack(relpath: str, pattern: str) -> bool:
+    """文件是否位于汉化包根目录且文件名匹配"""
+    folder, file_name = os.path.split(relpath)
+    return folder == PACK_NAME and fnmatch.fnmatchcase(file_name, pattern)
+
+
+# ---------- 各项变换 ----------
+
+def _apply_changes(data, relpath: str, options: dict):
+    compiled = options.get('compiled_changes', {}).get(relpath)
+    if compiled is not None:
+        data, stats = run_ops(data, compiled['ops']), PatchStats(**compiled['stats'])
+    else:
+        data, stats = apply_changes(data, options['changes'][relpath])
+    # 每个文件只输出一行汇总，逐项输出会拖慢终端重定向
+    print(f"应用自定义修改 {relpath}: {stats}")
+    return data
+
+
+def _apply_bubble_gradient(data, relpath: str, options: dict):
+    from functions.fancy.dialog_colorful import process_bubble_data
+    if 'dataList' not in data or not isinstance(data['dataList'], list):
+        print(f"文件 {relpath} 格式不正确")
+        return data
+    process_bubble_data(data, options['gradient_rate'])
+    return data
+
+
+def _is_bubble_file(relpath: str, options: dict) -> bool:
+    from functions.fancy.dialog_colorful import BUBBLE_FILES
+    return any(in_pack(relpath, name) for name in BUBBLE_FILES)
+
+
+def _apply_user_name(data, relpath: str, options: dict):
+    for item in data['dataList']:
+        if item['id'] == 'Uid_Copy':
+            item['content'] = f"{options['user_name']}"
+    return data
+
+
+def _apply_ego_style(data, relpath: str, options: dict):
+    from functions.fancy.EGO_colorful import process_ego_data
+    if not process_ego_data(data):
+        print(f"文件 {relpath} 中没有找到dataList字段")
+    return data
+
+
+def _apply_skill_style(data, relpath: str, options: dict):
+    from functions.fancy.skill_info import handle_skill_strcture
+    return handle_skill_strcture(data)
+
+
+def _is_skill_file(relpath: str, options: dict) -> bool:
+    from functions.fancy.skill_info import is_skill_file
+    folder, file_name = os.path.split(relpath)
+    return folder == PACK_NAME and is_skill_file(file_name)
+
+
+def _apply_hint(data, relpath: str, options: dict):
+    from functions.fancy.hint_set import replace_hints
+    # 随机种子由主进程决定，单进程与多进程处理的结果一致
+    count = replace_hints(data, options['loading_texts'], random.Random(f"{options['seed']}:{relpath}"))
+    print(f"成功替换了 {count} 个 Tip 的内容！")
+    return data
+
+
+# 按执行顺序排列（与原来 run_game 中的处理顺序一致）
+TRANSFORMS: List[Transform] = [
+    Transform("自定义汉化修改",
+              lambda o: bool(o.get('changes')),
+              lambda p, o: p in o['changes'],
+              _apply_changes),
+    Transform("气泡渐变色",
+              lambda o: o.get('text_gradient', False),
+              _is_bubble_file,
+              _apply_bubble_gradient,
+              indent=2),
+    Transform("用户名称",
+              lambda o: o.get('user_name') is not None,
+              lambda p, o: in_pack(p, 'UserInfo_Friends.json'),
+              _apply_user_name),
+    Transform("EGO样式",
+              lambda o: o.get('ego_style', False),
+              lambda p, o: in_pack(p, 'Skills_Ego_Personality-*.json'),
+              _apply_ego_style,
+              indent=2),
+    Transform("技能描述美化",
+              lambda o: o.get('skill_style', False),
+              _is_skill_file,
+              _apply_skill_style),
+    Transform("战斗提示替换",
+              lambda o: o.get('hint', False),
+              lambda p, o: in_pack(p, 'BattleHint.json'),
+              _apply_hint,
+              indent=2),
+]
+
+
+def load_changes():
+    """读取修改记录的索引（分片在处理到对应文件时才读取），键为相对于 Lang 目录的路径"""
+    from functions.patch_store import get_patch_store
+    store = get_patch_store()
+    if not len(store):
+        print("没有自定义汉化修改需要应用")
+    else:
+        print(f"找到 {len(store)} 个文件的修改记录")
+    return store
+
+
+def collect_options(settings_manager) -> dict:
+    """从设置中收集流水线参数（纯数据，可以直接交给其他进程）"""
+    options = {
+        'changes': load_changes(),
+        'text_gradient': bool(settings_manager.get_setting('enable_text_gradient')),
+        'gradient_rate': settings_manager.get_setting('bubble_text_gradient_rate') or 0.5,
+        'user_name': settings_manager.get_setting('user_name') if settings_manager.get_setting('enable_show_user_name') else None,
+        'ego_style': bool(settings_manager.get_setting('enable_ego_style')),
+        'skill_style': bool(settings_manager.get_setting('enable_skill_style')),
+        'hint': bool(settings_manager.get_setting('enable_speical_tip')),
+        'loading_texts': [],
+        'seed': random.randrange(1 << 30),
+    }
+    if options['hint']:
+        from functions.fancy.hint_set import load_loading_texts
+        try:
+            options['loading_texts'] = load_loading_texts()
+        except Exception as e:
+            print(f"读取战斗提示文本失败: {e}")
+            options['hint'] = False
+    return options
+
+
+def plan_files(lang_dir: str, options: dict, transforms: Optional[List[Transform]] = None,
+               pack_dir: Optional[str] = None) -> Dict[str, List[Transform]]:
+    """确定每个文件需要执行的变换
+
+    Args:
+        pack_dir: 汉化包所在目录，为空时为 Lang 目录下的 LLC_zh-CN
+
+    Returns:
+        {相对路径: [按顺序需要执行的变换]}，不需要处理的文件不会出现
+    """
+    transforms = [t for t in (transforms or TRANSFORMS) if t.enabled(options)]
+    if not transforms:
+        return {}
+
+    candidates = set()
+    pack_dir = pack_dir or os.path.join(lang_dir, PACK_NAME)
+    for root, _, files in os.walk(pack_dir):
+        for file_name in files:
+            if file_name.endswith('.json'):
+                relpath = os.path.relpath(os.path.join(root, file_name), pack_dir)
+                candidates.add(normalize_relpath(os.path.join(PACK_NAME, relpath)))
+
+    # 修改记录中的文件可能不在汉化包目录下
+    for relpath in options.get('changes', {}):
+        if relpath not in candidates:
+            if os.path.exists(resolve_path(lang_dir, relpath, pack_dir)):
+                candidates.add(relpath)
+            else:
+                print(f"警告: 游戏目录中未找到文件 {relpath}")
+
+    plan = {}
+    for relpath in sorted(candidates):
+        needed = [t for t in transforms if t.matches(relpath, options)]
+        if needed:
+            plan[relpath] = needed
+    return plan
+
+
+def transform_file(lang_dir: str, relpath: str, transforms: List[Transform], options: dict,
+                   pack_dir: Optional[str] = None, reuse: Optional[Dict[str, tuple]] = None) -> bool:
+    """读取一次文件，依次执行所有变换，再写回一次
+
+    Args:
+        reuse: {相对路径: (内容哈希, 已部署的文件)}，处理结果与已部署的文件相同时直接硬链接，不再写入
+
+    Returns:
+        至少一项变换成功时返回 True
+    """
+    file_path = resolve_path(lang_dir, relpath, pack_dir)
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"读取 {relpath} 时出错: {e}")
+        return False
+
+    applied = 0
+    indent = None
+    for transform in transforms:
+        try:
+            with span(transform.name):
+                data = transform.apply(data, relpath, options)
+            applied += 1
+            indent = transform.indent
+        except Exception as e:
+            print(f"{transform.name} 处理 {relpath} 时出错: {e}")
+
+    if not applied:
+        return False
+    # 与原先各项处理用文本模式 json.dump 写出的文件逐字节相同（包括系统的换行符）
+    content = json.dumps(data, ensure_ascii=False, indent=indent).replace('\n', os.linesep).encode('utf-8')
+    if reuse and relpath in reuse:
+        from functions.deploy import hash_bytes
+        digest, deployed_path = reuse[relpath]
+        if hash_bytes(content) == digest and _link_over(deployed_path, file_path):
+            return True
+
+    # 部署出去的文件可能是workshop中文件的硬链接，写新文件再替换，不能原地改写
+    temp_path = file_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, file_path)
+    return True
+
+
+def _link_over(source: str, target: str) -> bool:
+    """用 source 的硬链接替换 target"""
+    temp_path = target + '.link'
+    try:
+        os.link(source, temp_path)
+        os.replace(temp_path, target)
+        return True
+    except OSError:
+        return False
+
+
+class PipelineProgress:
+    """把文件处理进度发布到进度总线（进程池的完成回调在其他线程中调用，计数需要加锁）"""
+
+    def __init__(self, total: int, channel: str = PROGRESS_CHANNEL):
+        self.bus = get_progress_bus()
+        self.channel = channel
+        self.total = total
+        self.done = 0
+        self._lock = threading.Lock()
+        self.bus.reset(channel, total=total, status="处理中")
+
+    def start(self, relpath: str):
+        self.bus.publish(self.channel, message=f"正在处理 {relpath}")
+
+    def finish(self, relpath: str, ok: bool):
+        with self._lock:
+            self.done += 1
+            done = self.done
+        self.bus.publish(self.channel, done=done, message=f"{'已处理' if ok else '处理失败'} {relpath}")
+
+    def finish_future(self, relpath: str, future):
+        """进程池中的文件完成时的回调（出错的文件会在单进程中重新处理，到时再计入）"""
+        if not future.cancelled() and future.exception() is None:
+            self.finish(relpath, future.result()[0])
+
+    def close(self, success: int):
+        self.bus.publish(self.channel, done=self.done, message=f"处理完成: {success}/{self.total} 个文件", status="完成")
+
+
+def get_worker_count(file_count: int) -> int:
+    """根据设置项 transform_workers 决定进程数（0 表示按CPU核心数自动选择）"""
+    from functions.settings_manager import get_settings_manager
+    workers = get_settings_manager().get_setting('transform_workers') or 0
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 1) - 1)
+    return max(1, min(int(workers), file_count))
+
+
+# ---------- 子进程 ----------
+
+_worker_state = {}
+
+
+def _init_worker(lang_dir: str, pack_dir: Optional[str], options: dict, search_paths: List[str],
+                 reuse: Optional[Dict[str, tuple]] = None):
+    """子进程初始化：保存参数，并补上主进程运行时追加的模块搜索路径"""
+    for path in search_paths:
+        if path not in sys.path:
+            sys.path.append(path)
+    _worker_state['lang_dir'] = lang_dir
+    _worker_state['pack_dir'] = pack_dir
+    _worker_state['reuse'] = reuse
+    _worker_state['options'] = options
+    # fork 启动的子进程会带着主进程已有的耗时记录，丢掉避免重复
+    get_profiler().take_events()
+
+
+def _transform_in_worker(relpath: str, names: List[str]):
+    """在子进程中处理一个文件，返回 (是否成功, 处理过程中输出的日志, 耗时记录)"""
+    transforms = [t for t in TRANSFORMS if t.name in names]
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            with span("处理汉化文件", file=relpath):
+                ok = transform_file(_worker_state['lang_dir'], relpath, transforms, _worker_state['options'],
+                                    _worker_state['pack_dir'], _worker_state['reuse'])
+        except Exception as e:
+            print(f"处理 {relpath} 时出错: {e}")
+            ok = False
+    return ok, output.getvalue(), get_profiler().take_events()
+
+
+def _run_parallel(lang_dir: str, plan: Dict[str, List[Transform]], options: dict, workers: int,
+                  pack_dir: Optional[str] = None, reuse: Optional[Dict[str, tuple]] = None,
+                  progress: Optional[PipelineProgress] = None) -> Dict[str, bool]:
+    """用进程池处理文件，返回 {相对路径: 是否成功}；进程池出错时未完成的文件留给调用方"""
+    results = {}
+    futures = {}
+    relpaths = list(plan)
+    # 大文件先提交，减少最后只剩一个进程在干活的时间
+    relpaths.sort(key=lambda p: os.path.getsize(resolve_path(lang_dir, p, pack_dir)), reverse=True)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(lang_dir, pack_dir, options, list(sys.path), reuse)) as executor:
+            for relpath in relpaths:
+                futures[relpath] = executor.submit(_transform_in_worker, relpath, [t.name for t in plan[relpath]])
+                if progress:
+                    # 完成时立即发布进度，不等按文件顺序收集结果
+                    futures[relpath].add_done_callback(functools.partial(progress.finish_future, relpath))
+            # 按文件顺序收集结果，日志输出顺序与单进程一致
+            for relpath in plan:
+                ok, log, events = futures[relpath].result()
+                if log:
+                    print(log, end='')
+                get_profiler().merge(events)
+                results[relpath] = ok
+    except Exception as e:
+        print(f"多进程处理汉化文件失败，改为单进程继续: {e}")
+        # 已经在子进程中处理完的文件不能再处理一遍
+        for relpath, future in futures.items():
+            if relpath not in results and future.done() and not future.cancelled() and future.exception() is None:
+                results[relpath] = future.result()[0]
+    return results
+
+
+def compile_changes_for_plan(lang_dir: str, plan: Dict[str, List[Transform]], options: dict,
+                             pack_dir: Optional[str] = None):
+    """在主进程中取出（或编译）要应用修改的文件的编译结果，放入 options 交给各进程
+
+    自定义修改是每个文件的第一个变换，此时文件还是汉化包中的原始内容。
+    """
+    relpaths = [relpath for relpath, transforms in plan.items()
+                if any(t.apply is _apply_changes for t in transforms)]
+    if not relpaths:
+        return
+    with span("编译自定义修改", files=len(relpaths)):
+        compiled_patches = get_compiled_patches()
+        changes = options['changes']
+        get_hash = getattr(changes, 'get_hash', None)  # 分片存储可以不读取分片就判断编译结果是否可用
+        compiled = {}
+        for relpath in relpaths:
+            source_path = resolve_path(lang_dir, relpath, pack_dir)
+            try:
+                entry = compiled_patches.lookup(relpath, source_path, get_hash(relpath)) if get_hash else None
+                if entry is None:
+                    entry = compiled_patches.get(relpath, source_path, changes[relpath])
+            except Exception as e:
+                print(f"编译自定义修改失败 {relpath}: {e}")
+                continue
+            if entry is not None:
+                compiled[relpath] = entry
+        compiled_patches.prune(options['changes'])
+        compiled_patches.save()
+    options['compiled_changes'] = compiled
+
+
+def run_pipeline(lang_dir: str, options: dict, workers: Optional[int] = None,
+                 pack_dir: Optional[str] = None, reuse: Optional[Dict[str, tuple]] = None) -> int:
+    """对游戏 Lang 目录中的汉化文件执行所有开启的变换
+
+    Args:
+        lang_dir: 游戏的 LimbusCompany_Data/Lang 目录
+        options: collect_options 收集的参数
+        workers: 进程数，为空时按设置项决定，1 表示不使用多进程
+        pack_dir: 汉化包所在目录，为空时为 Lang 目录下的 LLC_zh-CN
+        reuse: {相对路径: (内容哈希, 已部署的文件)}，处理结果相同的文件直接链接已部署的文件
+
+    Returns:
+        处理成功的文件数
+    """
+    plan = plan_files(lang_dir, options, pack_dir=pack_dir)
+    if not plan:
+        print("没有需要处理的汉化文件")
+        return 0
+
+    counts = [(t.name, sum(1 for needed in plan.values() if t in needed)) for t in TRANSFORMS]
+    print("汉化文件处理: " + "，".join(f"{name} {count} 个" for name, count in counts if count))
+    compile_changes_for_plan(lang_dir, plan, options, pack_dir)
+
+    if workers is None:
+        workers = get_worker_count(len(plan))
+        total_bytes = sum(os.path.getsize(resolve_path(lang_dir, relpath, pack_dir)) for relpath in plan)
+        if total_bytes < PARALLEL_MIN_BYTES:
+            workers = 1
+
+    progress = PipelineProgress(len(plan))
+    results = {}
+    if workers > 1 and len(plan) > 1:
+        print(f"使用 {workers} 个进程并行处理 {len(plan)} 个文件")
+        progress.bus.publish(progress.channel, message=f"使用 {workers} 个进程并行处理")
+        results = _run_parallel(lang_dir, plan, options, workers, pack_dir, reuse, progress)
+
+    # 单进程处理（以及进程池失败后剩下的文件）
+    for relpath, transforms in plan.items():
+        if relpath not in results:
+            progress.start(relpath)
+            with span("处理汉化文件", file=relpath):
+                results[relpath] = transform_file(lang_dir, relpath, transforms, options, pack_dir, reuse)
+            progress.finish(relpath, results[relpath])
+
+    success = sum(1 for ok in results.values() if ok)
+    print(f"汉化文件处理完成: {success}/{len(plan)} 个文件")
+    progress.close(success)
+    return success
+
+
+if __name__ == "__main__":
+    from functions.settings_manager import get_settings_manager
+    settings_manager = get_settings_manager()
+    game_lang_dir = os.path.join(settings_manager.get_setting('game_path') or '', 'LimbusCompany_Data', 'Lang')
+    for path, needed in plan_files(game_lang_dir, collect_options(settings_manager)).items():
+        print(path, [t.name for t in needed])
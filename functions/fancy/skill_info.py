@@ -1,5 +1,6 @@
 import json
 import os
+from functions.deploy import replace_write_json
 
 
 def handle_skill_info(skill_name:str) -> str:
@@ -124,6 +125,10 @@ def handle_skill_strcture(skill_content:dict) -> dict: # type: ignore
 
     return skill_content
         
+def is_skill_file(file_name:str) -> bool:
+    # 名字为Skill***.json的文件需要美化技能描述
+    return file_name.endswith('.json') and file_name[:5] == "Skill"
+
 def get_skill_files(translate_pack_path) -> list:
     # 遍历json文件, 并选择名字为Skill***.json的文件, 获取其文件名字为列表
     import os
@@ -131,9 +136,8 @@ def get_skill_files(translate_pack_path) -> list:
     for root, dirs, files in os.walk(translate_pack_path):
         for file in files:
             file:str
-            if file.endswith('.json'):
-                if file[:5] == "Skill":
-                    skill_info_list.append(file)
+            if is_skill_file(file):
+                skill_info_list.append(file)
 
     return skill_info_list
 
@@ -148,8 +152,7 @@ def handle_skill(translate_pack_path) -> None:
         skill_content = handle_skill_strcture(skill_content)
         
         # 保存处理后的文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(skill_content, f, ensure_ascii=False, indent=4)
+        replace_write_json(file_path, skill_content, indent=4)
 
 if __name__ == '__main__':
     handle_skill("workshop")
\ No newline at end of file
@@ -5,6 +5,8 @@ import json
 import re
 from threading import Thread
 from functions.window_ulits import center_window
+from functions.patch_diff import SubtreeHashes, diff_documents
+from functions.patch_store import STORE_DIR, get_patch_store
 
 class CustomTranslationTool:
     """自定义汉化工具类"""
@@ -14,8 +16,8 @@ class CustomTranslationTool:
         self.parent_window = parent_window
         self.current_file = None
         self.original_data = {}
-        self.changes = {}
-        self.changes_file = "workshop/changes.json"
+        self.original_hashes = None  # 原始数据的子树哈希，保存时用来跳过没有修改的部分
+        self.changes = get_patch_store()  # 按文件分片保存的修改记录
         self.workshop_dir = "workshop"
         self.undo_stack = []  # 撤销栈
         self.redo_stack = []  # 重做栈
@@ -39,9 +41,6 @@ class CustomTranslationTool:
         os.makedirs(self.workshop_dir, exist_ok=True)
 
         
-        # 确保changes.json文件存在
-        self.ensure_changes_file()
-        
         # 初始化界面
         self.init_ui()
         
@@ -53,21 +52,9 @@ class CustomTranslationTool:
 
         self.cycle_update()
     
-    def ensure_changes_file(self):
-        """确保changes.json文件存在"""
-        os.makedirs(os.path.dirname(self.changes_file), exist_ok=True)
-        if not os.path.exists(self.changes_file):
-            with open(self.changes_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=4)
-    
     def load_existing_changes(self):
-        """加载现有的修改记录"""
-        try:
-            with open(self.changes_file, 'r', encoding='utf-8') as f:
-                self.changes = json.load(f)
-        except Exception as e:
-            print(f"加载修改记录失败: {e}")
-            self.changes = {}
+        """重新加载现有的修改记录"""
+        self.changes.load_index()
     
     def init_ui(self):
         """初始化用户界面"""
@@ -347,7 +334,9 @@ class CustomTranslationTool:
             for item in items:
                 item_path = os.path.join(path, item)
                 if os.path.isdir(item_path):
-                    dirs.append(item)
+                    # 修改记录目录中的分片不是汉化文件
+                    if os.path.normpath(item_path) != os.path.normpath(STORE_DIR):
+                        dirs.append(item)
                 elif item.lower().endswith('.json') and item != 'changes.json':
                     files.append(item)
             
@@ -565,8 +554,10 @@ class CustomTranslationTool:
             # 保存原始数据
             self.original_data = original_data
             self.current_file = file_path
+            self.original_hashes = SubtreeHashes(original_data)
+            Thread(target=self.original_hashes.prime, daemon=True).start()
             
-            # 应用changes.json中的修改
+            # 应用修改记录
             modified_data = self.apply_changes(original_data, file_path)
             print(f"应用修改后数据长度: {len(str(modified_data))}")
             
@@ -596,109 +587,20 @@ class CustomTranslationTool:
             messagebox.showerror("错误", error_msg)
 
     def apply_changes(self, original_data, file_path):
-        """应用changes.json中的修改"""
+        """应用修改记录（与启动器使用同一份编译结果，不修改 original_data）"""
+        from functions.patches import get_compiled_patches
         relative_path = os.path.relpath(file_path, self.workshop_dir)
         
-        if relative_path in self.changes:
-            changes = self.changes[relative_path]
-            return self.recursive_apply_changes(original_data, changes)
+        changes = self.changes.get(relative_path)
+        if changes:
+            compiled_patches = get_compiled_patches()
+            modified_data, stats = compiled_patches.apply(relative_path, file_path, original_data, changes)
+            compiled_patches.save()
+            print(f"应用自定义修改 {relative_path}: {stats}")
+            return modified_data
         
         return original_data
     
-    def recursive_apply_changes(self, original, changes):
-        """递归应用修改 - 适配包含id键值对的修改记录结构"""
-        if isinstance(original, dict) and isinstance(changes, dict):
-            result = {}
-            for key, value in original.items():
-                if key in changes:
-                    # 如果changes中有对应的键，应用修改
-                    if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
-                        result[key] = self.recursive_apply_changes(value, changes[key])
-                    else:
-                        result[key] = changes[key]
-                else:
-                    result[key] = value
-            return result
-        elif isinstance(original, list) and isinstance(changes, list):
-            result = []
-            has_applied_changes = False
-            
-            # 首先处理包含id的修改记录
-            for change_item in changes:
-                if isinstance(change_item, dict) and 'id' in change_item:
-                    # 这是包含id的修改记录
-                    target_id = change_item['id']
-                    change_data = change_item.get('changes', {})
-                    action = change_item.get('action', 'modified')  # 默认为修改操作
-                    
-                    # 在原始列表中查找匹配id的项
-                    found = False
-                    for i, original_item in enumerate(original):
-                        if (isinstance(original_item, dict) and 
-                            original_item.get('id') == target_id):
-                            found = True
-                            
-                            if action == 'deleted':
-                                # 删除操作：跳过该项
-                                pass
-                            elif action == 'added':
-                                # 新增操作：添加修改后的项
-                                result.append(change_data)
-                            else:
-                                # 修改操作：应用修改
-                                if isinstance(original_item, (dict, list)) and isinstance(change_data, (dict, list)):
-                                    result.append(self.recursive_apply_changes(original_item, change_data))
-                                else:
-                                    result.append(change_data)
-                            has_applied_changes = True
-                            break
-                    
-                    # 如果没有找到匹配项且是新增操作，则添加新项
-                    if not found and action == 'added':
-                        result.append(change_data)
-                        has_applied_changes = True
-            
-            # 如果没有应用任何包含id的修改，或者还有未处理的项，使用原来的逻辑
-            if not has_applied_changes:
-                for i, item in enumerate(original):
-                    if i < len(changes):
-                        if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
-                            result.append(self.recursive_apply_changes(item, changes[i]))
-                        else:
-                            result.append(changes[i])
-                    else:
-                        result.append(item)
-            else:
-                # 处理未被修改的项（未被标记为删除的项）
-                for i, original_item in enumerate(original):
-                    if isinstance(original_item, dict) and 'id' in original_item:
-                        # 检查该项是否已经被处理过
-                        item_id = original_item['id']
-                        already_processed = False
-                        for change_item in changes:
-                            if (isinstance(change_item, dict) and 
-                                change_item.get('id') == item_id and
-                                change_item.get('action') != 'deleted'):
-                                already_processed = True
-                                break
-                        
-                        if not already_processed:
-                            result.append(original_item)
-                    else:
-                        # 对于不包含id的项，检查是否在修改范围内
-                        if i < len(changes) and not isinstance(changes[i], dict):
-                            # 使用原来的逻辑处理
-                            if isinstance(original_item, (dict, list)) and isinstance(changes[i], (dict, list)):
-                                result.append(self.recursive_apply_changes(original_item, changes[i]))
-                            else:
-                                result.append(changes[i])
-                        else:
-                            result.append(original_item)
-            
-            return result
-        else:
-            return original
-    
     def format_json_for_editing(self, data):
         """格式化JSON用于编辑"""
         return json.dumps(data, ensure_ascii=False, indent=4)
@@ -774,148 +676,41 @@ class CustomTranslationTool:
                 messagebox.showerror("错误", f"JSON格式错误: {str(e)}")
                 return
             
-            # 验证数据结构是否一致
-            if not self.validate_data_structure(self.original_data, edited_data):
+            # 验证数据结构是否一致，并比较保存修改
+            if not self.compare_and_save_changes(edited_data):
                 messagebox.showerror("错误", "数据结构不一致！请确保只修改值内容，不要删除或添加键")
                 return
             
-            # 比较并保存修改
-            self.compare_and_save_changes(edited_data)
-            
             self.status_label.config(text="修改已保存")
-            messagebox.showinfo("成功", "修改已保存到changes.json")
+            messagebox.showinfo("成功", "修改已保存")
             
         except Exception as e:
             error_msg = f"保存失败: {str(e)}"
             print(error_msg)
             messagebox.showerror("错误", error_msg)
     
-    def validate_data_structure(self, original, edited):
-        """验证数据结构是否一致"""
-        if type(original) != type(edited):
-            return False
-        
-        if isinstance(original, dict):
-            if set(original.keys()) != set(edited.keys()):
-                return False
-            
-            for key in original:
-                if not self.validate_data_structure(original[key], edited[key]):
-                    return False
-                    
-        elif isinstance(original, list):
-            if len(original) != len(edited):
-                return False
-            
-            for i in range(len(original)):
-                if not self.validate_data_structure(original[i], edited[i]):
-                    return False
-        
-        return True
-    
     def compare_and_save_changes(self, edited_data):
-        """比较并保存修改"""
+        """比较并保存修改（结构检查和比较在同一次遍历中完成）
+
+        Returns:
+            数据结构与原始数据一致时返回 True
+        """
         relative_path = os.path.relpath(self.current_file, self.workshop_dir) # type: ignore
         
         # 比较修改
-        changes = self.find_changes(self.original_data, edited_data)
+        ok, changes = diff_documents(self.original_data, edited_data, self.original_hashes)
+        if not ok:
+            return False
         
-        if changes:
-            self.changes[relative_path] = changes
-        elif relative_path in self.changes:
-            # 如果没有修改，删除该文件的修改记录
-            del self.changes[relative_path]
-        
-        # 保存到文件
-        with open(self.changes_file, 'w', encoding='utf-8') as f:
-            json.dump(self.changes, f, ensure_ascii=False, indent=4)
-    
-    def find_changes(self, original, edited):
-        """查找修改 - 记录实际修改的值，同时记录id键值对以便识别具体修改内容"""
-        if isinstance(original, dict) and isinstance(edited, dict):
-            changes = {}
-            for key in original:
-                if key in edited:
-                    child_changes = self.find_changes(original[key], edited[key])
-                    if child_changes is not None:
-                        changes[key] = child_changes
-                # 不再记录被删除的键，因为我们不允许删除键
-            
-            # 检查是否有新增的键（不应该发生，因为验证过结构一致）
-            for key in edited:
-                if key not in original:
-                    changes[key] = edited[key]  # 新增的键
-            
-            return changes if changes else None
-            
-        elif isinstance(original, list) and isinstance(edited, list):
-            changes = []
-            has_changes = False
-            
-            for i in range(min(len(original), len(edited))):
-                # 检查当前列表项是否为字典且包含id键
-                if (isinstance(original[i], dict) and isinstance(edited[i], dict) and 
-                    'id' in original[i] and 'id' in edited[i]):
-                    # 对于包含id的字典项，记录修改时同时记录id
-                    child_changes = self.find_changes(original[i], edited[i])
-                    if child_changes is not None:
-                        # 创建一个包含id和修改内容的记录
-                        change_record = {
-                            'id': original[i]['id'],  # 记录原始id
-                            'changes': child_changes
-                        }
-                        changes.append(change_record)
-                        has_changes = True
-                else:
-                    # 对于不包含id的列表项，使用原来的逻辑
-                    child_changes = self.find_changes(original[i], edited[i])
-                    if child_changes is not None:
-                        changes.append(child_changes)
-                        has_changes = True
-            
-            # 处理长度不一致的情况
-            if len(edited) > len(original):
-                # 新增的元素
-                for i in range(len(original), len(edited)):
-                    if isinstance(edited[i], dict) and 'id' in edited[i]:
-                        # 对于包含id的新增字典项，记录id和完整内容
-                        change_record = {
-                            'id': edited[i]['id'],
-                            'changes': edited[i],
-                            'action': 'added'  # 标记为新增
-                        }
-                        changes.append(change_record)
-                    else:
-                        changes.append(edited[i])
-                    has_changes = True
-            elif len(edited) < len(original):
-                # 删除的元素（不应该发生，但我们记录为None）
-                for i in range(len(edited), len(original)):
-                    if isinstance(original[i], dict) and 'id' in original[i]:
-                        # 对于包含id的被删除字典项，记录id
-                        change_record = {
-                            'id': original[i]['id'],
-                            'action': 'deleted'  # 标记为删除
-                        }
-                        changes.append(change_record)
-                    else:
-                        changes.append(None)
-                    has_changes = True
-            
-            return changes if has_changes else None
-            
-        else:
-            # 基本类型 - 只有当值确实改变时才记录
-            return edited if original != edited else None
+        # 只重写该文件的分片，没有修改时删除该文件的修改记录
+        self.changes.set(relative_path, changes)
+        return True
 
     def reset_json_edits(self):
         """撤销所有修改"""
         if self.current_file:
             relative_path = os.path.relpath(self.current_file, self.workshop_dir) # type: ignore
-            if relative_path in self.changes:
-                del self.changes[relative_path]
-                with open(self.changes_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.changes, f, ensure_ascii=False, indent=4)
+            if self.changes.delete(relative_path):
                 self.load_json_file(self.current_file)  # 重新加载原始文件
                 self.status_label.config(text="所有修改已撤销")
                 messagebox.showinfo("成功", "所有修改已撤销")
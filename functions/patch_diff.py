@@ -0,0 +1,137 @@
+"""
+自定义汉化工具保存时的差异计算
+
+原先保存一次要把原始文档和编辑后的文档完整递归两遍：`validate_data_structure` 检查结构，
+`find_changes` 再找出修改。大文件只改了一行也要在 Python 中逐个节点比较两遍。
+
+这里从根往下比较，只沿着有修改的子树递归：
+- 每个子树先用 == 和编辑前的比较（C实现，遇到不同就停止），== 相等时再比较子树序列化结果的哈希确认类型也相同
+  （== 不区分 1、1.0 和 True），相同的子树直接跳过，不同的才往下比较
+- 原始文档的子树哈希在打开文件时算好并记住（`SubtreeHashes`）；编辑后文档一侧不记住，每个比较到的相等子树序列化一次
+- 结构检查（类型、字典的键、列表长度）在同一次比较中完成，相同的子树结构必然一致
+
+所以保存的耗时仍与文档大小成正比：修改所在路径上每一层的每个未修改的兄弟子树都要做一次完整的 == 和一次 marshal.dumps，
+但这些都在C中完成，Python 只递归有修改的路径，不再逐个节点比较两遍。
+
+得到的修改记录与原先的 `find_changes` 完全相同（tests/test_patch_diff.py 中保留原实现用于对照检查）。
+"""
+import marshal
+from typing import Any, Dict, Optional, Tuple
+
+PRIME_DEPTH = 3  # 打开文件时预先计算哈希的层数（根、dataList、其中的每一项）
+
+
+class _StructureMismatch(Exception):
+    """编辑后的文档与原始文档结构不一致"""
+
+
+def _subtree_hash(node) -> int:
+    """子树的哈希
+
+    用 marshal 序列化（C实现，比 json.dumps 快数倍）。1、1.0 和 True 的序列化不同，类型也就计入了哈希；
+    版本 0 不记录对象引用，结果只取决于内容，与对象是否共享无关。
+    """
+    return hash(marshal.dumps(node, 0))
+
+
+class SubtreeHashes:
+    """原始文档中字典/列表子树的哈希，按对象 id 记住（文档在使用期间不能被修改）"""
+
+    def __init__(self, document):
+        self.document = document  # 保持引用，保证记录的 id 不会被其他对象复用
+        self.memo: Dict[int, int] = {}
+
+    def prime(self, node=None, depth: int = 0):
+        """预先算好浅层子树的哈希（打开文件时在后台调用），更深的在第一次比较到时再算"""
+        node = self.document if node is None else node
+        if isinstance(node, (dict, list)) and depth < PRIME_DEPTH:
+            self.of(node)
+            for child in (node.values() if isinstance(node, dict) else node):
+                self.prime(child, depth + 1)
+
+    def of(self, node) -> int:
+        key = id(node)
+        value = self.memo.get(key)
+        if value is None:
+            value = self.memo[key] = _subtree_hash(node)
+        return value
+
+
+def same_value(a, b) -> bool:
+    """两个值是否完全相同（类型也相同，1、1.0 和 True 互不相同）"""
+    if type(a) is not type(b) or a != b:
+        return False
+    if isinstance(a, (dict, list)):
+        return marshal.dumps(a, 0) == marshal.dumps(b, 0)
+    return True
+
+
+def _same(original, edited, original_hashes: SubtreeHashes) -> bool:
+    """两个子树是否完全相同（类型也相同）
+
+    先用 == 比较（C实现，遇到不同就停止），== 不区分 1、1.0 和 True，相等时再比较哈希确认。
+    """
+    if type(original) is not type(edited) or original != edited:
+        return False
+    if isinstance(original, (dict, list)):
+        return original_hashes.of(original) == _subtree_hash(edited)
+    return True
+
+
+def _diff(original, edited, original_hashes: SubtreeHashes):
+    """比较不相同的两个子树，返回修改记录（没有修改时为 None），结构不一致时抛出 _StructureMismatch"""
+    if type(original) is not type(edited):
+        raise _StructureMismatch()
+
+    if isinstance(original, dict):
+        if original.keys() != edited.keys():
+            raise _StructureMismatch()
+        changes = {}
+        for key, value in original.items():
+            edited_value = edited[key]
+            if _same(value, edited_value, original_hashes):
+                continue
+            child_changes = _diff(value, edited_value, original_hashes)
+            if child_changes is not None:
+                changes[key] = child_changes
+        return changes or None
+
+    if isinstance(original, list):
+        if len(original) != len(edited):
+            raise _StructureMismatch()
+        changes = []
+        for item, edited_item in zip(original, edited):
+            if _same(item, edited_item, original_hashes):
+                continue
+            child_changes = _diff(item, edited_item, original_hashes)
+            if child_changes is None:
+                continue
+            if isinstance(item, dict) and 'id' in item:
+                # 对于包含id的字典项，记录修改时同时记录id
+                changes.append({'id': item['id'], 'changes': child_changes})
+            else:
+                changes.append(child_changes)
+        return changes or None
+
+    return edited if original != edited else None
+
+
+def diff_documents(original, edited, original_hashes: Optional[SubtreeHashes] = None) -> Tuple[bool, Any]:
+    """检查编辑后的文档结构并找出修改
+
+    Args:
+        original: 原始文档
+        edited: 编辑后的文档
+        original_hashes: 打开文件时为原始文档算好的哈希，为空时现算
+
+    Returns:
+        (结构是否一致, 修改记录)，没有修改或结构不一致时修改记录为 None
+    """
+    if original_hashes is None or original_hashes.document is not original:
+        original_hashes = SubtreeHashes(original)
+    if _same(original, edited, original_hashes):
+        return True, None
+    try:
+        return True, _diff(original, edited, original_hashes)
+    except _StructureMismatch:
+        return False, None
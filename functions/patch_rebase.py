@@ -0,0 +1,254 @@
+"""
+汉化包更新后自定义修改的变基
+
+LLC 发布新版本时，新的汉化包会直接覆盖 workshop/LLC_zh-CN，而自定义修改仍然原样应用在新文件上。
+有的修改已经失效（目标项在新版本中被删除，按 id 找不到的修改记录会被原样追加到列表中），
+有的已经没有作用（新版本改成了同样的内容），有的与新版本对同一处的改动冲突，过去都无从得知。
+
+覆盖之前用 `rebase_patches` 对照旧汉化包和新汉化包检查一遍修改记录：
+- 内容没变的文件直接跳过；文件中按 id 对照，新旧版本完全相同的项上的修改原样保留，不再逐项检查
+- 只有新版本改动过的项才重新检查其中的每个修改：
+  - 新版本已经是修改后的内容：去掉（无效修改）
+  - 目标键或 id 在新版本中已不存在：去掉（失效修改）
+  - 新版本也改了同一处：保留用户的修改，记为冲突
+- 检查报告保存在 `logs/patch_rebase.json`
+
+默认只生成报告，不改动修改记录：失效的修改可能只是新版本调整了结构，需要用户自己确认。
+明确要求写回时（`persist=True`，命令行中为 `--apply` 并确认），被改写的文件原来的修改记录先归档到
+修改记录目录下的 stale.json，再写回整理后的结果。
+"""
+import os
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from functions.deploy import hash_file
+from functions.patch_diff import same_value
+from functions.patch_store import PatchStore, get_patch_store
+from functions.patches import _is_id_list
+
+PACK_NAME = 'LLC_zh-CN'
+REPORT_PATH = 'logs/patch_rebase.json'
+REPORT_ROWS = 20  # 终端中最多列出的条目数
+
+_MISSING = object()  # 旧版本中没有对应的值
+
+KIND_NAMES = {'noop': '无效', 'stale': '失效', 'conflict': '冲突'}
+
+
+@dataclass
+class RebaseReport:
+    """一次变基的结果"""
+    files_checked: int = 0  # 有修改记录且在新汉化包中的文件
+    files_unchanged: int = 0  # 新旧版本内容相同而跳过的文件
+    files_updated: int = 0  # 修改记录有变化的文件
+    entries_unchanged: int = 0  # 新旧版本相同而原样保留的项
+    entries_checked: int = 0  # 新版本改动过、重新检查的项
+    noop: int = 0
+    stale: int = 0
+    conflict: int = 0
+    details: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add(self, kind: str, relpath: str, path: List[str], detail: str, **values):
+        setattr(self, kind, getattr(self, kind) + 1)
+        self.details.append(dict({'kind': kind, 'file': relpath, 'path': "/".join(path), 'detail': detail}, **values))
+
+    def __str__(self):
+        return (f"检查 {self.files_checked} 个文件（{self.files_unchanged} 个未变化），"
+                f"原样保留 {self.entries_unchanged} 项，重新检查 {self.entries_checked} 项：无效 {self.noop} 处，"
+                f"失效 {self.stale} 处，冲突 {self.conflict} 处")
+
+
+def _rebase_value(old_value, new_value, change, relpath: str, path: List[str], report: RebaseReport) -> bool:
+    """检查一个被替换的值
+
+    Returns:
+        新版本已经是修改后的内容时返回 False（无效修改）
+    """
+    if same_value(new_value, change):
+        report.add('noop', relpath, path, "新版本已是修改后的内容")
+        return False
+    if old_value is not _MISSING and not same_value(old_value, new_value):
+        report.add('conflict', relpath, path, "新版本也修改了这里，保留自定义的修改",
+                   old=old_value, new=new_value, custom=change)
+    return True
+
+
+def _rebase(old, new, changes, relpath: str, path: List[str], report: RebaseReport):
+    """按新版本重新检查修改记录（与 patches._apply 使用相同的匹配规则）
+
+    Returns:
+        新的修改记录，没有需要保留的修改时返回 None
+    """
+    if isinstance(changes, dict) and isinstance(new, dict):
+        result = {}
+        for key, change in changes.items():
+            if key not in new:
+                report.add('stale', relpath, path + [str(key)], "新版本中没有这个键")
+                continue
+            old_value = old.get(key, _MISSING) if isinstance(old, dict) else _MISSING
+            new_value = new[key]
+            if isinstance(new_value, (dict, list)) and isinstance(change, (dict, list)):
+                if old_value is not _MISSING and same_value(old_value, new_value):
+                    result[key] = change
+                    continue
+                child = _rebase(old_value, new_value, change, relpath, path + [str(key)], report)
+                if child is not None:
+                    result[key] = child
+            elif _rebase_value(old_value, new_value, change, relpath, path + [str(key)], report):
+                result[key] = change
+        return result or None
+
+    if isinstance(changes, list) and isinstance(new, list):
+        if _is_id_list(new, changes):
+            return _rebase_id_list(old, new, changes, relpath, path, report)
+
+        # 普通列表按位置修改：不能删掉其中的项，没有作用的修改用空修改占位
+        result = []
+        for i, change in enumerate(changes):
+            if i >= len(new):
+                report.add('stale', relpath, path + [f"[{i}]"], "新版本的列表没有这么长")
+                continue
+            old_value = old[i] if isinstance(old, list) and i < len(old) else _MISSING
+            new_value = new[i]
+            if isinstance(new_value, (dict, list)) and isinstance(change, (dict, list)):
+                if old_value is not _MISSING and same_value(old_value, new_value):
+                    result.append(change)
+                    continue
+                child = _rebase(old_value, new_value, change, relpath, path + [f"[{i}]"], report)
+                result.append(child if child is not None else type(change)())
+            else:
+                _rebase_value(old_value, new_value, change, relpath, path + [f"[{i}]"], report)
+                result.append(change)
+        return result if any(item not in ({}, []) for item in result) else None
+
+    report.add('stale', relpath, path, "新版本中这里的数据类型已改变，修改不会生效")
+    return None
+
+
+def _rebase_id_list(old, new: list, changes: list, relpath: str, path: List[str], report: RebaseReport):
+    old_by_id = {item['id']: item for item in old if isinstance(item, dict) and 'id' in item} if isinstance(old, list) else {}
+    new_by_id = {item['id']: item for item in new if isinstance(item, dict) and 'id' in item}
+
+    result = []
+    for change_item in changes:
+        if not (isinstance(change_item, dict) and 'id' in change_item):
+            result.append(change_item)
+            continue
+        change_id = change_item['id']
+        action = change_item.get('action')
+        item_path = path + [f"id={change_id}"]
+
+        if action == 'deleted':
+            if change_id not in new_by_id:
+                report.add('noop', relpath, item_path, "新版本已删除这一项")
+                continue
+        elif action == 'added':
+            if change_id in new_by_id:
+                if same_value(new_by_id[change_id], change_item.get('changes', change_item)):
+                    report.add('noop', relpath, item_path, "新版本已有相同的一项")
+                    continue
+                report.add('conflict', relpath, item_path, "新版本新增了相同 id 的项，保留自定义的项",
+                           new=new_by_id[change_id], custom=change_item.get('changes', change_item))
+        elif change_id not in new_by_id:
+            report.add('stale', relpath, item_path, "新版本中没有这个 id")
+            continue
+        elif 'changes' in change_item:
+            old_entry = old_by_id.get(change_id, _MISSING)
+            new_entry = new_by_id[change_id]
+            if old_entry is not _MISSING and same_value(old_entry, new_entry):
+                report.entries_unchanged += 1
+            else:
+                report.entries_checked += 1
+                child = _rebase(old_entry, new_entry, change_item['changes'], relpath, item_path, report)
+                if child is None:
+                    continue
+                change_item = dict(change_item, changes=child)
+        result.append(change_item)
+    return result or None
+
+
+def _load_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rebase_patches(old_pack_dir: str, new_pack_dir: str, store: Optional[PatchStore] = None,
+                   persist: bool = False, report_path: Optional[str] = REPORT_PATH) -> RebaseReport:
+    """在新汉化包覆盖旧汉化包之前，按新版本重新检查修改记录
+
+    Args:
+        old_pack_dir: 旧汉化包（workshop/LLC_zh-CN）
+        new_pack_dir: 新下载解压的汉化包
+        store: 修改记录，为空时使用全局实例
+        persist: 是否把结果写回修改记录（原来的修改记录先归档），默认只生成报告
+        report_path: 报告保存位置，为空时不保存
+
+    Returns:
+        RebaseReport
+    """
+    store = store or get_patch_store()
+    report = RebaseReport()
+    for relpath in store.files():
+        if not relpath.startswith(PACK_NAME + '/'):
+            continue
+        sub_path = relpath[len(PACK_NAME) + 1:]
+        old_path = os.path.join(old_pack_dir, sub_path)
+        new_path = os.path.join(new_pack_dir, sub_path)
+        if not os.path.exists(new_path):
+            report.add('stale', relpath, [], "新汉化包中没有这个文件（workshop 中的旧文件会保留，修改仍然应用在旧文件上）")
+            continue
+
+        report.files_checked += 1
+        try:
+            if os.path.exists(old_path) and hash_file(old_path) == hash_file(new_path):
+                report.files_unchanged += 1
+                continue
+            old_data = _load_json(old_path) if os.path.exists(old_path) else _MISSING
+            new_data = _load_json(new_path)
+            changes = store[relpath]
+            rebased = _rebase(old_data, new_data, changes, relpath, [], report)
+        except Exception as e:
+            print(f"检查 {relpath} 的修改记录失败: {e}")
+            continue
+
+        if not same_value(rebased, changes):
+            report.files_updated += 1
+            if persist:
+                try:
+                    store.archive(relpath, changes, "汉化包更新后自动整理")
+                except Exception as e:
+                    # 归档失败时不能改写，否则原来的修改就找不回来了
+                    print(f"归档 {relpath} 的修改记录失败，保持原样: {e}")
+                    continue
+                store.set(relpath, rebased)
+
+    print(f"自定义修改变基{'' if persist else '（只生成报告，未改动修改记录）'}: {report}")
+    for detail in [d for d in report.details if d['kind'] != 'noop'][:REPORT_ROWS]:
+        print(f" - [{KIND_NAMES[detail['kind']]}] {detail['file']} {detail['path']}: {detail['detail']}")
+
+    if report_path:
+        try:
+            os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(report), f, ensure_ascii=False, indent=4)
+            if report.details:
+                print(f"详细报告已保存到 {report_path}")
+        except Exception as e:
+            print(f"保存变基报告失败: {e}")
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 用法: python -m functions.patch_rebase <新汉化包目录> [--apply]
+    # 默认只生成报告；加上 --apply 并确认后才写回（原来的修改记录归档到 stale.json）
+    args = [arg for arg in sys.argv[1:] if arg != '--apply']
+    if not args:
+        print("用法: python -m functions.patch_rebase <新汉化包目录> [--apply]")
+    else:
+        apply = '--apply' in sys.argv
+        if apply and input("将去掉无效和失效的自定义修改（原记录归档到 stale.json），输入 y 确认: ").strip().lower() != 'y':
+            apply = False
+        rebase_patches(os.path.join('workshop', PACK_NAME), args[0], persist=apply)
@@ -0,0 +1,196 @@
+"""
+自定义汉化修改的分片存储
+
+修改记录原先全部保存在 `workshop/changes.json` 中，自定义汉化工具每次保存都要重写整个文件，
+启动器每次启动也要解析整个文件。现在每个被修改的汉化文件单独保存为 `workshop/changes/` 下的一个分片，
+另有一个小的索引 `workshop/changes/index.json` 记录每个文件对应的分片和修改记录的哈希：
+
+- 保存一个文件的修改只重写该文件的分片（以及文件增删时的索引）
+- 启动器只读取索引，需要处理的文件才读取对应的分片；编译结果没变时连分片都不用读
+- 第一次使用时自动把旧的 changes.json 拆分为分片，原文件改名为 changes.json.bak 保留
+- 被自动整理（见 patch_rebase）改写的修改记录，改写前的内容归档在 `workshop/changes/stale.json` 中，不会丢失
+"""
+import os
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from functions.patches import COMPILED_FILE, hash_changes, normalize_relpath
+
+STORE_DIR = 'workshop/changes'
+INDEX_FILE = 'index.json'
+STALE_FILE = 'stale.json'
+LEGACY_FILE = 'workshop/changes.json'
+STORE_VERSION = 1
+RESERVED_NAMES = {INDEX_FILE, STALE_FILE, os.path.basename(COMPILED_FILE)}
+
+
+def _write_json(path: str, data, indent: Optional[int] = 4):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(temp_path, path)
+
+
+class PatchStore:
+    """按文件分片保存的修改记录，可以像 {相对路径: 修改记录} 的字典一样读取（分片用到时才读）"""
+
+    def __init__(self, root: str = STORE_DIR, legacy_file: str = LEGACY_FILE):
+        self.root = root
+        self.legacy_file = legacy_file
+        self.index: Dict[str, dict] = {}  # 相对路径 -> {'shard': 分片文件名, 'hash': 修改记录的哈希}
+        self._loaded: Dict[str, Any] = {}
+        self.load_index()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, INDEX_FILE)
+
+    def load_index(self):
+        if not os.path.exists(self.index_path):
+            self.index = {}
+            if os.path.exists(self.legacy_file):
+                self.migrate()
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f).get('files', {})
+        except Exception as e:
+            print(f"读取修改记录索引失败: {e}")
+            self.index = {}
+        self._loaded = {}
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        _write_json(self.index_path, {'version': STORE_VERSION, 'files': self.index})
+
+    def migrate(self):
+        """把旧的 changes.json 拆分为分片（只在还没有索引时进行一次）"""
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"读取旧的修改记录失败，跳过迁移: {e}")
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        for relpath, changes in (legacy or {}).items():
+            if changes:
+                self._write_shard(normalize_relpath(relpath), changes)
+        self.save_index()
+        os.replace(self.legacy_file, self.legacy_file + '.bak')
+        print(f"已将 {self.legacy_file} 中 {len(self.index)} 个文件的修改记录迁移到 {self.root}")
+
+    @staticmethod
+    def shard_name(relpath: str) -> str:
+        """分片文件名（相对路径转义后的文件名，不同路径不会重名，也不会与索引等文件重名）"""
+        name = quote(relpath, safe='')
+        return '_' + name if name in RESERVED_NAMES or name.startswith('_') else name
+
+    def _write_shard(self, relpath: str, changes):
+        shard = self.shard_name(relpath)
+        _write_json(os.path.join(self.root, shard), changes)
+        self.index[relpath] = {'shard': shard, 'hash': hash_changes(changes)}
+        self._loaded[relpath] = changes
+
+    # ---------- 读取 ----------
+
+    def __contains__(self, relpath) -> bool:
+        return normalize_relpath(relpath) in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.index))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, relpath: str):
+        relpath = normalize_relpath(relpath)
+        if relpath not in self._loaded:
+            entry = self.index[relpath]
+            with open(os.path.join(self.root, entry['shard']), 'r', encoding='utf-8') as f:
+                self._loaded[relpath] = json.load(f)
+        return self._loaded[relpath]
+
+    def get(self, relpath: str, default=None):
+        try:
+            return self[relpath]
+        except KeyError:
+            return default
+        except Exception as e:
+            print(f"读取 {relpath} 的修改记录失败: {e}")
+            return default
+
+    def get_hash(self, relpath: str) -> Optional[str]:
+        """修改记录的哈希（不读取分片）"""
+        entry = self.index.get(normalize_relpath(relpath))
+        return entry['hash'] if entry else None
+
+    def files(self) -> List[str]:
+        return sorted(self.index)
+
+    # ---------- 修改 ----------
+
+    def set(self, relpath: str, changes):
+        """保存一个文件的修改记录，为空时删除"""
+        relpath = normalize_relpath(relpath)
+        if not changes:
+            self.delete(relpath)
+            return
+        added = relpath not in self.index
+        old_hash = self.index[relpath]['hash'] if not added else None
+        os.makedirs(self.root, exist_ok=True)
+        self._write_shard(relpath, changes)
+        # 索引中只有分片名和哈希，内容没变时不用重写
+        if added or self.index[relpath]['hash'] != old_hash:
+            self.save_index()
+
+    def archive(self, relpath: str, changes, reason: str = ""):
+        """把即将被改写的修改记录追加到归档文件（stale.json），需要时可以从中找回"""
+        path = os.path.join(self.root, STALE_FILE)
+        archived = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                archived = json.load(f)
+        archived.setdefault(normalize_relpath(relpath), []).append(
+            {'time': int(time.time()), 'reason': reason, 'changes': changes})
+        os.makedirs(self.root, exist_ok=True)
+        _write_json(path, archived)
+
+    def delete(self, relpath: str) -> bool:
+        """删除一个文件的修改记录
+
+        Returns:
+            原先有修改记录时返回 True
+        """
+        relpath = normalize_relpath(relpath)
+        entry = self.index.pop(relpath, None)
+        self._loaded.pop(relpath, None)
+        if entry is None:
+            return False
+        self.save_index()
+        try:
+            os.remove(os.path.join(self.root, entry['shard']))
+        except OSError:
+            pass
+        return True
+
+
+# 全局修改记录实例
+_patch_store = None
+
+def get_patch_store() -> PatchStore:
+    """获取全局修改记录实例（第一次调用时迁移旧的 changes.json）"""
+    global _patch_store
+    if _patch_store is None:
+        _patch_store = PatchStore()
+    return _patch_store
+
+
+if __name__ == "__main__":
+    store = get_patch_store()
+    print(f"共 {len(store)} 个文件有修改记录")
+    for relpath in store.files():
+        shard_path = os.path.join(store.root, store.index[relpath]['shard'])
+        print(f" - {relpath}: {os.path.getsize(shard_path)} 字节")
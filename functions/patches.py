@@ -0,0 +1,371 @@
+"""
+自定义汉化修改的应用逻辑
+
+修改记录（`workshop/changes/` 下按文件分片保存，见 patch_store）按文件相对路径记录用户在自定义汉化工具中做的修改，
+启动游戏时对部署到游戏目录的汉化文件逐个应用。
+
+带 id 的列表按 id 建一次索引，修改、新增、删除在一趟遍历中完成（线性时间），
+结果与原先逐项扫描的实现完全一致（tests/test_patches.py 中保留原实现用于对照检查）：
+被修改和新增的项按修改记录的顺序排在前面，未修改的原始项按原顺序排在后面。
+
+启动器和自定义汉化工具的预览都通过 `CompiledPatches` 应用修改：每个文件的修改记录对照原始文件
+编译一次，得到一串按路径寻址的操作（列表下标已按 id 解析好），应用时只需依次执行。
+编译结果保存在修改记录目录下的 `compiled.json` 中，以修改记录的哈希和原始文件的大小、修改时间为键，
+二者都没变时下次直接使用。
+"""
+import os
+import copy
+import json
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+COMPILED_FILE = 'workshop/changes/compiled.json'
+COMPILED_VERSION = 1
+
+
+@dataclass
+class PatchStats:
+    """一次应用修改的统计"""
+    modified: int = 0  # 按 id 修改的项
+    added: int = 0  # 新增的项
+    deleted: int = 0  # 删除的项
+    replaced: int = 0  # 直接替换的值
+
+    def __str__(self):
+        return f"修改 {self.modified} 项，新增 {self.added} 项，删除 {self.deleted} 项，替换 {self.replaced} 个值"
+
+
+def _is_id_list(original_data: list, changes: list) -> bool:
+    """是否是按 id 匹配的修改记录（只看第一项，与原实现一致）"""
+    return (len(original_data) > 0 and isinstance(original_data[0], dict) and 'id' in original_data[0] and
+            len(changes) > 0 and isinstance(changes[0], dict) and 'id' in changes[0])
+
+
+def _apply(original_data, changes, stats: PatchStats):
+    if isinstance(original_data, dict) and isinstance(changes, dict):
+        result = {}
+        for key, value in original_data.items():
+            if key not in changes:
+                result[key] = value
+            elif isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
+                result[key] = _apply(value, changes[key], stats)
+            else:
+                result[key] = changes[key]
+                stats.replaced += 1
+        return result
+
+    if isinstance(original_data, list) and isinstance(changes, list):
+        if not _is_id_list(original_data, changes):
+            # 普通列表按位置修改，多出来的修改项忽略
+            result = []
+            for i, item in enumerate(original_data):
+                if i >= len(changes):
+                    result.append(item)
+                elif isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
+                    result.append(_apply(item, changes[i], stats))
+                else:
+                    result.append(changes[i])
+                    stats.replaced += 1
+            return result
+
+        # id 相同的原始项以最后一个为准
+        original_by_id = {item['id']: item for item in original_data if isinstance(item, dict) and 'id' in item}
+        changed_ids = set()
+        result = []
+        for change_item in changes:
+            if not (isinstance(change_item, dict) and 'id' in change_item):
+                continue
+            change_id = change_item['id']
+            changed_ids.add(change_id)
+            action = change_item.get('action')
+
+            if change_id not in original_by_id:
+                # 原始数据中没有的项：新增项取修改内容，其它情况保留修改记录本身
+                result.append(change_item.get('changes', change_item) if action == 'added' else change_item)
+                stats.added += 1
+            elif action == 'deleted':
+                stats.deleted += 1
+            elif action == 'added':
+                result.append(change_item.get('changes', change_item))
+                stats.added += 1
+            elif 'changes' in change_item:
+                result.append(_apply(original_by_id[change_id], change_item['changes'], stats))
+                stats.modified += 1
+            else:
+                result.append(original_by_id[change_id])
+
+        # 未被修改的原始项（没有 id 的项总是保留）
+        for item in original_data:
+            if not (isinstance(item, dict) and 'id' in item) or item['id'] not in changed_ids:
+                result.append(item)
+        return result
+
+    return original_data
+
+
+def apply_changes(original_data, changes):
+    """应用修改记录
+
+    Returns:
+        (修改后的数据, PatchStats)
+    """
+    stats = PatchStats()
+    return _apply(original_data, changes, stats), stats
+
+
+def apply_changes_to_data(original_data, changes):
+    """递归应用修改到数据 - 适配新的修改记录结构（包含id）"""
+    return apply_changes(original_data, changes)[0]
+
+
+# ---------- 编译后的修改 ----------
+#
+# 操作按路径寻址，路径是由字典键和列表下标组成的列表（下标指原始列表中的位置）：
+#   ["set", 路径, 值]             把路径处的值替换为给定的值
+#   ["list", 路径, [元素, ...]]   按给定顺序重建路径处的列表，元素为原始下标或 {"value": 新值}
+# 子项的操作总在所在列表的重建操作之前，所以执行时下标总是指向原始位置。
+
+def _compile(original_data, changes, path: list, ops: list, stats: PatchStats):
+    if isinstance(original_data, dict) and isinstance(changes, dict):
+        for key, value in original_data.items():
+            if key not in changes:
+                continue
+            if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
+                _compile(value, changes[key], path + [key], ops, stats)
+            else:
+                ops.append(["set", path + [key], changes[key]])
+                stats.replaced += 1
+        return
+
+    if not (isinstance(original_data, list) and isinstance(changes, list)):
+        return
+
+    if not _is_id_list(original_data, changes):
+        for i, item in enumerate(original_data[:len(changes)]):
+            if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
+                _compile(item, changes[i], path + [i], ops, stats)
+            else:
+                ops.append(["set", path + [i], changes[i]])
+                stats.replaced += 1
+        return
+
+    index_by_id = {item['id']: i for i, item in enumerate(original_data) if isinstance(item, dict) and 'id' in item}
+    matched = [change_item for change_item in changes
+               if isinstance(change_item, dict) and 'id' in change_item and change_item['id'] in index_by_id
+               and change_item.get('action') not in ('deleted', 'added')]
+    # 同一原始项被引用多次时，各次修改互不影响，只能把修改结果直接写进操作里
+    reference_count: Dict[int, int] = {}
+    for change_item in matched:
+        index = index_by_id[change_item['id']]
+        reference_count[index] = reference_count.get(index, 0) + 1
+
+    changed_ids = set()
+    order: List[Any] = []
+    for change_item in changes:
+        if not (isinstance(change_item, dict) and 'id' in change_item):
+            continue
+        change_id = change_item['id']
+        changed_ids.add(change_id)
+        action = change_item.get('action')
+
+        if change_id not in index_by_id:
+            order.append({"value": change_item.get('changes', change_item) if action == 'added' else change_item})
+            stats.added += 1
+        elif action == 'deleted':
+            stats.deleted += 1
+        elif action == 'added':
+            order.append({"value": change_item.get('changes', change_item)})
+            stats.added += 1
+        elif 'changes' in change_item:
+            index = index_by_id[change_id]
+            if reference_count[index] > 1:
+                order.append({"value": _apply(copy.deepcopy(original_data[index]), change_item['changes'], stats)})
+            else:
+                _compile(original_data[index], change_item['changes'], path + [index], ops, stats)
+                order.append(index)
+            stats.modified += 1
+        else:
+            order.append(index_by_id[change_id])
+
+    order += [i for i, item in enumerate(original_data)
+              if not (isinstance(item, dict) and 'id' in item) or item['id'] not in changed_ids]
+    if order != list(range(len(original_data))):
+        ops.append(["list", path, order])
+
+
+def compile_changes(original_data, changes):
+    """对照原始数据把修改记录编译为操作列表
+
+    Returns:
+        (操作列表, PatchStats)
+    """
+    ops = []
+    stats = PatchStats()
+    _compile(original_data, changes, [], ops, stats)
+    return ops, stats
+
+
+def _fresh(value):
+    """操作中的值可能被后续的处理原地修改，每次应用都使用副本"""
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def run_ops(data, ops: list):
+    """依次执行编译后的操作（原地修改 data）
+
+    Returns:
+        修改后的数据
+    """
+    for kind, path, argument in ops:
+        target = data
+        for key in path[:-1]:
+            target = target[key]
+        if kind == "set":
+            target[path[-1]] = _fresh(argument)
+        elif kind == "list":
+            items = target[path[-1]] if path else target
+            items[:] = [items[element] if isinstance(element, int) else _fresh(element["value"]) for element in argument]
+    return data
+
+
+def hash_changes(changes) -> str:
+    """修改记录的哈希（分片索引和编译结果都以它判断修改记录是否变化）"""
+    encoded = json.dumps(changes, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def normalize_relpath(relpath: str) -> str:
+    """统一相对路径的写法（自定义汉化工具在Windows上记录的是反斜杠路径）"""
+    return os.path.normpath(relpath.replace('\\', '/')).replace('\\', '/')
+
+
+class CompiledPatches:
+    """changes.json 中各文件修改记录的编译结果（磁盘缓存）"""
+
+    def __init__(self, compiled_path: str = COMPILED_FILE):
+        self.compiled_path = compiled_path
+        self.files: Dict[str, dict] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.compiled_path):
+                with open(self.compiled_path, 'r', encoding='utf-8') as f:
+                    compiled = json.load(f)
+                if compiled.get('version') == COMPILED_VERSION:
+                    self.files = compiled.get('files', {})
+        except Exception as e:
+            print(f"读取编译后的修改记录失败: {e}")
+            self.files = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.compiled_path) or '.', exist_ok=True)
+            temp_path = self.compiled_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': COMPILED_VERSION, 'files': self.files}, f, ensure_ascii=False)
+            os.replace(temp_path, self.compiled_path)
+            self.dirty = False
+        except Exception as e:
+            print(f"保存编译后的修改记录失败: {e}")
+
+    def lookup(self, relpath: str, source_path: str, changes_hash: Optional[str]) -> Optional[dict]:
+        """修改记录（以哈希表示）和原始文件都没变时返回上次的编译结果，否则返回 None"""
+        if changes_hash is None:
+            return None
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        entry = self.files.get(normalize_relpath(relpath))
+        if entry and entry.get('key') == {'changes': changes_hash, 'source': [stat.st_size, stat.st_mtime_ns]}:
+            return entry
+        return None
+
+    def get(self, relpath: str, source_path: str, changes, original_data=None) -> Optional[dict]:
+        """获取一个文件的编译结果，修改记录或原始文件变了时重新编译
+
+        Args:
+            relpath: 文件相对于 workshop 的路径
+            source_path: 原始文件（应用修改之前的文件）
+            changes: 该文件的修改记录
+            original_data: 已读取的原始数据，为空时从 source_path 读取
+
+        Returns:
+            {'ops': 操作列表, 'stats': 统计}，原始文件无法读取时返回 None
+        """
+        changes_hash = hash_changes(changes)
+        entry = self.lookup(relpath, source_path, changes_hash)
+        if entry is not None:
+            return entry
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+
+        if original_data is None:
+            with open(source_path, 'r', encoding='utf-8') as f:
+                original_data = json.load(f)
+        ops, stats = compile_changes(original_data, changes)
+        entry = {'key': {'changes': changes_hash, 'source': [stat.st_size, stat.st_mtime_ns]},
+                 'ops': ops, 'stats': asdict(stats)}
+        self.files[normalize_relpath(relpath)] = entry
+        self.dirty = True
+        return entry
+
+    def prune(self, relpaths):
+        """删除不再有修改记录的文件的编译结果"""
+        keep = {normalize_relpath(relpath) for relpath in relpaths}
+        for relpath in list(self.files):
+            if relpath not in keep:
+                del self.files[relpath]
+                self.dirty = True
+
+    def apply(self, relpath: str, source_path: str, original_data, changes, in_place: bool = False):
+        """对已读取的原始数据应用修改
+
+        Args:
+            in_place: 为 False 时不修改 original_data，返回修改后的副本
+
+        Returns:
+            (修改后的数据, PatchStats)
+        """
+        entry = self.get(relpath, source_path, changes, original_data)
+        if entry is None:
+            return apply_changes(original_data, changes)
+        data = original_data if in_place else copy.deepcopy(original_data)
+        return run_ops(data, entry['ops']), PatchStats(**entry['stats'])
+
+
+# 全局编译结果实例
+_compiled_patches = None
+
+def get_compiled_patches() -> CompiledPatches:
+    """获取全局编译结果实例"""
+    global _compiled_patches
+    if _compiled_patches is None:
+        _compiled_patches = CompiledPatches()
+    return _compiled_patches
+
+
+if __name__ == "__main__":
+    import time
+
+    # 对 workshop 中的汉化文件应用本地的修改记录，显示统计和耗时
+    from functions.patch_store import get_patch_store
+    store = get_patch_store()
+    for relpath in store.files():
+        changes = store.get(relpath)
+        path = os.path.join('workshop', relpath)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            original = json.load(f)
+        start = time.perf_counter()
+        _, stats = apply_changes(original, changes)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{relpath}: {stats}，{elapsed:.1f} ms")
@@ -0,0 +1,193 @@
+"""
+启动耗时分析
+
+在下载、解压、复制、汉化处理、字体复制、启动mod加载器等阶段外面包一层 `span("阶段名")`，
+记录每个阶段的开始时间和耗时（可以嵌套，多线程、多进程中的阶段分别记录在各自的线程/进程下）。
+启动结束时导出为 Chrome trace 格式的 `logs/launch_trace.json`（可以在 chrome://tracing 或 Perfetto 中打开），
+并在终端输出一张按阶段汇总的耗时表。
+
+启动器最先导入本模块，导入时间近似为进程启动时间。到达启动画面（启动器模式下为第一个处理阶段）时
+用 `check_startup_budget` 检查冷启动耗时是否超出预算、PIL / pymysql 等较重的模块是否被提前导入。
+
+用法:
+    from functions.profiler import span
+    with span("汉化处理", files=120):
+        ...
+"""
+import os
+import sys
+import json
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+TRACE_PATH = 'logs/launch_trace.json'
+SUMMARY_ROWS = 20  # 汇总表最多显示的行数
+STARTUP_BUDGET_MS = 500  # 冷启动到启动画面（或启动器模式第一个处理阶段）的耗时预算
+DEFERRED_MODULES = ('PIL', 'pymysql')  # 不应在启动画面之前导入的模块
+
+_imported_ns = time.perf_counter_ns()
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按终端显示宽度补齐（中文字符占两格）"""
+    display = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    padding = " " * max(0, width - display)
+    return padding + text if right else text + padding
+
+
+class Profiler:
+    """以 Chrome trace 的完整事件（ph = "X"）记录各阶段的耗时"""
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.pid = os.getpid()
+        self.start_ns = _imported_ns
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 每个线程当前的嵌套深度
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """记录一个阶段，args 会显示在 trace 的详情中"""
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self._local.depth = depth
+            event = {
+                'name': name,
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': (end - start) / 1000,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': dict(args, depth=depth),
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def take_events(self) -> List[dict]:
+        """取出已记录的事件（子进程把事件交给主进程合并时使用）"""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def merge(self, events: List[dict]):
+        """合并子进程中记录的事件"""
+        with self._lock:
+            self.events.extend(events)
+
+    def export(self, path: str = TRACE_PATH) -> bool:
+        """导出为 Chrome trace 格式"""
+        with self._lock:
+            events = list(self.events)
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                     'args': {'name': 'FaustLauncher' if pid == self.pid else f'汉化处理子进程 {pid}'}}
+                    for pid in sorted({e['pid'] for e in events})]
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"导出启动耗时记录失败: {e}")
+            return False
+
+    def summary(self, rows: int = SUMMARY_ROWS) -> str:
+        """按阶段名汇总的耗时表（次数、总耗时、占启动总时长的比例、单次最长）"""
+        with self._lock:
+            events = list(self.events)
+        if not events:
+            return "没有记录到启动阶段"
+
+        total_ms = (time.perf_counter_ns() - self.start_ns) / 1e6
+        stats: Dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0, 99])  # 次数, 总耗时, 最长, 最浅的嵌套深度
+        for event in events:
+            if event['ph'] != 'X':
+                continue
+            record = stats[event['name']]
+            duration = event['dur'] / 1000
+            record[0] += 1
+            record[1] += duration
+            record[2] = max(record[2], duration)
+            record[3] = min(record[3], event['args'].get('depth', 0))
+
+        ordered = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [_pad('阶段', 28) + _pad('次数', 6, True) + _pad('总耗时(ms)', 12, True) +
+                 _pad('占比', 8, True) + _pad('最长(ms)', 12, True), "-" * 66]
+        for name, (count, total, longest, depth) in ordered[:rows]:
+            label = "  " * min(depth, 3) + name
+            lines.append(f"{_pad(label, 28)}{count:>6}{total:>12.1f}{total / total_ms * 100:>7.1f}%{longest:>12.1f}")
+        if len(ordered) > rows:
+            lines.append(f"... 另有 {len(ordered) - rows} 个阶段，详见 {TRACE_PATH}")
+        lines.append(f"启动总耗时: {total_ms:.1f} ms（多线程/多进程的阶段会重叠，占比之和可能超过 100%）")
+        return "\n".join(lines)
+
+    def finish(self, path: str = TRACE_PATH):
+        """启动结束时导出记录并输出汇总表"""
+        if self.export(path):
+            print(f"启动耗时记录已保存到 {path}")
+        print(self.summary())
+
+
+# 全局耗时记录实例
+_profiler = None
+
+def get_profiler() -> Profiler:
+    """获取全局耗时记录实例"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
+
+
+def span(name: str, **args):
+    """在全局耗时记录中记录一个阶段"""
+    return get_profiler().span(name, **args)
+
+
+def check_startup_budget(stage: str, budget_ms: float = STARTUP_BUDGET_MS) -> bool:
+    """检查冷启动到达 stage 时的耗时和已导入的模块，并记入 trace
+
+    Returns:
+        未超出预算且没有提前导入较重的模块时返回 True
+    """
+    profiler = get_profiler()
+    elapsed_ms = (time.perf_counter_ns() - profiler.start_ns) / 1e6
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    with profiler._lock:
+        profiler.events.append({
+            'name': f"到达{stage}", 'ph': 'i', 's': 'p',
+            'ts': time.perf_counter_ns() / 1000, 'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': {'elapsed_ms': round(elapsed_ms, 1), 'modules': len(sys.modules), 'deferred_loaded': loaded},
+        })
+
+    if loaded:
+        print(f"⚠️ {stage}之前已导入 {', '.join(loaded)}，应改为用到时再导入")
+    if elapsed_ms > budget_ms:
+        print(f"⚠️ 冷启动到{stage}用时 {elapsed_ms:.0f} ms，超出预算 {budget_ms:.0f} ms")
+    else:
+        print(f"冷启动到{stage}用时 {elapsed_ms:.0f} ms（预算 {budget_ms:.0f} ms，已导入 {len(sys.modules)} 个模块）")
+    return not loaded and elapsed_ms <= budget_ms
+
+
+if __name__ == "__main__":
+    with span("演示"):
+        for i in range(3):
+            with span("子阶段", index=i):
+                time.sleep(0.01)
+
+        def worker():
+            with span("线程中的阶段"):
+                time.sleep(0.02)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    get_profiler().finish()
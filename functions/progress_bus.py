@@ -0,0 +1,173 @@
+"""
+进度事件总线
+
+工作线程只负责发布进度（往双端队列里追加事件，不加锁也不碰Tk），
+Tk主线程通过 `after()` 以固定帧率取出事件、更新各通道的状态，
+用最近一段时间窗口内的字节数计算速度，再通知订阅者刷新界面。
+
+通道名按 "分类/名称" 组织，例如 "download/零协会汉化包"、"translate"，
+订阅时可以只关注某个前缀下的通道。
+"""
+import time
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+DEFAULT_FPS = 30
+SPEED_WINDOW = 2.0  # 速度计算的时间窗口（秒）
+
+
+@dataclass
+class ChannelState:
+    """单个通道的进度状态（只在Tk主线程中读写）"""
+    done: int = 0
+    total: int = 0
+    speed: float = 0.0  # 字节/秒（或条目/秒）
+    message: str = ""
+    status: str = ""
+    samples: deque = field(default_factory=deque)  # 最近的 (时间, 已完成量)
+
+    @property
+    def percent(self) -> float:
+        return min(self.done / self.total * 100, 100) if self.total > 0 else 0.0
+
+
+class ProgressBus:
+    """工作线程与Tk界面之间的进度总线"""
+
+    def __init__(self, fps: int = DEFAULT_FPS, window: float = SPEED_WINDOW):
+        self.interval = max(1, int(1000 / fps))
+        self.window = window
+        self.channels: Dict[str, ChannelState] = {}
+        self._events = deque()  # deque 的 append/popleft 是线程安全的
+        self._subscribers = {}
+        self._tokens = itertools.count()
+        self._roots: Dict[int, object] = {}  # 正在运行刷新循环的Tk根窗口
+
+    # ---------- 工作线程调用 ----------
+
+    def publish(self, channel: str, done: Optional[int] = None, total: Optional[int] = None,
+                message: Optional[str] = None, status: Optional[str] = None):
+        """发布进度，None 表示该字段不变"""
+        self._events.append((channel, done, total, message, status, time.time()))
+
+    def reset(self, channel: str, total: int = 0, status: str = ""):
+        """重新开始一个通道（清空进度和速度采样）"""
+        self._events.append((channel, None, None, None, None, None))
+        self.publish(channel, done=0, total=total, message="", status=status)
+
+    # ---------- Tk主线程调用 ----------
+
+    def subscribe(self, callback: Callable[[Dict[str, ChannelState]], None], prefix: str = "") -> int:
+        """订阅通道变化，回调参数为前缀匹配的 {通道名: 状态}
+
+        Returns:
+            用于取消订阅的标识
+        """
+        token = next(self._tokens)
+        self._subscribers[token] = (prefix, callback)
+        return token
+
+    def unsubscribe(self, token: int):
+        self._subscribers.pop(token, None)
+
+    def attach(self, widget):
+        """在给定控件所在的Tk主循环中开始定时刷新
+
+        刷新循环绑定在控件的根窗口（tk.Tk）上，每个根窗口只有一个循环；
+        临时的 Toplevel 关闭后循环继续运行，只有根窗口销毁时才停止。
+        """
+        root = widget._root()
+        if id(root) in self._roots:
+            return
+        self._roots[id(root)] = root
+        root.after(self.interval, self._tick, root)
+
+    def _tick(self, root):
+        self.pump()
+        try:
+            root.after(self.interval, self._tick, root)
+        except Exception:
+            # 根窗口已销毁，只停止这个根窗口的刷新循环
+            self._roots.pop(id(root), None)
+
+    def pump(self):
+        """取出所有待处理事件并通知订阅者（无Tk时也可以手动调用）"""
+        changed = set()
+        while True:
+            try:
+                channel, done, total, message, status, timestamp = self._events.popleft()
+            except IndexError:
+                break
+
+            if timestamp is None:
+                self.channels.pop(channel, None)
+                continue
+            state = self.channels.setdefault(channel, ChannelState())
+            if total is not None:
+                state.total = total
+            if message is not None:
+                state.message = message
+            if status is not None:
+                state.status = status
+            if done is not None:
+                state.done = done
+                state.samples.append((timestamp, done))
+            changed.add(channel)
+
+        now = time.time()
+        for channel, state in self.channels.items():
+            # 只保留时间窗口内的采样，用首尾差值计算平均速度
+            while len(state.samples) > 1 and now - state.samples[0][0] > self.window:
+                state.samples.popleft()
+            if len(state.samples) > 1:
+                (first_time, first_done), (last_time, last_done) = state.samples[0], state.samples[-1]
+                speed = (last_done - first_done) / max(now - first_time, last_time - first_time, 1e-6)
+            else:
+                speed = 0.0
+            if speed != state.speed:
+                state.speed = speed
+                changed.add(channel)
+
+        if not changed:
+            return
+        for prefix, callback in list(self._subscribers.values()):
+            if any(channel.startswith(prefix) for channel in changed):
+                try:
+                    callback({name: state for name, state in self.channels.items() if name.startswith(prefix)})
+                except Exception as e:
+                    # 订阅者的窗口可能已经关闭，不影响其它订阅者
+                    print(f"刷新进度显示时出错: {e}")
+
+
+# 全局进度总线实例
+_progress_bus = None
+
+def get_progress_bus() -> ProgressBus:
+    """获取全局进度总线实例"""
+    global _progress_bus
+    if _progress_bus is None:
+        _progress_bus = ProgressBus()
+    return _progress_bus
+
+
+if __name__ == "__main__":
+    import threading
+    import tkinter as tk
+
+    root = tk.Tk()
+    label = tk.Label(root, width=40)
+    label.pack(padx=20, pady=20)
+    bus = get_progress_bus()
+    bus.subscribe(lambda states: label.config(
+        text=f"{states['demo'].percent:.1f}%  {states['demo'].speed / 1024:.1f} KB/s"), "demo")
+    bus.attach(root)
+
+    def worker():
+        for i in range(0, 10 * 1024 * 1024 + 1, 64 * 1024):
+            bus.publish("demo", done=i, total=10 * 1024 * 1024)
+            time.sleep(0.01)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.mainloop()
@@ -2,6 +2,7 @@ import os
 import json
 import concurrent.futures
 from functions.translate.ai_translate import AITranslator
+from functions.deploy import replace_write_json
 
 import unicodedata
 
@@ -112,8 +113,8 @@ class AutoTranslator:
                                             item[sub_key] = self._translate_value(item[sub_key])
             
             # 保存目标文件
-            with open(target_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # workshop 中的文件可能与游戏目录中的文件是同一份数据（硬链接），写新文件再替换
+            replace_write_json(target_file, data, indent=2)
             
             return True
         except Exception as e:
@@ -4,6 +4,7 @@ import threading
 from pathlib import Path
 from functions.translate.auto_translate import auto_translate
 from functions.window_ulits import center_window
+from functions.progress_bus import get_progress_bus
 import datetime
 
 class AutoTranslateGUI:
@@ -43,6 +44,12 @@ class AutoTranslateGUI:
         
         self.create_widgets()
         self.is_running = False
+        
+        # 翻译线程通过进度总线发布进度，界面按固定帧率刷新
+        self.bus = get_progress_bus()
+        self.bus_token = self.bus.subscribe(self.on_progress_events, "translate")
+        self.bus.attach(self.root)
+        self.root.bind('<Destroy>', lambda e: self.bus.unsubscribe(self.bus_token) if e.widget is self.root else None)
     
     def configure_styles(self):
         """配置现代化样式"""
@@ -280,7 +287,12 @@ EGOgift.json
             status_text += f" ({current}/{total})"
         
         self.progress_var.set(status_text)
-        self.root.update_idletasks()
+    
+    def on_progress_events(self, states):
+        """由进度总线回调，刷新翻译进度"""
+        state = states.get("translate")
+        if state and self.is_running:
+            self.update_progress(state.done, state.total, state.message)
     
     def start_translation(self):
         """开始翻译"""
@@ -310,9 +322,11 @@ EGOgift.json
             blacklist_files = self.get_blacklist_files()
             is_skill = False
             
+            self.bus.reset("translate")
+
             def progress_callback(current, total, message):
                 if self.is_running:
-                    self.root.after(0, lambda: self.update_progress(current, total, message))
+                    self.bus.publish("translate", done=current, total=total, message=message)
 
             mode = self.get_translation_mode()
             if mode in ["仅主线剧情", "全部"]:
@@ -1,26 +1,18 @@
+# 最先导入，冷启动耗时从这里开始计算
+from functions.profiler import check_startup_budget, get_profiler, span
 import tkinter as tk
 from tkinter import ttk, font
 import os
 import random
 import sys
 import json
-from PIL import Image, ImageTk, ImageFilter
-import pymysql
-from subprocess import Popen
-from functions.pages.settings_page import init_settings_page
 from functions.settings_manager import get_settings_manager
 from functions.pages.loading_info import create_simple_splash
 from functions.window_ulits import center_window
-from functions.dowloads.sql_manager import check_new_version, notify_new_version
-from functions.sound_ulits import play_sound
 
-# 添加自定义汉化工具导入
-try:
-    sys.path.append('functions')
-    from functions.pages.custom_translation import open_custom_translation_tool
-except ImportError as e:
-    print(f"导入自定义汉化工具失败: {e}")
-    open_custom_translation_tool = None
+# PIL、pymysql、下载模块、设置页、自定义汉化工具等较重的模块都在第一次用到时才导入，
+# 保证启动画面（启动器模式下为第一个处理阶段）之前不加载它们，见 check_startup_budget
+sys.path.append('functions')
 
 dowloading = False
 root: tk.Tk = None # type: ignore
@@ -246,6 +238,7 @@ class FaustLauncherApp:
     def init_settings_page(self):
         """初始化设置页面"""
         try:
+            from functions.pages.settings_page import init_settings_page
             self.settings_page = init_settings_page(self.settings_frame, self.bg_color, self.lighten_bg_color)
         except Exception as e:
             print(f"初始化设置页面失败: {e}")
@@ -265,9 +258,19 @@ class FaustLauncherApp:
     def init_tools_page(self):
         """初始化工具页内容"""
         global settings_manager
-        from functions.fancy.dialog_colorful import test_color_gradient_gui
-        from functions.pages.select_font import select_font_gui
-        from functions.translate.auto_translate_gui import show_auto_translate_gui
+
+        # 各工具在点击时才导入
+        def test_color_gradient_gui(app):
+            from functions.fancy.dialog_colorful import test_color_gradient_gui
+            test_color_gradient_gui(app)
+
+        def select_font_gui(app):
+            from functions.pages.select_font import select_font_gui
+            select_font_gui(app)
+
+        def show_auto_translate_gui(app, source_path, target_path):
+            from functions.translate.auto_translate_gui import show_auto_translate_gui
+            show_auto_translate_gui(app, source_path, target_path)
         
         # 创建工具区域
         tools_container = tk.Frame(self.tools_frame, bg=self.bg_color)
@@ -345,6 +348,11 @@ class FaustLauncherApp:
 
     def open_custom_translation_tool(self):
         """打开自定义汉化工具"""
+        try:
+            from functions.pages.custom_translation import open_custom_translation_tool
+        except ImportError as e:
+            print(f"导入自定义汉化工具失败: {e}")
+            open_custom_translation_tool = None
         if open_custom_translation_tool:
             try:
                 open_custom_translation_tool(self)
@@ -409,6 +417,7 @@ class FaustLauncherApp:
                 # print(f"加载背景图片: {bg_path}")
                 
                 # 打开图片
+                from PIL import Image, ImageTk, ImageFilter
                 image = Image.open(bg_path)
                 
                 # 获取窗口大小
@@ -461,6 +470,13 @@ class FaustLauncherApp:
             # 使用默认背景颜色
             self.bg_canvas.configure(bg=bg_color)
     
+    def schedule_prefetch(self):
+        """定时检查并预下载汉化包（前台开始下载后不再启动）"""
+        from functions.dowloads.prefetch import get_prefetch_interval_ms, start_prefetch
+        if not dowloading:
+            start_prefetch()
+            self.root.after(get_prefetch_interval_ms(), self.schedule_prefetch)
+
     def start_background_rotation(self):
         """开始背景轮换"""
         # 延迟启动，确保窗口已显示
@@ -849,10 +865,14 @@ class FaustLauncherApp:
     def update_translation(self):
         """更新汉化"""
         from threading import Thread
+        from functions.dowloads.net_cache import force_refresh
+        # 手动更新时不使用快速启动的缓存结果
+        force_refresh()
         Thread(target=handle_dowload).start()
     
     def show_help(self):
         """显示帮助信息"""
+        from subprocess import Popen
         Popen(["notepad", "README.md"], shell=True)
     
     def open_feature(self, feature):
@@ -905,6 +925,7 @@ class FaustLauncherApp:
 
     def check_settings(self):
         global config_path, settings_manager
+        from functions.dowloads.sql_manager import check_new_version, notify_new_version
         version_info = settings_manager.get_setting("version_info")
 
         if not settings_manager.get_setting("game_path"):
@@ -940,6 +961,10 @@ class FaustLauncherApp:
             from threading import Thread
             # 有命令行参数，进入命令行模式
             Thread(target=handle_dowload).start()
+        else:
+            # 窗口打开期间在后台预下载新的汉化包
+            from functions.dowloads.prefetch import PREFETCH_DELAY_MS
+            self.root.after(PREFETCH_DELAY_MS, self.schedule_prefetch)
 
         if not os.path.exists("Font/Context/ChineseFont.ttf"):
             print("错误: 未找到字体文件 Font/Context/ChineseFont.ttf\n请尝试手动添加或者使用汉化更新修复")
@@ -1002,6 +1027,7 @@ if %errorlevel% equ 0 (
             with open(batch_file, 'w', encoding='gbk') as f:
                 f.write(batch_content)
             
+            from subprocess import Popen
             Popen(f'powershell Start-Process "{batch_file}" -Verb runAs', shell=True)
 
         except Exception as e:
@@ -1011,13 +1037,14 @@ def handle_dowload(need_run_game=False):
     """命令行模式：执行下载翻译、下载气泡、载入mod并启动游戏"""
     
     global dowloading, root, config_path
-    import threading
-    from time import sleep
 
     if dowloading:
         return
     dowloading = True
 
+    # 后台预下载让出带宽，已下载的部分留到下次续传
+    from functions.dowloads.prefetch import stop_prefetch
+    stop_prefetch()
     print("汉化下载中...")
     
     # 导入并执行各个功能模块
@@ -1031,46 +1058,13 @@ def handle_dowload(need_run_game=False):
         sys.path.append('functions')
         from functions.dowloads.zeroasso_dow import main_gui as download_translation
         gui = download_translation(root, dowload_path) # type: ignore
-        dt = threading.Thread(target=gui.root.mainloop)
 
-        while gui.is_downloading:
-            sleep(1)
-        
-        del dt
+        # 下载线程结束时立即继续，不再轮询
+        gui.wait()
         print("翻译下载完成")
-        
-        # 2. 下载气泡
-        print("开始下载气泡...")
-        from functions.dowloads.bubble_dow import main as download_bubble
-        download_bubble(dowload_path) # type: ignore
-        print("气泡下载完成")
-
-        # 检查是否需要更新汉化
-        from functions.dowloads.dow_ulits import check_need_up_translate
-        need_update = check_need_up_translate()
-
-        # 把 'workshop\LimbusCompany_Data\Lang\LLC_zh-CN' 复制到游戏目录下的 'workshop' 文件夹 并删除 LimbusCompany_Data 文件夹
-        import shutil
-
-        if need_update:
-            print("检测到新的汉化版本，准备更新汉化文件...")
-            if os.path.exists(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN'): # type: ignore
-                shutil.copytree(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN', workshop_path, dirs_exist_ok=True) # type: ignore
-                print("文件夹复制完成")
-            else:
-                print("错误: 未找到 workshop 下的 LLC_zh-CN 文件夹")
-        else:
-            print("当前汉化已是最新版本，无需更新")
-
-        # 删除 LimbusCompany_Data 文件夹
-        print("开始删除 LimbusCompany_Data 文件夹...")
-        shutil.rmtree(os.path.join(dowload_path, 'LimbusCompany_Data'), ignore_errors=True) # type: ignore
-        print("LimbusCompany_Data 文件夹删除完成")
-
-        if not os.path.exists('Font/Context/ChineseFont.ttf'):
-            shutil.copytree('Font', 'workshop/LLC_zh-CN', dirs_exist_ok=True) # type: ignore
-            print("字体文件复制完成")
 
+        with span("安装下载内容"):
+            install_downloads(dowload_path, workshop_path)
         print("汉化下载及处理全部完成！")
 
         if len(sys.argv) > 1 or need_run_game:
@@ -1093,212 +1087,192 @@ def handle_dowload(need_run_game=False):
     # 关闭窗口
     os._exit(0)
 
-def run_game():
-    global config_path, settings_manager
-    # 复制 workshop 下的 LLC_zh-CN 文件夹到游戏目录下的 LimbusCompany_Data/Lang 文件夹 下
+def install_downloads(dowload_path='workshop', workshop_path='workshop/LLC_zh-CN'):
+    """下载翻译之后的步骤：下载气泡，把新解压的汉化包合并到 workshop 中"""
+    # 2. 下载气泡
+    print("开始下载气泡...")
+    from functions.dowloads.bubble_dow import main as download_bubble
+    with span("下载气泡"):
+        download_bubble(dowload_path) # type: ignore
+    print("气泡下载完成")
+
+    # 检查是否需要更新汉化
+    from functions.dowloads.dow_ulits import check_need_up_translate
+    need_update = check_need_up_translate()
+
+    # 把 'workshop\LimbusCompany_Data\Lang\LLC_zh-CN' 复制到游戏目录下的 'workshop' 文件夹 并删除 LimbusCompany_Data 文件夹
     import shutil
-    # 尝试删除原有的 LimbusCompany_Data/Lang/LLC_zh-CN 文件夹
-    if os.path.exists(os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN')): # type: ignore
-        print("删除原有的 LimbusCompany_Data/Lang/LLC_zh-CN 文件夹")
-        shutil.rmtree(os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN'), ignore_errors=True) # type: ignore
+    from functions.deploy import replace_copy
+
+    if need_update:
+        print("检测到新的汉化版本，准备更新汉化文件...")
+        if os.path.exists(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN'): # type: ignore
+            # 覆盖之前对照新旧汉化包检查自定义修改，报告无效、失效和冲突的修改（只报告，不改动修改记录）
+            from functions.patch_rebase import rebase_patches
+            with span("变基自定义修改"):
+                try:
+                    rebase_patches(workshop_path, dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN', persist=False) # type: ignore
+                except Exception as e:
+                    print(f"检查自定义修改失败: {e}")
+            # 部署到游戏目录的文件可能是这里的硬链接，必须替换文件而不是原地改写
+            with span("合并汉化包到workshop"):
+                shutil.copytree(dowload_path + '/LimbusCompany_Data/Lang/LLC_zh-CN', workshop_path, dirs_exist_ok=True, copy_function=replace_copy) # type: ignore
+            print("文件夹复制完成")
+        else:
+            print("错误: 未找到 workshop 下的 LLC_zh-CN 文件夹")
+    else:
+        print("当前汉化已是最新版本，无需更新")
 
-    print(f"开始复制 workshop 下的 LLC_zh-CN 文件夹到游戏目录下的 {config_path}")
-    try:
-        shutil.copytree('workshop/LLC_zh-CN', os.path.join(config_path, 'LimbusCompany_Data/Lang/LLC_zh-CN'), dirs_exist_ok=True) # type: ignore
-        print("汉化复制完成")
-    except Exception as e:
-        print(f"效用汉化复制文件夹时出错: {e}")
+    # 删除 LimbusCompany_Data 文件夹
+    print("开始删除 LimbusCompany_Data 文件夹...")
+    with span("清理解压目录"):
+        shutil.rmtree(os.path.join(dowload_path, 'LimbusCompany_Data'), ignore_errors=True) # type: ignore
+    print("LimbusCompany_Data 文件夹删除完成")
+
+    if not os.path.exists('Font/Context/ChineseFont.ttf'):
+        with span("复制字体"):
+            shutil.copytree('Font', workshop_path, dirs_exist_ok=True, copy_function=replace_copy) # type: ignore
+        print("字体文件复制完成")
+
+def run_launcher():
+    """启动器模式（Steam 通过 launcher.vbs 启动）：不创建主界面，更新汉化 → 处理并部署 → 载入mod并启动游戏
+
+    只有真正需要下载时才显示一个小进度窗口。未配置游戏路径或出错时打开完整的启动器界面。
+    """
+    global config_path, dowloading
+    config_path = settings_manager.get_setting("game_path") # type: ignore
+    if not config_path:
+        print("错误: 未配置游戏路径，打开启动器界面")
+        main()
         return
 
-    # 根据 workshop/changes.json 更新 LimbusCompany_Data/Lang/LLC_zh-CN 里的数据
-    print("开始应用自定义汉化修改...")
+    dowloading = True
+    print("启动器模式: 开始检查汉化更新...")
     try:
-        # 检查changes.json文件是否存在
-        changes_file = "workshop/changes.json"
-        if os.path.exists(changes_file):
-            # 加载changes.json
-            with open(changes_file, 'r', encoding='utf-8') as f:
-                changes_data = json.load(f)
-            
-            if changes_data:
-                print(f"找到 {len(changes_data)} 个文件的修改记录")
-                
-                # 遍历changes.json中的每个文件修改记录
-                for relative_path, file_changes in changes_data.items():
-                    # 构建完整的文件路径
-                    workshop_file_path = os.path.join("workshop", relative_path)
-                    game_file_path = os.path.join(config_path, "LimbusCompany_Data", "Lang", relative_path) # type: ignore
-                    
-                    # 检查游戏目录中的文件是否存在
-                    if os.path.exists(game_file_path):
-                        print(f"应用修改到: {relative_path}")
-                        
-                        # 读取游戏目录中的原始文件
-                        with open(game_file_path, 'r', encoding='utf-8') as f:
-                            original_data = json.load(f)
-                        
-                        # 应用修改
-                        modified_data = apply_changes_to_data(original_data, file_changes)
-                        
-                        # 保存修改后的文件
-                        with open(game_file_path, 'w', encoding='utf-8') as f:
-                            json.dump(modified_data, f, ensure_ascii=False, indent=4)
-                        
-                        print(f"文件 {relative_path} 修改已应用")
-                    else:
-                        print(f"警告: 游戏目录中未找到文件 {relative_path}")
-            else:
-                print("没有自定义汉化修改需要应用")
+        from functions.dowloads.zeroasso_dow import HeadlessDownload
+        check_startup_budget("启动器模式")
+        if HeadlessDownload('workshop').run():
+            print("翻译下载完成")
         else:
-            print("没有找到changes.json文件，跳过自定义汉化修改")
-    except Exception as e:
-        print(f"应用自定义汉化修改时出错: {e}")
-    
-    # 气泡渐变色处理
-    if settings_manager.get_setting('enable_text_gradient'):
-        from functions.fancy.dialog_colorful import main as handle_colorful
-        handle_colorful()
-        print("气泡渐变色处理完成")
-
-    # 复制字体文件夹到汉化目录下
-    print("开始复制字体文件夹到汉化目录下...")
-    try:
-        if os.path.exists(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font'): # type: ignore
-            # 创建Font文件夹
-            os.makedirs(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font', exist_ok=True) # type: ignore
-
-        shutil.copytree('Font', config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/Font', dirs_exist_ok=True) # type: ignore
-        print("字体文件夹复制完成")
+            print("翻译下载失败，使用现有的汉化文件")
+        with span("安装下载内容"):
+            install_downloads()
+        run_game()
     except Exception as e:
-        print(f"复制字体文件夹时出错: {e}")
+        print(f"启动器模式执行出错: {e}")
+        dowloading = False
+        main()
         return
 
-    from functions.dowloads.zeroasso_dow import create_config_file
-    create_config_file(settings_manager.get_setting('game_path'))
-
-    # 是否设置用户名称
-    if settings_manager.get_setting('enable_show_user_name'):
-        set_user_name()
-
-    # 是否进行 EGO 样式美化
-    if settings_manager.get_setting('enable_ego_style'):
-        from functions.fancy.EGO_colorful import main as apply_ego_style
-        apply_ego_style()
-
-    # 技能描述美化
-    if settings_manager.get_setting('enable_skill_style'):
-        from functions.fancy.skill_info import handle_skill
-        handle_skill(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/') # type: ignore
+    print("启动器模式执行完成，程序退出")
+    get_profiler().finish()
+    os._exit(0)
 
-    if settings_manager.get_setting('enable_speical_tip'):
-        from functions.fancy.hint_set import simple_replace
-        simple_replace(config_path + '/LimbusCompany_Data/Lang/LLC_zh-CN/BattleHint.json') # type: ignore
+def run_game():
+    global config_path, settings_manager
+    from functions.deploy import compute_fingerprint, is_up_to_date
+
+    # 汉化版本、自定义修改、设置和字体都没变时，游戏目录中的汉化就是最新的，直接启动
+    with span("计算汉化指纹"):
+        fingerprint = compute_fingerprint(settings_manager)
+        up_to_date = is_up_to_date(config_path, fingerprint) # type: ignore
+    if up_to_date:
+        print("汉化文件没有变化，跳过部署")
+    else:
+        with span("部署汉化"):
+            deployed = deploy_translation(fingerprint)
+        if not deployed:
+            return
 
     # 载入mod并启动游戏
     print("开始载入mod并启动游戏...")
     from functions.load_mod import main as load_mod_and_launch
-    load_mod_and_launch(config_path + '/LimbusCompany.exe') # type: ignore
-
+    with span("启动游戏"):
+        load_mod_and_launch(config_path + '/LimbusCompany.exe') # type: ignore
+
+    # 游戏已经启动，等后台的联网检查更新完再退出，供下次启动使用
+    from functions.dowloads.net_cache import get_network_cache
+    with span("等待后台联网检查"):
+        get_network_cache().wait_for_refresh()
+    get_profiler().finish()
     os._exit(0)
 
-def set_user_name():
-    """设置用户名称到 UserInfo_Friends.json 中"""
-    global settings_manager, config_path
-    user_name = settings_manager.get_setting('user_name')
-    from json import dump, load
-    datalist = load(open(f'{config_path}/LimbusCompany_Data/Lang/LLC_zh-CN/UserInfo_Friends.json','r',encoding='utf-8'))
-    for data in datalist['dataList']:
-        if data['id'] == 'Uid_Copy':
-            data['content'] = f'{user_name}'
-    dump(datalist, indent=4, fp=open(f'{config_path}/LimbusCompany_Data/Lang/LLC_zh-CN/UserInfo_Friends.json','w',encoding='utf-8'))
-
-# 应用changes.json修改的辅助函数
-def apply_changes_to_data(original_data, changes):
-    """递归应用修改到数据 - 适配新的修改记录结构（包含id）"""
-
-    print(f"应用用户自定义json修改: {type(original_data)}")
-
-    if isinstance(original_data, dict) and isinstance(changes, dict):
-        result = {}
-        for key, value in original_data.items():
-            if key in changes:
-                # 如果changes中有对应的键，应用修改
-                if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
-                    result[key] = apply_changes_to_data(value, changes[key])
-                else:
-                    result[key] = changes[key]
-            else:
-                result[key] = value
-        return result
-    elif isinstance(original_data, list) and isinstance(changes, list):
-        result = []
-        
-        # 检查是否是包含id的字典列表的特殊修改记录
-        if (len(original_data) > 0 and isinstance(original_data[0], dict) and 
-            'id' in original_data[0] and len(changes) > 0 and 
-            isinstance(changes[0], dict) and 'id' in changes[0]):
-            
-            # 对于包含id的字典列表，根据id进行匹配修改
-            original_dict = {item['id']: item for item in original_data if 'id' in item}
-            
-            for change_item in changes:
-                if isinstance(change_item, dict) and 'id' in change_item:
-                    change_id = change_item['id']
-                    
-                    if change_id in original_dict:
-                        # 找到对应的原始项
-                        original_item = original_dict[change_id]
-                        
-                        if 'action' in change_item:
-                            # 处理特殊操作
-                            if change_item['action'] == 'deleted':
-                                # 删除项，不添加到结果中
-                                continue
-                            elif change_item['action'] == 'added':
-                                # 新增项，直接添加到结果中
-                                result.append(change_item.get('changes', change_item))
-                                continue
-                        
-                        # 应用修改
-                        if 'changes' in change_item:
-                            # 有具体的修改内容
-                            modified_item = apply_changes_to_data(original_item, change_item['changes'])
-                            result.append(modified_item)
-                        else:
-                            # 没有具体修改内容，使用原始项
-                            result.append(original_item)
-                    else:
-                        # 新增项（id不在原始数据中）
-                        if 'action' in change_item and change_item['action'] == 'added':
-                            result.append(change_item.get('changes', change_item))
-                        else:
-                            # 未知情况，保留原始项
-                            result.append(original_dict.get(change_id, change_item))
-            
-            # 添加未被修改的原始项
-            for original_item in original_data:
-                if isinstance(original_item, dict) and 'id' in original_item:
-                    original_id = original_item['id']
-                    if original_id not in [item['id'] for item in changes if isinstance(item, dict) and 'id' in item]:
-                        result.append(original_item)
-                else:
-                    # 对于不包含id的项，直接添加
-                    result.append(original_item)
-            
-            return result
-        else:
-            # 对于普通的列表，使用原来的逻辑
-            for i, item in enumerate(original_data):
-                if i < len(changes):
-                    if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
-                        result.append(apply_changes_to_data(item, changes[i]))
-                    else:
-                        result.append(changes[i])
-                else:
-                    result.append(item)
-            return result
-    else:
-        return original_data
+def deploy_translation(fingerprint=None) -> bool:
+    """把汉化部署到游戏目录：在暂存目录中放置汉化包和字体、处理汉化文件，完成后整体换上
+
+    Args:
+        fingerprint: 本次部署的输入指纹，全部步骤成功后记录下来，下次启动时用于跳过部署
+
+    Returns:
+        部署失败、无法启动游戏时返回 False
+    """
+    global config_path, settings_manager
+    from functions.deploy import (StagingBuilder, TreeLinker, prepare_staging, discard_staging, swap_in,
+                                  clear_fingerprint, save_fingerprint, clear_manifest, save_manifest)
+    from functions.fancy.pipeline import PACK_NAME, collect_options, plan_files, run_pipeline
+    complete = True
+    lang_dir = os.path.join(config_path, 'LimbusCompany_Data', 'Lang') # type: ignore
+    options = collect_options(settings_manager)
+    # 对照上次的部署清单，没变的文件直接沿用游戏目录中已有的，其余的用硬链接代替复制（不在同一个磁盘时自动改为复制）
+    builder = StagingBuilder(config_path, TreeLinker()) # type: ignore
+
+    # 在 LimbusCompany_Data/Lang/LLC_zh-CN.staging 中构建，游戏目录中正在使用的汉化不受影响
+    with span("准备暂存目录"):
+        staging_path = prepare_staging(config_path) # type: ignore
+    print(f"开始复制 workshop 下的 LLC_zh-CN 文件夹和字体文件夹到游戏目录下的 {config_path}")
+    try:
+        prefix = PACK_NAME + '/'
+        transformed = {relpath[len(prefix):] for relpath in plan_files(lang_dir, options, pack_dir='workshop/LLC_zh-CN')
+                       if relpath.startswith(prefix)}
+        with span("放置汉化文件"):
+            builder.place_sources([('workshop/LLC_zh-CN', ''), ('Font', 'Font')], transformed)
+        print("汉化复制完成")
+    except Exception as e:
+        print(f"效用汉化复制文件夹时出错: {e}")
+        discard_staging(config_path) # type: ignore
+        return False
+
+    # 自定义汉化修改、气泡渐变、用户名称、EGO样式、技能描述、战斗提示：每个文件只读写一次
+    print("开始处理汉化文件...")
+    try:
+        reusable = builder.reusable_outputs(transformed)
+        with span("处理汉化文件（总计）", files=len(transformed)):
+            run_pipeline(lang_dir, options, pack_dir=staging_path,
+                         reuse={prefix + relpath: value for relpath, value in reusable.items()})
+        with span("记录部署清单"):
+            builder.record_outputs(transformed, reusable)
+    except Exception as e:
+        # 处理到一半的暂存目录不能换上，保留正在使用的汉化目录
+        print(f"处理汉化文件时出错: {e}")
+        discard_staging(config_path) # type: ignore
+        if os.path.isdir(os.path.join(lang_dir, PACK_NAME)):
+            print("保留游戏目录中上次部署的汉化")
+            return True
+        return False
+
+    print(f"汉化文件部署方式: {builder.summary()}")
+
+    # 构建完成，用重命名换上新的汉化目录（旧目录保留为 LLC_zh-CN.previous）
+    clear_fingerprint(config_path) # type: ignore
+    clear_manifest(config_path) # type: ignore
+    try:
+        with span("替换汉化目录"):
+            swap_in(config_path) # type: ignore
+    except Exception as e:
+        print(f"替换汉化目录时出错: {e}")
+        discard_staging(config_path) # type: ignore
+        return False
+    save_manifest(config_path, builder.files) # type: ignore
+
+    from functions.dowloads.zeroasso_dow import create_config_file
+    with span("创建配置文件"):
+        created = create_config_file(settings_manager.get_setting('game_path'))
+    if not created:
+        complete = False
+
+    if complete and fingerprint:
+        save_fingerprint(config_path, fingerprint) # type: ignore
+    return True
 
 def main():
     """主函数"""
@@ -1310,6 +1284,7 @@ def main():
 
     # 创建启动画面
     splash, splash_root = create_simple_splash(root)
+    check_startup_budget("启动画面")
 
     
     # 定义应用程序初始化完成回调
@@ -1321,6 +1296,7 @@ def main():
         
         # 等待一小段时间确保界面完全渲染
         root.after(3000, lambda: root.deiconify())
+        from functions.sound_ulits import play_sound
         root.after(3000, lambda: play_sound('assets/voices/welcome.wav'))
 
         # 检查设置
@@ -1333,4 +1309,23 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 打包后的程序启动汉化文件处理子进程时需要
+    from multiprocessing import freeze_support
+    freeze_support()
+
+    if "-prefetch" in sys.argv:
+        # 由计划任务启动：只在后台预下载汉化包，不打开窗口
+        from functions.dowloads.prefetch import prefetch_once
+        prefetch_once()
+        sys.exit(0)
+    if "-refresh" in sys.argv:
+        # 忽略快速启动的缓存，重新检查所有联网项目
+        from functions.dowloads.net_cache import force_refresh
+        force_refresh()
+        # 只影响缓存，不算作命令行模式（check_settings 以是否有其它参数判断）
+        sys.argv.remove("-refresh")
+    if "-launcher" in sys.argv:
+        # 由 launcher.vbs 在游戏启动前调用：不打开主界面
+        run_launcher()
+    else:
+        main()
\ No newline at end of file
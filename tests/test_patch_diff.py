@@ -0,0 +1,121 @@
+"""
+patch_diff 中的差异计算
+
+对照原先的 `validate_data_structure` 和 `find_changes`，检查 `diff_documents` 的结果完全一致。
+"""
+import copy
+import json
+import random
+import unittest
+
+from functions.patch_diff import SubtreeHashes, diff_documents, same_value
+
+
+def _legacy_validate_data_structure(original, edited):
+    """原先的结构检查，作为对照"""
+    if type(original) != type(edited):
+        return False
+    if isinstance(original, dict):
+        if set(original.keys()) != set(edited.keys()):
+            return False
+        return all(_legacy_validate_data_structure(original[key], edited[key]) for key in original)
+    if isinstance(original, list):
+        if len(original) != len(edited):
+            return False
+        return all(_legacy_validate_data_structure(a, b) for a, b in zip(original, edited))
+    return True
+
+
+def _legacy_find_changes(original, edited):
+    """原先的 find_changes（结构一致时的分支），作为对照"""
+    if isinstance(original, dict) and isinstance(edited, dict):
+        changes = {}
+        for key in original:
+            if key in edited:
+                child_changes = _legacy_find_changes(original[key], edited[key])
+                if child_changes is not None:
+                    changes[key] = child_changes
+        return changes if changes else None
+    if isinstance(original, list) and isinstance(edited, list):
+        changes = []
+        for a, b in zip(original, edited):
+            child_changes = _legacy_find_changes(a, b)
+            if child_changes is None:
+                continue
+            if isinstance(a, dict) and isinstance(b, dict) and 'id' in a and 'id' in b:
+                changes.append({'id': a['id'], 'changes': child_changes})
+            else:
+                changes.append(child_changes)
+        return changes if changes else None
+    return edited if original != edited else None
+
+
+def _random_document(rng, depth=0):
+    roll = rng.random()
+    if depth < 3 and roll < 0.3:
+        return {'dataList': [{'id': i, 'content': f"文本{rng.randrange(5)}", 'extra': _random_document(rng, depth + 1)}
+                             for i in range(rng.randrange(4))]}
+    if depth < 3 and roll < 0.5:
+        return [_random_document(rng, depth + 1) for _ in range(rng.randrange(4))]
+    if depth < 3 and roll < 0.7:
+        return {f"k{i}": _random_document(rng, depth + 1) for i in range(rng.randrange(4))}
+    return rng.choice([1, 1.0, True, None, "a", "b", 0, False])
+
+
+def _mutate(rng, node):
+    if isinstance(node, dict) and node and rng.random() < 0.7:
+        key = rng.choice(list(node))
+        if rng.random() < 0.1:
+            del node[key]
+        else:
+            node[key] = _mutate(rng, node[key])
+        return node
+    if isinstance(node, list) and node and rng.random() < 0.7:
+        i = rng.randrange(len(node))
+        if rng.random() < 0.1:
+            node.pop(i)
+        else:
+            node[i] = _mutate(rng, node[i])
+        return node
+    return rng.choice([1, 1.0, True, None, "a", "c", [], {}])
+
+
+class DiffDocumentsTest(unittest.TestCase):
+
+    def check(self, original, edited, original_hashes=None):
+        ok, changes = diff_documents(original, edited, original_hashes)
+        legacy_ok = _legacy_validate_data_structure(original, edited)
+        self.assertEqual(ok, legacy_ok)
+        if ok:
+            self.assertEqual(changes, _legacy_find_changes(original, edited))
+
+    def test_random_cases(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            original = _random_document(rng)
+            edited = copy.deepcopy(original)
+            for _ in range(rng.randrange(3)):
+                edited = _mutate(rng, edited)
+            with self.subTest(original=original, edited=edited):
+                self.check(original, edited)
+
+    def test_large_document_with_primed_hashes(self):
+        original = {'dataList': [{'id': i, 'levelList': [{'desc': f"技能描述 {i} {j}", 'coinList': [j] * 5} for j in range(4)]}
+                                 for i in range(2000)]}
+        edited = json.loads(json.dumps(original))
+        edited['dataList'][1234]['levelList'][2]['desc'] = "自定义"
+        hashes = SubtreeHashes(original)
+        hashes.prime()
+        self.check(original, edited, hashes)
+        self.assertEqual(diff_documents(original, edited, hashes)[1],
+                         {'dataList': [{'id': 1234, 'changes': {'levelList': [{'desc': "自定义"}]}}]})
+
+    def test_type_only_changes(self):
+        # == 认为 1、1.0 和 True 相等，修改记录中要保留类型的变化
+        self.check({'a': [1, {'b': 1}]}, {'a': [1.0, {'b': True}]})
+        self.assertFalse(same_value([1], [True]))
+        self.assertTrue(same_value({'a': [1.0]}, {'a': [1.0]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+patches 中修改记录的应用与编译
+
+对照原先逐项扫描的实现，检查 `apply_changes_to_data` 和编译后执行的 `run_ops` 结果完全一致。
+"""
+import copy
+import json
+import random
+import unittest
+
+from functions.patches import apply_changes, apply_changes_to_data, compile_changes, run_ops
+
+
+def _legacy_apply_changes_to_data(original_data, changes):
+    """原先逐项扫描的实现（去掉了其中的日志输出），作为对照"""
+
+    if isinstance(original_data, dict) and isinstance(changes, dict):
+        result = {}
+        for key, value in original_data.items():
+            if key in changes:
+                # 如果changes中有对应的键，应用修改
+                if isinstance(value, (dict, list)) and isinstance(changes[key], (dict, list)):
+                    result[key] = _legacy_apply_changes_to_data(value, changes[key])
+                else:
+                    result[key] = changes[key]
+            else:
+                result[key] = value
+        return result
+    elif isinstance(original_data, list) and isinstance(changes, list):
+        result = []
+        
+        # 检查是否是包含id的字典列表的特殊修改记录
+        if (len(original_data) > 0 and isinstance(original_data[0], dict) and 
+            'id' in original_data[0] and len(changes) > 0 and 
+            isinstance(changes[0], dict) and 'id' in changes[0]):
+            
+            # 对于包含id的字典列表，根据id进行匹配修改
+            original_dict = {item['id']: item for item in original_data if 'id' in item}
+            
+            for change_item in changes:
+                if isinstance(change_item, dict) and 'id' in change_item:
+                    change_id = change_item['id']
+                    
+                    if change_id in original_dict:
+                        # 找到对应的原始项
+                        original_item = original_dict[change_id]
+                        
+                        if 'action' in change_item:
+                            # 处理特殊操作
+                            if change_item['action'] == 'deleted':
+                                # 删除项，不添加到结果中
+                                continue
+                            elif change_item['action'] == 'added':
+                                # 新增项，直接添加到结果中
+                                result.append(change_item.get('changes', change_item))
+                                continue
+                        
+                        # 应用修改
+                        if 'changes' in change_item:
+                            # 有具体的修改内容
+                            modified_item = _legacy_apply_changes_to_data(original_item, change_item['changes'])
+                            result.append(modified_item)
+                        else:
+                            # 没有具体修改内容，使用原始项
+                            result.append(original_item)
+                    else:
+                        # 新增项（id不在原始数据中）
+                        if 'action' in change_item and change_item['action'] == 'added':
+                            result.append(change_item.get('changes', change_item))
+                        else:
+                            # 未知情况，保留原始项
+                            result.append(original_dict.get(change_id, change_item))
+            
+            # 添加未被修改的原始项
+            for original_item in original_data:
+                if isinstance(original_item, dict) and 'id' in original_item:
+                    original_id = original_item['id']
+                    if original_id not in [item['id'] for item in changes if isinstance(item, dict) and 'id' in item]:
+                        result.append(original_item)
+                else:
+                    # 对于不包含id的项，直接添加
+                    result.append(original_item)
+            
+            return result
+        else:
+            # 对于普通的列表，使用原来的逻辑
+            for i, item in enumerate(original_data):
+                if i < len(changes):
+                    if isinstance(item, (dict, list)) and isinstance(changes[i], (dict, list)):
+                        result.append(_legacy_apply_changes_to_data(item, changes[i]))
+                    else:
+                        result.append(changes[i])
+                else:
+                    result.append(item)
+            return result
+    else:
+        return original_data
+
+
+def _random_case(rng):
+    """随机生成一组原始数据和修改记录（覆盖修改、新增、删除、重复 id、无 id 项、普通列表）"""
+    def entry(i):
+        return {"id": i, "content": f"文本{i}", "levelList": [{"desc": f"描述{i}", "coin": [1, 2]}]}
+
+    ids = rng.sample(range(60), rng.randint(1, 40))
+    data_list = [entry(i) for i in ids]
+    if rng.random() < 0.3:
+        data_list.append({"content": "没有id的项"})
+    if rng.random() < 0.2:
+        data_list.append(entry(ids[0]))
+
+    change_list = []
+    for i in rng.sample(range(80), rng.randint(1, 20)):
+        roll = rng.random()
+        if roll < 0.5:
+            change_list.append({"id": i, "changes": {"content": f"修改{i}", "levelList": [{"desc": "新描述"}]}})
+        elif roll < 0.65:
+            change_list.append({"id": i, "action": "deleted"})
+        elif roll < 0.8:
+            change_list.append({"id": i, "action": "added", "changes": entry(i)})
+        elif roll < 0.9:
+            change_list.append({"id": i})
+        else:
+            change_list.append({"id": i, "action": "renamed", "changes": {"content": "其它操作"}})
+    rng.shuffle(change_list)
+    return {"dataList": data_list, "other": [1, 2, 3]}, {"dataList": change_list, "other": [9], "missing": 1}
+
+
+class ApplyChangesTest(unittest.TestCase):
+
+    def check(self, original_data, changes):
+        expected = _legacy_apply_changes_to_data(copy.deepcopy(original_data), changes)
+        self.assertEqual(apply_changes_to_data(copy.deepcopy(original_data), changes), expected)
+        # 编译结果会保存为 json，执行前先经过一次序列化
+        ops, _ = compile_changes(original_data, changes)
+        self.assertEqual(run_ops(copy.deepcopy(original_data), json.loads(json.dumps(ops))), expected)
+
+    def test_random_cases(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            original_data, changes = _random_case(rng)
+            with self.subTest(original=original_data, changes=changes):
+                self.check(original_data, changes)
+
+    def test_plain_list_by_position(self):
+        self.check({"a": [1, [2, 3], {"b": 4}]}, {"a": [9, [8], {"b": 7}, 6]})
+
+    def test_stats(self):
+        original_data = {"dataList": [{"id": 1, "content": "a"}, {"id": 2, "content": "b"}]}
+        changes = {"dataList": [{"id": 1, "changes": {"content": "c"}}, {"id": 2, "action": "deleted"},
+                                {"id": 3, "action": "added", "changes": {"id": 3, "content": "d"}}]}
+        result, stats = apply_changes(original_data, changes)
+        self.assertEqual(result, {"dataList": [{"id": 1, "content": "c"}, {"id": 3, "content": "d"}]})
+        self.assertEqual((stats.modified, stats.added, stats.deleted), (1, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()